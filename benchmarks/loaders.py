@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Measure the wall time and peak memory of loading and transforming large backups.
+
+For each size, a synthetic backup is made by `synthetic_library.py` (and kept in
+--data-dir for the next run), then each operation runs in a fresh interpreter, so
+its peak RSS is its own.  The "import" operation only imports spotify2ytmusic, as
+a baseline for the others.  An operation that fails, or is killed for running out
+of memory, is reported as such and the others still run.  Run from the top of the
+repository:
+
+    python benchmarks/loaders.py [--sizes 10000,100000,1000000] [--engine stdlib]
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import SUPPRESS, ArgumentParser
+from dataclasses import asdict
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOP_DIR)
+
+import synthetic_library  # noqa: E402
+from spotify2ytmusic import (  # noqa: E402
+    backend,
+    backup_index,
+    json_backend,
+    reverse_playlist,
+)
+from spotify2ytmusic.catalog import TrackCatalog  # noqa: E402
+
+
+def _count(iterable) -> int:
+    return sum(1 for _ in iterable)
+
+
+def _list_playlists(filename: str, playlist_id: str) -> int:
+    """The Spotify half of `s2yt_list_playlists`."""
+    lines = [
+        f"{src_pl.get('id')} - {src_pl['name']:50} ({len(src_pl['tracks'])} tracks)"
+        for src_pl in backend.load_playlists_json(filename)["playlists"]
+    ]
+    return len(lines)
+
+
+def _catalog(filename: str, playlist_id: str) -> int:
+    """A TrackCatalog of every playlist, as `s2yt_plan` and `s2yt_load_liked` make."""
+    spotify_pls = backend.load_playlists_json(filename)
+    catalog = TrackCatalog(
+        track
+        for src_pl in spotify_pls["playlists"]
+        for track in backend.iter_playlist_tracks(src_pl, reverse_playlist=False)
+    )
+    return len(catalog)
+
+
+def _reverse_playlist(filename: str, playlist_id: str) -> float:
+    """Reverse a copy of the backup (the copy is not timed)."""
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(filename)) as tmpdir:
+        copy = os.path.join(tmpdir, "library.json")
+        shutil.copyfile(filename, copy)
+        start = time.perf_counter()
+        reverse_playlist.reverse_playlist(copy, verbose=False, replace=True)
+        return time.perf_counter() - start
+
+
+#  Operation name to function(backup file, id of its largest playlist), run in order
+#  (load_spotify_playlist uses the index build_index writes).  A function returning a
+#  float returns the seconds to report, for those that prepare something first.
+OPERATIONS = {
+    "import": lambda filename, playlist_id: 0,
+    "load_playlists_json": lambda filename, playlist_id: len(
+        backend.load_playlists_json(filename)["playlists"]
+    ),
+    "list_playlists": _list_playlists,
+    "build_index": lambda filename, playlist_id: len(
+        backup_index.build_index(filename)["playlists"]
+    ),
+    "load_spotify_playlist": lambda filename, playlist_id: len(
+        backend.load_spotify_playlist(playlist_id, filename)["tracks"]
+    ),
+    "iter_spotify_playlist": lambda filename, playlist_id: _count(
+        backend.iter_spotify_playlist(playlist_id, filename)
+    ),
+    "iter_spotify_liked_albums": lambda filename, playlist_id: _count(
+        backend.iter_spotify_liked_albums(filename)
+    ),
+    "catalog": _catalog,
+    "reverse_playlist": _reverse_playlist,
+}
+
+
+def peak_rss_mb() -> float:
+    """The peak resident memory of this process, in MB (None if unknown)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #  Bytes on macOS, kilobytes elsewhere
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def measure(operation: str, filename: str, playlist_id: str) -> None:
+    """Run one operation and print its time and peak RSS as JSON."""
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = OPERATIONS[operation](filename, playlist_id)
+    seconds = time.perf_counter() - start
+    if isinstance(result, float):
+        seconds = result
+    print(json.dumps({"seconds": seconds, "peak_rss_mb": peak_rss_mb()}))
+
+
+def library(size: int, data_dir: str, args) -> tuple:
+    """The backup of `size` tracks and its statistics, generated if not cached."""
+    spec = synthetic_library.LibrarySpec(
+        tracks=size,
+        playlists=max(10, size // 500),
+        markets=args.markets,
+        seed=args.seed,
+    )
+    filename = os.path.join(data_dir, f"library-{size}.json")
+    meta_filename = filename + ".meta"
+    if os.path.exists(filename) and os.path.exists(meta_filename):
+        with open(meta_filename, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["spec"] == asdict(spec):
+            return filename, meta["stats"]
+
+    print(f"Generating {size} tracks...", file=sys.stderr)
+    stats = synthetic_library.write_library(filename, spec)
+    with open(meta_filename, "w", encoding="utf-8") as f:
+        json.dump({"spec": asdict(spec), "stats": stats}, f)
+    return filename, stats
+
+
+def run_operation(operation: str, filename: str, playlist_id: str) -> dict:
+    """Run one operation in a fresh interpreter, returning its measurements."""
+    proc = subprocess.run(
+        [sys.executable, __file__, "--measure", operation, filename, playlist_id],
+        cwd=TOP_DIR,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        return {"error": f"exit {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--sizes",
+        default="10000,100000,1000000",
+        help="Comma separated numbers of tracks (default: 10000,100000,1000000)",
+    )
+    parser.add_argument(
+        "--operations",
+        default=",".join(OPERATIONS),
+        help="Comma separated operations to measure (default: all)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["auto", "orjson", "stdlib"],
+        default=None,
+        help="JSON engine, sets S2YT_JSON_ENGINE (default: the environment's)",
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=os.path.join(tempfile.gettempdir(), "s2yt-benchmarks"),
+        help="Where the synthetic backups are kept between runs",
+    )
+    parser.add_argument(
+        "--markets",
+        type=int,
+        default=synthetic_library.LibrarySpec.markets,
+        help="Countries in each available_markets list, real backups have up to 185 "
+        "and are that much larger (default: 10)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Random seed of the libraries"
+    )
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("--measure", nargs=3, help=SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    if args.engine:
+        os.environ[json_backend.ENGINE_ENV] = args.engine
+    print(f"JSON engine: {json_backend.engine()}")
+    os.makedirs(args.data_dir, exist_ok=True)
+    operations = args.operations.split(",")
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        filename, stats = library(size, args.data_dir, args)
+        print(
+            f"\n== {size} tracks, {stats['bytes'] / 1024 / 1024:.0f} MB, largest playlist "
+            f"{stats['largest_playlist_tracks']} tracks"
+        )
+        print(f"{'operation':30} {'seconds':>10} {'peak RSS MB':>12}")
+        for operation in operations:
+            result = run_operation(operation, filename, stats["largest_playlist_id"])
+            if "error" in result:
+                print(f"{operation:30} {result['error']:>23}")
+            else:
+                print(
+                    f"{operation:30} {result['seconds']:10.2f} {result['peak_rss_mb'] or 0:12.0f}"
+                )
+            results.append(
+                {"tracks": size, "bytes": stats["bytes"], "operation": operation}
+                | result
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
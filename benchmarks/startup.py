@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Measure the startup (import) cost of each `s2yt_*` entry point.
+
+The entry points are read from `pyproject.toml`, and for each one a fresh interpreter
+imports the entry point function, the same as the generated console script does.
+An empty interpreter start is measured too, so the cost added by spotify2ytmusic is
+visible.  Run from the top of the repository:
+
+    python benchmarks/startup.py [--runs 20]
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def entry_points(pyproject: str = os.path.join(TOP_DIR, "pyproject.toml")) -> dict:
+    """Return {script_name: (module, function)} from the [tool.poetry.scripts] section."""
+    scripts = {}
+    in_scripts = False
+    with open(pyproject, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("["):
+                in_scripts = line == "[tool.poetry.scripts]"
+                continue
+            m = re.match(r'^(\w+)\s*=\s*"([\w.]+):(\w+)"', line)
+            if in_scripts and m:
+                scripts[m.group(1)] = (m.group(2), m.group(3))
+    return scripts
+
+
+def time_command(argv: list, runs: int) -> float:
+    """Median wall time, in milliseconds, of running `argv` `runs` times."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            argv,
+            cwd=TOP_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=20,
+        help="Number of interpreter starts to take the median of (default: 20)",
+    )
+    args = parser.parse_args()
+
+    baseline = time_command([sys.executable, "-c", "pass"], args.runs)
+    print(f"{'python (empty interpreter)':40} {baseline:8.1f} ms")
+
+    commands = {
+        name: [sys.executable, "-c", f"from {module} import {function}"]
+        for name, (module, function) in entry_points().items()
+    }
+    #  Runs the command listing, which is what every "python -m" invocation pays for
+    commands["python -m spotify2ytmusic"] = [sys.executable, "-m", "spotify2ytmusic"]
+
+    for name, argv in commands.items():
+        elapsed = time_command(argv, args.runs)
+        print(f"{name:40} {elapsed:8.1f} ms  (+{elapsed - baseline:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Generate large, realistic Spotify backups for benchmarks and tests.
+
+The backup has the structure `spotify_backup.py` writes: the playlists with their
+tracks in Spotify API form, a "Liked Songs" playlist, and the liked albums with
+their tracks.  The names mix scripts (accented Latin, CJK, Hangul, Cyrillic,
+Arabic, Hebrew, Greek, emoji and decomposed accents) along with the decorations
+Spotify uses ("(feat. ...)", "- Remastered 2011"...), some playlist entries repeat
+tracks used before, and some are malformed, with a None track.
+
+The same options and seed always give the same file, and it is written as it is
+generated, so a million tracks take little memory.  Run from the top of the
+repository:
+
+    python benchmarks/synthetic_library.py library.json --tracks 100000 [--playlists 200]
+"""
+
+import json
+import os
+import random
+import string
+import sys
+from argparse import ArgumentParser
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TOP_DIR)
+
+from spotify2ytmusic import backup_compression  # noqa: E402
+
+_BASE62 = string.digits + string.ascii_letters
+
+#  Words the names are made of, by script
+_LATIN = (
+    "love night blue heart fire dream city summer rain road light gold ghost river "
+    "stone wild echo neon paper silver young midnight ocean desert highway radio "
+    "golden broken electric velvet shadow morning sugar thunder crystal"
+).split()
+_ACCENTED = (
+    "café señorita über naïve déjà vu été mañana façade smörgåsbord noël crème "
+    "jalapeño fiancée København São Paulo Ñandú Żółć Ångström Dvořák Björk Sigur Rós"
+).split()
+_OTHER_SCRIPTS = [
+    "夜 愛 東京 さくら 心 夢 光 雨 青春 星 花火 恋".split(),
+    "메아리 사랑 서울 하늘 음악 별 바다 기억".split(),
+    "Ночь Любовь Москва звезда дождь Песня Город Сердце".split(),
+    "حب ليل قمر بحر قلب".split(),
+    "אהבה לילה ירח שיר".split(),
+    "Αγάπη Νύχτα Θάλασσα Όνειρο".split(),
+    #  Decomposed accents (NFD), which normalize differently from the precomposed
+    "Café Amélie Beyoncé Niño Mötley".split(),
+]
+_EMOJI = ["🔥", "🎶", "💔", "🌙", "✨", "🚀", "❤️", "🌊"]
+_TITLE_DECORATIONS = [
+    " (Remastered 2011)",
+    " - Live",
+    " - Radio Edit",
+    " (Acoustic)",
+    " [Explicit]",
+    " - 2009 Remaster",
+]
+_ALBUM_DECORATIONS = [" (Deluxe Edition)", " [Expanded]", " (Live)", " (Anniversary)"]
+_MARKETS = (
+    "AD AE AR AT AU BE BG BR CA CH CL CO CR CZ DE DK DO EC EE ES FI FR GB GR GT HK "
+    "HU ID IE IL IN IS IT JP KR LT LU LV MX MY NL NO NZ PA PE PH PL PT PY RO SE SG "
+    "SK SV TH TR TW US UY VN ZA"
+).split()
+
+
+@dataclass
+class LibrarySpec:
+    """What to generate."""
+
+    #  Playlist entries, including the liked songs and malformed entries
+    tracks: int = 10000
+    playlists: int = 50
+    #  Fraction of the entries that are in "Liked Songs"
+    liked_fraction: float = 0.2
+    #  Liked albums, None for one per 1000 tracks
+    albums: Optional[int] = None
+    #  Fraction of the entries that repeat a track used before
+    duplicate_ratio: float = 0.3
+    #  Fraction of the entries whose track is None
+    malformed_ratio: float = 0.001
+    #  Fraction of the names that are not (only) in Latin script
+    unicode_ratio: float = 0.3
+    #  Countries listed in each track's and album's "available_markets", which is
+    #  most of the size of real backups (up to 185)
+    markets: int = 10
+    seed: int = 0
+
+
+class _Generator:
+    """Builds the objects of a library, each determined by the seed and its number."""
+
+    def __init__(self, spec: LibrarySpec) -> None:
+        self.spec = spec
+        self.markets = _MARKETS[: spec.markets]
+        self.artist_count = max(10, spec.tracks // 25)
+        self._artists: Dict[int, Dict] = {}
+        self._albums: Dict[Tuple[int, int], Dict] = {}
+
+    def rng(self, *key) -> random.Random:
+        return random.Random(f"{self.spec.seed}:{':'.join(map(str, key))}")
+
+    def words(self, rng: random.Random, count: int) -> str:
+        if rng.random() < self.spec.unicode_ratio:
+            pool = rng.choice(_OTHER_SCRIPTS + [_ACCENTED])
+            text = " ".join(rng.choice(pool) for _ in range(count))
+            if rng.random() < 0.2:
+                text += " " + rng.choice(_EMOJI)
+            return text
+        return " ".join(rng.choice(_LATIN) for _ in range(count)).title()
+
+    @staticmethod
+    def spotify_id(rng: random.Random) -> str:
+        return "".join(rng.choices(_BASE62, k=22))
+
+    def artist(self, number: int) -> Dict:
+        """The simplified artist object of artist `number`."""
+        artist = self._artists.get(number)
+        if artist is None:
+            rng = self.rng("artist", number)
+            artist_id = self.spotify_id(rng)
+            artist = {
+                "external_urls": {
+                    "spotify": f"https://open.spotify.com/artist/{artist_id}"
+                },
+                "href": f"https://api.spotify.com/v1/artists/{artist_id}",
+                "id": artist_id,
+                "name": self.words(rng, rng.randint(1, 3)),
+                "type": "artist",
+                "uri": f"spotify:artist:{artist_id}",
+            }
+            self._artists[number] = artist
+        return artist
+
+    def album(self, artist_number: int, number: int) -> Dict:
+        """The simplified album object of album `number` of an artist."""
+        key = (artist_number, number)
+        album = self._albums.get(key)
+        if album is None:
+            rng = self.rng("album", artist_number, number)
+            album_id = self.spotify_id(rng)
+            name = self.words(rng, rng.randint(1, 4))
+            if rng.random() < 0.15:
+                name += rng.choice(_ALBUM_DECORATIONS)
+            album = {
+                "album_type": rng.choice(["album", "album", "single", "compilation"]),
+                "artists": [self.artist(artist_number)],
+                "available_markets": self.markets,
+                "external_urls": {
+                    "spotify": f"https://open.spotify.com/album/{album_id}"
+                },
+                "href": f"https://api.spotify.com/v1/albums/{album_id}",
+                "id": album_id,
+                "images": [
+                    {
+                        "height": size,
+                        "url": f"https://i.scdn.co/image/{album_id}{size}",
+                        "width": size,
+                    }
+                    for size in (640, 300, 64)
+                ],
+                "name": name,
+                "release_date": f"{rng.randint(1960, 2024)}-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}",
+                "release_date_precision": "day",
+                "total_tracks": rng.randint(1, 20),
+                "type": "album",
+                "uri": f"spotify:album:{album_id}",
+            }
+            self._albums[key] = album
+        return album
+
+    def track(self, number: int, with_album: bool = True) -> Dict:
+        """The track object of track `number`."""
+        rng = self.rng("track", number)
+        #  A few artists have most of the tracks
+        artist_number = min(int(rng.paretovariate(1.2)) - 1, self.artist_count - 1)
+        artist_number = (artist_number * 7919 + number % 3) % self.artist_count
+        artists = [self.artist(artist_number)]
+        if rng.random() < 0.15:
+            artists.append(self.artist(rng.randrange(self.artist_count)))
+        track_id = self.spotify_id(rng)
+        name = self.words(rng, rng.randint(1, 5))
+        if len(artists) > 1 and rng.random() < 0.5:
+            name += f" (feat. {artists[1]['name']})"
+        elif rng.random() < 0.1:
+            name += rng.choice(_TITLE_DECORATIONS)
+        track = {
+            "artists": artists,
+            "available_markets": self.markets,
+            "disc_number": 1,
+            "duration_ms": rng.randint(90_000, 420_000),
+            "episode": False,
+            "explicit": rng.random() < 0.2,
+            "external_ids": {
+                "isrc": f"{rng.choice(['US', 'GB', 'JP', 'FR'])}{''.join(rng.choices(string.ascii_uppercase + string.digits, k=10))}"
+            },
+            "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+            "href": f"https://api.spotify.com/v1/tracks/{track_id}",
+            "id": track_id,
+            "is_local": False,
+            "name": name,
+            "popularity": rng.randint(0, 100),
+            "preview_url": None,
+            "track": True,
+            "track_number": rng.randint(1, 20),
+            "type": "track",
+            "uri": f"spotify:track:{track_id}",
+        }
+        if with_album:
+            track["album"] = self.album(artist_number, rng.randrange(5))
+        return track
+
+
+def _split(total: int, parts: int, rng: random.Random) -> List[int]:
+    """Split `total` into `parts` sizes (each at least 1 if possible), a few large
+    and most small, like real playlists."""
+    if parts <= 0:
+        return []
+    weights = [rng.paretovariate(1.1) for _ in range(parts)]
+    scale = max(total - parts, 0) / sum(weights)
+    sizes = [min(1, total) + int(w * scale) for w in weights]
+    sizes[0] += total - sum(sizes)
+    return sizes
+
+
+def _entries(
+    gen: _Generator, count: int, state: Dict, playlist_number: int, liked: bool
+) -> Iterator[Dict]:
+    """The track entries of a playlist, `state` counting the tracks made so far."""
+    spec = gen.spec
+    rng = gen.rng("entries", playlist_number)
+    for position in range(count):
+        draw = rng.random()
+        if draw < spec.malformed_ratio:
+            track = None
+            state["malformed"] += 1
+        elif draw < spec.malformed_ratio + spec.duplicate_ratio and state["unique"]:
+            track = gen.track(rng.randrange(state["unique"]))
+        else:
+            track = gen.track(state["unique"])
+            state["unique"] += 1
+        added_at = f"20{10 + position % 15:02}-{1 + position % 12:02}-{1 + position % 28:02}T12:00:00Z"
+        if liked:
+            yield {"added_at": added_at, "track": track}
+        else:
+            yield {
+                "added_at": added_at,
+                "added_by": {"id": "synthetic", "type": "user"},
+                "is_local": False,
+                "primary_color": None,
+                "track": track,
+                "video_thumbnail": {"url": None},
+            }
+
+
+def _write_list(f, items: Iterator) -> None:
+    f.write("[")
+    for i, item in enumerate(items):
+        if i:
+            f.write(", ")
+        f.write(json.dumps(item, ensure_ascii=False))
+    f.write("]")
+
+
+def write_library(
+    filename: str, spec: LibrarySpec, compression: Optional[str] = None
+) -> Dict:
+    """Write a synthetic backup, compressed as `backup_compression.open_backup()`
+    does.
+
+    Returns:
+        Statistics of the library: the numbers of entries, unique and malformed
+        tracks, and the id and size of the largest playlist.
+    """
+    gen = _Generator(spec)
+    rng = gen.rng("library")
+    liked_count = int(spec.tracks * spec.liked_fraction)
+    sizes = _split(spec.tracks - liked_count, spec.playlists, rng)
+    state = {"unique": 0, "malformed": 0}
+    largest = (0, None)
+
+    with backup_compression.open_backup(filename, "w", compression=compression) as f:
+        f.write('{"playlists": [')
+        f.write('{"name": "Liked Songs", "tracks": ')
+        _write_list(f, _entries(gen, liked_count, state, -1, liked=True))
+        f.write("}")
+        for number, size in enumerate(sizes):
+            pl_rng = gen.rng("playlist", number)
+            pl_id = gen.spotify_id(pl_rng)
+            playlist = {
+                "collaborative": False,
+                "description": gen.words(pl_rng, pl_rng.randint(0, 8)),
+                "external_urls": {
+                    "spotify": f"https://open.spotify.com/playlist/{pl_id}"
+                },
+                "href": f"https://api.spotify.com/v1/playlists/{pl_id}",
+                "id": pl_id,
+                "images": [],
+                "name": gen.words(pl_rng, pl_rng.randint(1, 4)),
+                "owner": {"display_name": "Synthetic", "id": "synthetic"},
+                "primary_color": None,
+                "public": pl_rng.random() < 0.5,
+                "snapshot_id": gen.spotify_id(pl_rng),
+                "type": "playlist",
+                "uri": f"spotify:playlist:{pl_id}",
+            }
+            if size > largest[0]:
+                largest = (size, pl_id)
+            #  The tracks are streamed into the object, in place of its closing brace
+            f.write(", " + json.dumps(playlist, ensure_ascii=False)[:-1])
+            f.write(', "tracks": ')
+            _write_list(f, _entries(gen, size, state, number, liked=False))
+            f.write("}")
+        f.write('], "albums": ')
+
+        album_count = spec.albums if spec.albums is not None else spec.tracks // 1000
+
+        def albums():
+            for number in range(album_count):
+                album_rng = gen.rng("saved album", number)
+                album = dict(
+                    gen.album(album_rng.randrange(gen.artist_count), number % 5)
+                )
+                tracks = [
+                    gen.track(-1 - number * 100 - i, with_album=False)
+                    for i in range(album_rng.randint(5, 14))
+                ]
+                album["tracks"] = {"items": tracks, "total": len(tracks)}
+                yield {"added_at": "2020-01-01T12:00:00Z", "album": album}
+
+        _write_list(f, albums())
+        f.write("}")
+
+    return {
+        "entries": spec.tracks,
+        "unique_tracks": state["unique"],
+        "malformed": state["malformed"],
+        "albums": album_count,
+        "largest_playlist_id": largest[1],
+        "largest_playlist_tracks": largest[0],
+        "bytes": os.path.getsize(filename),
+    }
+
+
+def main():
+    defaults = LibrarySpec()
+    parser = ArgumentParser()
+    parser.add_argument(
+        "output", help="The backup file to write, compressed if it ends in .gz or .zst"
+    )
+    parser.add_argument(
+        "--tracks",
+        type=int,
+        default=defaults.tracks,
+        help="Number of playlist entries (default: 10000)",
+    )
+    parser.add_argument(
+        "--playlists",
+        type=int,
+        default=defaults.playlists,
+        help="Number of playlists, besides Liked Songs (default: 50)",
+    )
+    parser.add_argument(
+        "--liked-fraction",
+        type=float,
+        default=defaults.liked_fraction,
+        help="Fraction of the entries in Liked Songs (default: 0.2)",
+    )
+    parser.add_argument(
+        "--albums",
+        type=int,
+        default=None,
+        help="Number of liked albums (default: one per 1000 tracks)",
+    )
+    parser.add_argument(
+        "--duplicate-ratio",
+        type=float,
+        default=defaults.duplicate_ratio,
+        help="Fraction of the entries that repeat an earlier track (default: 0.3)",
+    )
+    parser.add_argument(
+        "--malformed-ratio",
+        type=float,
+        default=defaults.malformed_ratio,
+        help="Fraction of the entries with a None track (default: 0.001)",
+    )
+    parser.add_argument(
+        "--unicode-ratio",
+        type=float,
+        default=defaults.unicode_ratio,
+        help="Fraction of the names not in plain Latin script (default: 0.3)",
+    )
+    parser.add_argument(
+        "--markets",
+        type=int,
+        default=defaults.markets,
+        help="Countries in each available_markets list, up to 60 (default: 10)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=defaults.seed, help="Random seed (default: 0)"
+    )
+    args = parser.parse_args()
+
+    spec = LibrarySpec(
+        tracks=args.tracks,
+        playlists=args.playlists,
+        liked_fraction=args.liked_fraction,
+        albums=args.albums,
+        duplicate_ratio=args.duplicate_ratio,
+        malformed_ratio=args.malformed_ratio,
+        unicode_ratio=args.unicode_ratio,
+        markets=args.markets,
+        seed=args.seed,
+    )
+    stats = write_library(args.output, spec)
+    print(json.dumps({"spec": asdict(spec), "stats": stats}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,16 @@
 
 from . import cli
 import sys
-import inspect
+import types
 
 def list_commands(module):
     # include only functions defined in e.g. 'cli' module
-    commands = [name for name, obj in inspect.getmembers(module) if inspect.isfunction(obj)]
+    #  (not using `inspect`, it is slow to import and this runs on every invocation)
+    commands = sorted(
+        name
+        for name, obj in vars(module).items()
+        if isinstance(obj, types.FunctionType) and obj.__module__ == module.__name__
+    )
     return commands
 
 available_commands = list_commands(cli)
@@ -1,31 +1,106 @@
 #!/usr/bin/env python3
 
+from __future__ import annotations
+
+import functools
 import json
 import sys
 import os
 import time
-import re
-
-from ytmusicapi import YTMusic
-from typing import Optional, Union, Iterator, Dict, List
-from collections import namedtuple
+import threading
+
+from typing import (
+    Optional,
+    Iterator,
+    Dict,
+    List,
+    Sequence,
+    Set,
+    Tuple,
+    Callable,
+    TYPE_CHECKING,
+)
 from dataclasses import dataclass, field
 
+from . import backup_compression, backup_index, json_backend, profiling, retry
+from .catalog import TrackCatalog
+from .mapping import MappingDB
+from .normalize import match_key
+from .song_info import SongInfo
+from .strategy import LookupStrategy, DEFAULT_ORDER
+from .negative_cache import NegativeCache, DEFAULT_MISS_TTL_DAYS
 
-SongInfo = namedtuple("SongInfo", ["title", "artist", "album"])
+#  ytmusicapi (and the requests stack under it) is slow to import, so it is only
+#  imported when a YTMusic client is actually needed, see `get_ytmusic()`.
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+    from ytmusicapi import YTMusic
 
+#  Called with (tracks processed so far, total tracks or None if unknown)
+ProgressCallback = Callable[[int, Optional[int]], None]
 
-def get_ytmusic() -> YTMusic:
-    """
-    @@@
+
+#  Size of the HTTP connection pool shared by all YTMusic calls in this process.  It
+#  needs to be at least the number of requests that can be in flight at once.
+YTMUSIC_POOL_SIZE = 8
+#  Timeout for YTMusic HTTP requests, the same as the ytmusicapi default session.
+YTMUSIC_TIMEOUT = 30
+#  Number of videoIds sent in each create_playlist or add_playlist_items request.
+PLAYLIST_BATCH_SIZE = 100
+
+_ytmusic: Optional[YTMusic] = None
+_ytmusic_lock = threading.Lock()
+#  The threads of the speculative lookups, see `_lookup_executor()`
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _ytmusic_session():
+    """Create the pooled, keep-alive `requests.Session` used by the YTMusic client.
+
+    If the S2YT_HTTP_CACHE_MODE environment variable is set, responses are
+    recorded to and replayed from the file in S2YT_HTTP_CACHE, see `http_cache`.
     """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from . import http_cache
+
+    session = requests.Session()
+    try:
+        mode = http_cache.mode_from_env()
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    if mode == "off":
+        adapter = HTTPAdapter(
+            pool_connections=YTMUSIC_POOL_SIZE, pool_maxsize=YTMUSIC_POOL_SIZE
+        )
+    else:
+        cache_file = os.environ.get(http_cache.FILE_ENV, http_cache.DEFAULT_CACHE_FILE)
+        print(f"NOTE: HTTP cache in {mode} mode, using {cache_file}")
+        adapter = http_cache.CachingAdapter(
+            http_cache.ResponseStore(cache_file),
+            mode,
+            pool_connections=YTMUSIC_POOL_SIZE,
+            pool_maxsize=YTMUSIC_POOL_SIZE,
+        )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.request = functools.partial(session.request, timeout=YTMUSIC_TIMEOUT)
+    return session
+
+
+def _create_ytmusic() -> YTMusic:
+    """Create a YTMusic client from the 'oauth.json' file, exiting if that fails."""
     if not os.path.exists("oauth.json"):
         print("ERROR: No file 'oauth.json' exists in the current directory.")
         print("       Have you logged in to YTMusic?  Run 'ytmusicapi oauth' to login")
         sys.exit(1)
 
+    from ytmusicapi import YTMusic
+
     try:
-        return YTMusic("oauth.json")
+        return YTMusic("oauth.json", requests_session=_ytmusic_session())
     except json.decoder.JSONDecodeError as e:
         print(f"ERROR: JSON Decode error while trying start YTMusic: {e}")
         print("       This typically means a problem with a 'oauth.json' file.")
@@ -33,53 +108,97 @@ def get_ytmusic() -> YTMusic:
         sys.exit(1)
 
 
+def get_ytmusic() -> YTMusic:
+    """Return the YTMusic client shared by the whole process.
+
+    The client (and its HTTP connection pool) is created on first use, so the
+    credentials are only read once and connections are kept alive across
+    playlists and commands.
+    """
+    global _ytmusic
+
+    with _ytmusic_lock:
+        if _ytmusic is None:
+            _ytmusic = _create_ytmusic()
+        return _ytmusic
+
+
+def _lookup_executor() -> ThreadPoolExecutor:
+    """Return the thread pool shared by the speculative lookups, see `lookup_song()`.
+
+    It is created on first use, with no more threads than the YTMusic connection
+    pool has connections, so requests never wait for a connection.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            _executor = ThreadPoolExecutor(
+                max_workers=YTMUSIC_POOL_SIZE, thread_name_prefix="s2yt-lookup"
+            )
+        return _executor
+
+
+def _sleep(seconds: float, cancel: Optional[threading.Event] = None) -> None:
+    """Sleep for `seconds`, returning early if `cancel` gets set."""
+    with profiling.stage("sleep"):
+        if cancel is None:
+            time.sleep(seconds)
+        else:
+            cancel.wait(seconds)
+
+
 def _ytmusic_create_playlist(
-    yt: YTMusic, title: str, description: str, privacy_status: str = "PRIVATE"
+    yt: YTMusic,
+    title: str,
+    description: str,
+    privacy_status: str = "PRIVATE",
+    video_ids: Optional[List[str]] = None,
 ) -> str:
     """Wrapper on ytmusic.create_playlist
 
-    This wrapper does retries with back-off because sometimes YouTube Music will
-    rate limit requests or otherwise fail.
+    The request is retried as set by the `retry` policy, because sometimes YouTube
+    Music will rate limit requests or otherwise fail.
 
     privacy_status can be: PRIVATE, PUBLIC, or UNLISTED
-    """
-
-    def _create(
-        yt: YTMusic, title: str, description: str, privacy_status: str
-    ) -> Union[str, dict]:
-        exception_sleep = 5
-        for _ in range(10):
-            try:
-                """Create a playlist on YTMusic, retrying if it fails."""
-                id = yt.create_playlist(
-                    title=title, description=description, privacy_status=privacy_status
-                )
-                return id
-            except Exception as e:
-                print(
-                    f"ERROR: (Retrying create_playlist: {title}) {e} in {exception_sleep} seconds"
-                )
-                time.sleep(exception_sleep)
-                exception_sleep *= 2
-
-        return {
-            "s2yt error": 'ERROR: Could not create playlist "{title}" after multiple retries'
-        }
 
-    id = _create(yt, title, description, privacy_status)
+    If `video_ids` are given the playlist is created with those tracks in it,
+    otherwise it is created empty and there is a short wait so tracks can be added.
+    Tracks added right after creating it with tracks may still find it missing,
+    see `retry.classify_new_playlist()`.
+    """
+    id = retry.call(
+        f"create_playlist: {title}",
+        lambda: yt.create_playlist(
+            title=title,
+            description=description,
+            privacy_status=privacy_status,
+            video_ids=video_ids,
+        ),
+    )
     #  create_playlist returns a dict if there was an error
-    if isinstance(id, dict):
+    if id is None or isinstance(id, dict):
         print(f"ERROR: Failed to create playlist (name: {title}): {id}")
         sys.exit(1)
 
-    time.sleep(1)  # seems to be needed to avoid missing playlist ID error
+    if not video_ids:
+        _sleep(1)  # seems to be needed to avoid missing playlist ID error
 
     return id
 
 
 def load_playlists_json(filename: str = "playlists.json", encoding: str = "utf-8"):
-    """Load the `playlists.json` Spotify playlist file"""
-    return json.load(open(filename, "r", encoding=encoding))
+    """Load the `playlists.json` Spotify playlist file, which may be gzip or zstd compressed
+
+    orjson is used to parse it if it is installed, see `json_backend`.
+    """
+    with (
+        profiling.stage("backup load"),
+        backup_compression.open_backup(filename, "rb") as f,
+    ):
+        return json_backend.load(f, encoding)
 
 
 def create_playlist(pl_name: str, privacy_status: str = "PRIVATE") -> None:
@@ -99,6 +218,27 @@ def create_playlist(pl_name: str, privacy_status: str = "PRIVATE") -> None:
     print(f"Playlist ID: {id}")
 
 
+def _song_info(track: Dict, album: Optional[Dict] = None) -> SongInfo:
+    """Make a SongInfo of a Spotify track from the backup.
+
+    `album` is needed for the tracks of a Spotify album, which don't have their own.
+    """
+    if album is None:
+        album = track["album"]
+    artists = tuple(artist["name"] for artist in track["artists"])
+    return SongInfo(
+        track["name"],
+        artists[0],
+        album["name"],
+        spotify_id=track.get("id"),
+        uri=track.get("uri"),
+        duration_ms=track.get("duration_ms"),
+        artists=artists,
+        album_id=album.get("id"),
+        isrc=(track.get("external_ids") or {}).get("isrc"),
+    )
+
+
 def iter_spotify_liked_albums(
     spotify_playlist_file: str = "playlists.json",
     spotify_encoding: str = "utf-8",
@@ -111,7 +251,36 @@ def iter_spotify_liked_albums(
 
     for album in [x["album"] for x in spotify_pls["albums"]]:
         for track in album["tracks"]["items"]:
-            yield SongInfo(track["name"], track["artists"][0]["name"], album["name"])
+            yield _song_info(track, album)
+
+
+def load_spotify_playlist(
+    src_pl_id: Optional[str] = None,
+    spotify_playlist_file: str = "playlists.json",
+    spotify_encoding: str = "utf-8",
+) -> Dict:
+    """Load one playlist from the Spotify backup ("Liked Songs" if None)
+
+    The sidecar index (see `backup_index`) is used to parse only this playlist,
+    falling back to loading the whole backup if the file can't be indexed.
+
+    Raises:
+        ValueError: If the playlist is not in the backup.
+    """
+    with profiling.stage("backup load"):
+        src_pl = backup_index.read_playlist(
+            spotify_playlist_file, src_pl_id, spotify_encoding
+        )
+    if src_pl is not None:
+        return src_pl
+
+    spotify_pls = load_playlists_json(spotify_playlist_file, spotify_encoding)
+    for src_pl in spotify_pls["playlists"]:
+        if src_pl_id is None and str(src_pl.get("name")) == "Liked Songs":
+            return src_pl
+        if src_pl_id is not None and str(src_pl.get("id")) == src_pl_id:
+            return src_pl
+    raise ValueError(f"Could not find Spotify playlist {src_pl_id}")
 
 
 def iter_spotify_playlist(
@@ -131,27 +300,18 @@ def iter_spotify_playlist(
     Yields:
         Iterator[SongInfo]: The song's information
     """
-    spotify_pls = load_playlists_json(spotify_playlist_file, spotify_encoding)
-
-    def find_spotify_playlist(spotify_pls: Dict, src_pl_id: Union[str, None]) -> Dict:
-        """Return the spotify playlist that matches the `src_pl_id`.
-
-        Args:
-            `spotify_pls`: The playlist datastrcuture saved by spotify-backup.
-            `src_pl_id`: The ID of a playlist to find, or None for the "Liked Songs" playlist.
-        """
-        for src_pl in spotify_pls["playlists"]:
-            if src_pl_id is None and str(src_pl.get("name")) == "Liked Songs":
-                return src_pl
-            if src_pl_id is not None and str(src_pl.get("id")) == src_pl_id:
-                return src_pl
-        raise ValueError(f"Could not find Spotify playlist {src_pl_id}")
-
-    src_pl = find_spotify_playlist(spotify_pls, src_pl_id)
+    src_pl = load_spotify_playlist(src_pl_id, spotify_playlist_file, spotify_encoding)
     src_pl_name = src_pl["name"]
 
     print(f"== Spotify Playlist: {src_pl_name}")
 
+    yield from iter_playlist_tracks(src_pl, reverse_playlist)
+
+
+def iter_playlist_tracks(
+    src_pl: Dict, reverse_playlist: bool = True
+) -> Iterator[SongInfo]:
+    """Songs of a playlist from the Spotify backup, skipping malformed tracks."""
     pl_tracks = src_pl["tracks"]
     if reverse_playlist:
         pl_tracks = reversed(pl_tracks)
@@ -164,14 +324,29 @@ def iter_spotify_playlist(
             continue
 
         try:
-            src_album_name = src_track["track"]["album"]["name"]
-            src_track_artist = src_track["track"]["artists"][0]["name"]
+            song = _song_info(src_track["track"])
         except TypeError as e:
             print(f"ERROR: Spotify track seems to be malformed.  Track: {src_track!r}")
             raise e
-        src_track_name = src_track["track"]["name"]
 
-        yield SongInfo(src_track_name, src_track_artist, src_album_name)
+        yield song
+
+
+def get_liked_video_ids(yt: YTMusic) -> Set[str]:
+    """Return the videoIds of all the songs already liked on YTMusic.
+
+    The liked songs are listed once (a page of results per request), so songs that
+    are already liked can be skipped instead of liked again.  If the listing fails,
+    an empty set is returned and every song is liked as before.
+    """
+    try:
+        liked = yt.get_liked_songs(limit=None)
+    except Exception as e:
+        print(f"WARNING: Unable to list liked songs, liking every song: {e}")
+        return set()
+    return {
+        track["videoId"] for track in liked.get("tracks") or [] if track.get("videoId")
+    }
 
 
 def get_playlist_id_by_name(yt: YTMusic, title: str) -> Optional[str]:
@@ -216,6 +391,143 @@ class ResearchDetails:
     query: Optional[str] = field(default=None)
     songs: Optional[List[Dict]] = field(default=None)
     suggestions: Optional[List[str]] = field(default=None)
+    #  How the track was found: "album", "song" or "video"
+    method: Optional[str] = field(default=None)
+
+
+#  Number of album search hits whose tracks are checked for the song by `lookup_song()`
+ALBUM_CANDIDATES = 3
+#  The most, in seconds, that the duration of a YTMusic track can differ from the
+#  Spotify track's for them to be the same recording
+DURATION_TOLERANCE = 5
+
+
+class TrackNotFound(ValueError):
+    """`lookup_song()` found no track on YTMusic for the Spotify track."""
+
+
+def _artist_keys(artist_name: str, artists: Optional[Sequence[str]]) -> Set[str]:
+    """The normalized names of all the artists of a Spotify track."""
+    return {match_key(artist_name)} | {match_key(name) for name in artists or ()}
+
+
+def _song_artist_keys(song: Dict) -> List[str]:
+    """The normalized names of the artists of a YTMusic track."""
+    return [match_key(artist.get("name")) for artist in song.get("artists") or []]
+
+
+def _same_duration(song: Dict, duration_ms: Optional[int]) -> Optional[bool]:
+    """Is a YTMusic track as long as the Spotify track?  None if either is unknown."""
+    seconds = song.get("duration_seconds")
+    if not duration_ms or not isinstance(seconds, (int, float)):
+        return None
+    return abs(seconds - duration_ms / 1000) <= DURATION_TOLERANCE
+
+
+def _first_same_duration(songs: List[Dict], duration_ms: Optional[int]) -> Dict:
+    """The first of `songs` not known to differ in duration from the Spotify track,
+    or the first of them if they all do."""
+    for song in songs:
+        if _same_duration(song, duration_ms) is not False:
+            return song
+    return songs[0]
+
+
+def _find_in_album(
+    yt: YTMusic, browse_id: str, track_name: str
+) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """Look for the track named `track_name` on a YTMusic album.
+
+    Returns:
+        Tuple[Optional[Dict], Optional[Dict]]: The first track with exactly the same
+        name, and the first track whose name matches once normalized (see
+        `normalize.match_key()`), either None if there is none.
+    """
+    track_key = match_key(track_name)
+    normalized_match = None
+    try:
+        for track in yt.get_album(browse_id)["tracks"]:
+            if track["title"] == track_name:
+                return track, normalized_match
+            if normalized_match is None and match_key(track["title"]) == track_key:
+                normalized_match = track
+        # print(f"{track['videoId']} - {track['title']} - {track['artists'][0]['name']}")
+    except Exception as e:
+        print(f"Unable to lookup album ({e}), continuing...")
+    return None, normalized_match
+
+
+def _pick_album_track(
+    found: Iterator[Tuple[Optional[Dict], Optional[Dict]]],
+) -> Optional[Dict]:
+    """Pick the track from the `_find_in_album()` results of the candidate albums.
+
+    A track with exactly the same name on any of the albums is preferred, so a
+    remaster on the first album does not win over the original on the next one.
+    """
+    normalized_match = None
+    for exact, normalized in found:
+        if exact is not None:
+            return exact
+        if normalized_match is None:
+            normalized_match = normalized
+    return normalized_match
+
+
+def _search_albums(
+    yt: YTMusic, track_name: str, artist_name: str, album_name
+) -> Tuple[Optional[Dict], int]:
+    """Look for the track on the albums found by an album search.
+
+    Returns:
+        Tuple[Optional[Dict], int]: The track or None, and the number of API calls made.
+    """
+    albums = yt.search(query=f"{album_name} by {artist_name}", filter="albums")
+    calls = 1
+
+    def find_in_albums():
+        nonlocal calls
+        for album in albums[:ALBUM_CANDIDATES]:
+            # print(album)
+            # print(f"ALBUM: {album['browseId']} - {album['title']} - {album['artists'][0]['name']}")
+
+            calls += 1
+            yield _find_in_album(yt, album["browseId"], track_name)
+
+    track = _pick_album_track(find_in_albums())
+    return track, calls
+
+
+def _exact_song(
+    songs: List[Dict],
+    track_name: str,
+    artist_name: str,
+    album_name=None,
+    artists: Optional[Sequence[str]] = None,
+    duration_ms: Optional[int] = None,
+) -> Optional[Dict]:
+    """Return the first song search result with the same track name and one of the
+    same artists (any of `artists` if given), that is not known to be of another
+    duration than `duration_ms`.
+
+    The names are compared normalized, see `normalize.match_key()`.  If `album_name`
+    is given the album name must match too.
+    """
+    track_key = match_key(track_name)
+    artist_keys = _artist_keys(artist_name, artists)
+    for song in songs:
+        album = song.get("album") or {}
+        if (
+            match_key(song.get("title")) == track_key
+            and not artist_keys.isdisjoint(_song_artist_keys(song))
+            and _same_duration(song, duration_ms) is not False
+            and (
+                album_name is None
+                or match_key(album.get("name")) == match_key(album_name)
+            )
+        ):
+            return song
+    return None
 
 
 def lookup_song(
@@ -225,14 +537,18 @@ def lookup_song(
     album_name,
     yt_search_algo: int,
     details: Optional[ResearchDetails] = None,
+    speculative: bool = False,
+    strategy: Optional[LookupStrategy] = None,
+    artists: Optional[Sequence[str]] = None,
+    duration_ms: Optional[int] = None,
 ) -> dict:
     """Look up a song on YTMusic
 
     Given the Spotify track information, it does a lookup for the album by the same
     artist on YTMusic, then looks at the first 3 hits looking for a track with exactly
     the same name. In the event that it can't find that exact track, it then does
-    a search of songs for the track name by the same artist and simply returns the
-    first hit.
+    a search of songs for the track name by the same artist and returns the first
+    hit with that name and artist, or otherwise simply the first hit.
 
     The idea is that finding the album and artist and then looking for the exact track
     match will be more likely to be accurate than searching for the song and artist and
@@ -246,31 +562,204 @@ def lookup_song(
         `album_name` (str): The name of the researched track's album
         `yt_search_algo` (int): 0 for exact matching, 1 for extended matching (search past 1st result), 2 for approximate matching (search in videos)
         `details` (ResearchDetails): If specified, more information about the search and the response will be populated for use by the caller.
+        `speculative` (bool): Make the album and song searches concurrently, trading extra API calls for less time per track.
+        `strategy` (LookupStrategy): If specified, it picks whether the album or song search is tried first, and records how well each does.
+        `artists` (Optional[Sequence[str]]): All the artists of the track, any of which the song search results may match.
+        `duration_ms` (Optional[int]): The duration of the track, song search results of another duration are passed over.
 
     Raises:
-        ValueError: If no track is found, it returns an error
+        TrackNotFound: If no track is found
 
     Returns:
         dict: The infos of the researched song
     """
-    albums = yt.search(query=f"{album_name} by {artist_name}", filter="albums")
-    for album in albums[:3]:
-        # print(album)
-        # print(f"ALBUM: {album['browseId']} - {album['title']} - {album['artists'][0]['name']}")
+    if speculative:
+        return _lookup_song_speculative(
+            yt,
+            track_name,
+            artist_name,
+            album_name,
+            yt_search_algo,
+            details,
+            strategy,
+            artists,
+            duration_ms,
+        )
 
-        try:
-            for track in yt.get_album(album["browseId"])["tracks"]:
-                if track["title"] == track_name:
-                    return track
-            # print(f"{track['videoId']} - {track['title']} - {track['artists'][0]['name']}")
-        except Exception as e:
-            print(f"Unable to lookup album ({e}), continuing...")
+    order = (
+        strategy.order(track_name, album_name)
+        if strategy is not None
+        else DEFAULT_ORDER
+    )
+    for path in order:
+        if path == "album":
+            track, calls = _search_albums(yt, track_name, artist_name, album_name)
+            if strategy is not None:
+                strategy.record("album", track is not None, calls)
+            if track is not None:
+                if details:
+                    details.method = "album"
+                return track
+            continue
+
+        query = f"{track_name} by {artist_name}"
+        if details:
+            details.query = query
+            details.suggestions = yt.get_search_suggestions(query=query)
+        songs = yt.search(query=query, filter="songs")
+        #  Only an exact match ends the lookup early, otherwise the album path is
+        #  still tried before picking from these results.  An exact match is
+        #  returned on either path, so the order only changes the cost.
+        track = _exact_song(
+            songs,
+            track_name,
+            artist_name,
+            album_name if yt_search_algo == 1 else None,
+            artists,
+            duration_ms,
+        )
+        if strategy is not None:
+            strategy.record("song", track is not None, 2 if details else 1)
+        if track is not None:
+            if details:
+                details.method = "song"
+            return track
+
+    return _match_song(
+        yt,
+        songs,
+        track_name,
+        artist_name,
+        album_name,
+        yt_search_algo,
+        details,
+        strategy,
+        artists,
+        duration_ms,
+    )
+
+
+def _lookup_song_speculative(
+    yt: YTMusic,
+    track_name: str,
+    artist_name: str,
+    album_name,
+    yt_search_algo: int,
+    details: Optional[ResearchDetails] = None,
+    strategy: Optional[LookupStrategy] = None,
+    artists: Optional[Sequence[str]] = None,
+    duration_ms: Optional[int] = None,
+) -> dict:
+    """`lookup_song()`, but with the album and song searches made concurrently.
 
+    The album search, the song search (and the search suggestions if `details` is
+    given) are started together, and each candidate album is fetched as soon as the
+    album search returns.  The results are then checked in the same order as
+    `lookup_song()` would, so the same track is returned, and requests that are no
+    longer needed are cancelled if they have not started or otherwise ignored.
+
+    The album path, and the song path when its results are used, are recorded in
+    `strategy` as `lookup_song()` does with the album path first.
+    """
+    if strategy is not None:
+        strategy.concurrent()
     query = f"{track_name} by {artist_name}"
+    executor = _lookup_executor()
+    futures = []
+
+    def submit(*args, **kwargs):
+        future = executor.submit(*args, **kwargs)
+        futures.append(future)
+        return future
+
+    try:
+        albums_future = submit(
+            yt.search, query=f"{album_name} by {artist_name}", filter="albums"
+        )
+        songs_future = submit(yt.search, query=query, filter="songs")
+        suggestions_future = (
+            submit(yt.get_search_suggestions, query=query) if details else None
+        )
+
+        album_futures = [
+            submit(_find_in_album, yt, album["browseId"], track_name)
+            for album in albums_future.result()[:ALBUM_CANDIDATES]
+        ]
+        track = _pick_album_track(future.result() for future in album_futures)
+        if strategy is not None:
+            strategy.record("album", track is not None, 1 + len(album_futures))
+        if track is not None:
+            if details:
+                details.method = "album"
+            return track
+
+        if details:
+            details.query = query
+            details.suggestions = suggestions_future.result()
+        songs = songs_future.result()
+    finally:
+        #  The pool is shared, so only this lookup's requests are cancelled
+        for future in futures:
+            future.cancel()
+
+    track = _exact_song(
+        songs,
+        track_name,
+        artist_name,
+        album_name if yt_search_algo == 1 else None,
+        artists,
+        duration_ms,
+    )
+    if strategy is not None:
+        strategy.record("song", track is not None, 2 if details else 1)
+    if track is not None:
+        if details:
+            details.method = "song"
+        return track
+
+    return _match_song(
+        yt,
+        songs,
+        track_name,
+        artist_name,
+        album_name,
+        yt_search_algo,
+        details,
+        strategy,
+        artists,
+        duration_ms,
+    )
+
+
+def _match_song(
+    yt: YTMusic,
+    songs: List[Dict],
+    track_name: str,
+    artist_name: str,
+    album_name,
+    yt_search_algo: int,
+    details: Optional[ResearchDetails] = None,
+    strategy: Optional[LookupStrategy] = None,
+    artists: Optional[Sequence[str]] = None,
+    duration_ms: Optional[int] = None,
+) -> dict:
+    """Pick the track from the song search results, see `lookup_song()`.
+
+    A result by any of `artists` matches, and of the results that match, the first
+    that is as long as the Spotify track (or whose duration is unknown) is picked.
+    For algorithm 2, a result with the same title and duration is taken even if the
+    artist differs, saving the video search.
+    """
+    if not songs:
+        raise TrackNotFound(
+            f"Did not find {track_name} by {artist_name} from {album_name}"
+        )
     if details:
-        details.query = query
-        details.suggestions = yt.get_search_suggestions(query=query)
-    songs = yt.search(query=query, filter="songs")
+        details.method = "song"
+
+    #  Names are compared normalized, see `normalize.match_key()`
+    track_key = match_key(track_name)
+    artist_keys = _artist_keys(artist_name, artists)
 
     match yt_search_algo:
         case 0:
@@ -279,46 +768,51 @@ def lookup_song(
             return songs[0]
 
         case 1:
-            for song in songs:
-                if (
-                    song["title"] == track_name
-                    and song["artists"][0]["name"] == artist_name
-                    and song["album"]["name"] == album_name
-                ):
-                    return song
-                # print(f"SONG: {song['videoId']} - {song['title']} - {song['artists'][0]['name']} - {song['album']['name']}")
-
-            raise ValueError(
+            album_key = match_key(album_name)
+            matches = [
+                song
+                for song in songs
+                if match_key(song["title"]) == track_key
+                and not artist_keys.isdisjoint(_song_artist_keys(song))
+                and match_key((song.get("album") or {}).get("name")) == album_key
+            ]
+            if matches:
+                return _first_same_duration(matches, duration_ms)
+
+            raise TrackNotFound(
                 f"Did not find {track_name} by {artist_name} from {album_name}"
             )
 
         case 2:
             #  This would need to do fuzzy matching
+            matches = []
             for song in songs:
-                # Remove everything in brackets in the song title
-                song_title_without_brackets = re.sub(r"[\[(].*?[])]", "", song["title"])
+                # The key has everything in brackets in the song title removed
+                title_key = match_key(song["title"])
+                song_artist_keys = _song_artist_keys(song)
                 if (
-                    (
-                        song_title_without_brackets == track_name
-                        and song["album"]["name"] == album_name
-                    )
-                    or (song_title_without_brackets == track_name)
-                    or (song_title_without_brackets in track_name)
-                    or (track_name in song_title_without_brackets)
-                ) and (
-                    song["artists"][0]["name"] == artist_name
-                    or artist_name in song["artists"][0]["name"]
+                    (title_key == track_key)
+                    or (title_key in track_key)
+                    or (track_key in title_key)
+                ) and any(
+                    key in song_artist_key
+                    for key in artist_keys
+                    for song_artist_key in song_artist_keys
                 ):
-                    return song
+                    matches.append(song)
+                elif title_key == track_key and _same_duration(song, duration_ms):
+                    matches.append(song)
+            if matches:
+                return _first_same_duration(matches, duration_ms)
 
             # Finds approximate match
             # This tries to find a song anyway. Works when the song is not released as a music but a video.
             else:
-                track_name = track_name.lower()
-                first_song_title = songs[0]["title"].lower()
+                first_is_match = track_key in match_key(
+                    songs[0]["title"]
+                ) and not artist_keys.isdisjoint(_song_artist_keys(songs[0]))
                 if (
-                    track_name not in first_song_title
-                    or songs[0]["artists"][0]["name"] != artist_name
+                    not first_is_match
                 ):  # If the first song is not the one we are looking for
                     print("Not found in songs, searching videos")
                     new_songs = yt.search(
@@ -327,24 +821,194 @@ def lookup_song(
 
                     # From here, we search for videos reposting the song. They often contain the name of it and the artist. Like with 'Nekfeu - Ecrire'.
                     for new_song in new_songs:
-                        new_song_title = new_song[
-                            "title"
-                        ].lower()  # People sometimes mess up the capitalization in the title
-                        if (
-                            track_name in new_song_title
-                            and artist_name in new_song_title
-                        ) or (track_name in new_song_title):
+                        # People sometimes mess up the capitalization in the title
+                        if track_key in match_key(new_song["title"]):
                             print("Found a video")
+                            if strategy is not None:
+                                strategy.record("video", True, 1)
+                            if details:
+                                details.method = "video"
                             return new_song
                     else:
+                        if strategy is not None:
+                            strategy.record("video", False, 1)
                         # Basically we only get here if the song isn't present anywhere on YouTube
-                        raise ValueError(
+                        raise TrackNotFound(
                             f"Did not find {track_name} by {artist_name} from {album_name}"
                         )
                 else:
                     return songs[0]
 
 
+@dataclass
+class TrackResolution:
+    """The result of looking up a Spotify track on YTMusic.
+
+    `status` is "found", "mapped" (not looked up because the mapping database has
+    it), "missing" (the lookup did not find the track), "known_miss" (not looked up
+    because a previous run did not find it) or "error".
+    """
+
+    status: str
+    track: Optional[Dict] = field(default=None)
+    error: Optional[str] = field(default=None)
+
+
+def resolve_track(
+    yt: YTMusic,
+    src_track: SongInfo,
+    yt_search_algo: int,
+    misses: NegativeCache,
+    retry_misses: bool = False,
+    speculative: bool = False,
+    strategy: Optional[LookupStrategy] = None,
+    cancel: Optional[threading.Event] = None,
+    mappings: Optional[MappingDB] = None,
+) -> TrackResolution:
+    """Look up a Spotify track on YTMusic, consulting and updating the miss cache
+    and the mapping database.
+
+    A track in `mappings` is resolved without searching, and the tracks found by
+    searching are added to it.
+
+    Lookups wait while the `retry` circuit breaker is open, and their failures are
+    counted by it, so an outage pauses the lookups as well as the writes.
+
+    Args:
+        `yt` (YTMusic)
+        `src_track` (SongInfo): The Spotify track to look up.
+        `yt_search_algo` (int): The search algorithm, see `lookup_song()`.
+        `misses` (NegativeCache): Tracks not found on previous runs.
+        `retry_misses` (bool): Look up tracks even if they are in `misses`.
+        `speculative` (bool): Make the lookup's searches concurrently, see `lookup_song()`.
+        `strategy` (Optional[LookupStrategy]): Chooses and records the lookup paths, see `lookup_song()`.
+        `cancel` (Optional[threading.Event]): Stops waiting for the circuit breaker when set.
+        `mappings` (Optional[MappingDB]): Known mappings of Spotify tracks to YTMusic.
+
+    Returns:
+        TrackResolution: The YTMusic track, or why there is none.
+    """
+    if mappings is not None:
+        record = mappings.find(
+            src_track.title,
+            src_track.artist,
+            src_track.album,
+            src_track.uri,
+            src_track.isrc,
+        )
+        if record is not None:
+            return TrackResolution("mapped", track=mappings.as_track(record))
+
+    miss_key = (src_track.title, src_track.artist, src_track.album, yt_search_algo)
+    if not retry_misses and misses.is_miss(*miss_key):
+        return TrackResolution("known_miss")
+
+    if not retry.BREAKER.wait(cancel):
+        return TrackResolution("error", error="Cancelled")
+
+    try:
+        with profiling.stage("lookup"):
+            dst_track = lookup_song(
+                yt,
+                src_track.title,
+                src_track.artist,
+                src_track.album,
+                yt_search_algo,
+                speculative=speculative,
+                strategy=strategy,
+                artists=src_track.artists,
+                duration_ms=src_track.duration_ms,
+            )
+    except TrackNotFound as e:
+        retry.BREAKER.record_success()
+        misses.add(*miss_key)
+        return TrackResolution("missing", error=str(e))
+    except Exception as e:
+        retry.BREAKER.record_failure(retry.classify(e))
+        return TrackResolution("error", error=str(e))
+
+    retry.BREAKER.record_success()
+    misses.discard(*miss_key)
+    if mappings is not None:
+        mappings.add_lookup(
+            src_track.title,
+            src_track.artist,
+            src_track.album,
+            dst_track,
+            yt_search_algo,
+            src_track.uri,
+            src_track.isrc,
+        )
+    return TrackResolution("found", track=dst_track)
+
+
+def resolve_tracks(
+    src_tracks: Iterator[SongInfo],
+    yt: YTMusic,
+    yt_search_algo: int,
+    misses: NegativeCache,
+    retry_misses: bool = False,
+    track_sleep: float = 0.1,
+    speculative: bool = False,
+    strategy: Optional[LookupStrategy] = None,
+    *,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[threading.Event] = None,
+    mappings: Optional[MappingDB] = None,
+) -> Iterator[Tuple[SongInfo, TrackResolution]]:
+    """Look up each Spotify track with `resolve_track()`, printing the results.
+
+    Used by the commands that look up all the tracks before writing anything.
+    `progress` is called as in `copier()` (with the total if `src_tracks` is a
+    list), and setting `cancel` stops the lookups after the current track.
+
+    Yields:
+        (SongInfo, TrackResolution): Each Spotify track and its YTMusic lookup result.
+    """
+    total = len(src_tracks) if isinstance(src_tracks, list) else None
+    done = 0
+    for src_track in profiling.iterate("spotify iteration", src_tracks):
+        if cancel is not None and cancel.is_set():
+            return
+        if progress is not None:
+            progress(done, total)
+
+        print(f"Spotify:   {src_track.title} - {src_track.artist} - {src_track.album}")
+        resolution = resolve_track(
+            yt,
+            src_track,
+            yt_search_algo,
+            misses,
+            retry_misses,
+            speculative,
+            strategy,
+            cancel,
+            mappings,
+        )
+        if resolution.track is not None:
+            print(f"  Youtube: {format_yt_track(resolution.track)}")
+        elif resolution.status == "known_miss":
+            print("  (Not found on a previous run, skipping)")
+        else:
+            print(f"ERROR: Unable to look up song on YTMusic: {resolution.error}")
+
+        yield src_track, resolution
+        done += 1
+
+        if track_sleep and resolution.status not in ("known_miss", "mapped"):
+            _sleep(track_sleep, cancel)
+    if progress is not None:
+        progress(done, total)
+
+
+def format_yt_track(dst_track: Dict) -> str:
+    """Return the "title - artist - album" description of a YTMusic track."""
+    yt_artist_name = "<Unknown>"
+    if "artists" in dst_track and len(dst_track["artists"]) > 0:
+        yt_artist_name = dst_track["artists"][0]["name"]
+    return f"{dst_track['title']} - {yt_artist_name} - {dst_track['album'] if 'album' in dst_track else '<Unknown>'}"
+
+
 def copier(
     src_tracks: Iterator[SongInfo],
     dst_pl_id: Optional[str] = None,
@@ -353,12 +1017,48 @@ def copier(
     yt_search_algo: int = 0,
     *,
     yt: Optional[YTMusic] = None,
-):
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[threading.Event] = None,
+    misses: Optional[NegativeCache] = None,
+    retry_misses: bool = False,
+    speculative: bool = False,
+    strategy: Optional[LookupStrategy] = None,
+    liked_video_ids: Optional[Set[str]] = None,
+    mappings: Optional[MappingDB] = None,
+) -> List[SongInfo]:
     """
     @@@
+
+    `progress`, if given, is called with the number of tracks processed so far and
+    the total number of tracks.  Setting the `cancel` event stops the copy after
+    the current track.
+
+    Tracks that were not found on a previous run (recorded in `misses`, the default
+    miss cache if not given) are skipped without searching, unless `retry_misses`
+    is set.  `speculative` makes the searches for each track concurrently, see
+    `lookup_song()`.
+
+    `strategy` (a new `LookupStrategy` if not given) picks the order the album
+    and song searches are tried in, and its statistics are shown at the end.
+
+    When liking songs (no `dst_pl_id`), songs already in `liked_video_ids` (listed
+    from YTMusic if not given) are not liked again.
+
+    Tracks in `mappings` (the default mapping database if not given) are not
+    searched for, and the tracks that are found are added to it.
+
+    Returns the Spotify tracks that are in the playlist (or liked) after the copy,
+    once each: the tracks that were not found, and those whose add or like failed,
+    are left out, as are all of them on a dry run.
     """
     if yt is None:
         yt = get_ytmusic()
+    if misses is None:
+        misses = NegativeCache()
+    if strategy is None:
+        strategy = LookupStrategy()
+    if mappings is None:
+        mappings = MappingDB()
 
     if dst_pl_id is not None:
         try:
@@ -371,62 +1071,236 @@ def copier(
             print("      'PL_DhcdsaJ7echjfdsaJFhdsWUd73HJFca'")
             sys.exit(1)
         print(f"== Youtube Playlist: {yt_pl['title']}")
+    elif liked_video_ids is None:
+        liked_video_ids = get_liked_video_ids(yt)
 
     tracks_added_set = set()
     duplicate_count = 0
     error_count = 0
+    already_liked_count = 0
+    mapped_count = 0
+    known_misses = []
+    done_ids: Set[int] = set()
+
+    catalog = TrackCatalog(profiling.iterate("spotify iteration", src_tracks))
+    total = len(catalog.sequence)
+    for track_number, (track_id, src_track) in enumerate(catalog):
+        if cancel is not None and cancel.is_set():
+            print("Copy cancelled.")
+            break
+        if progress is not None:
+            progress(track_number, total)
 
-    for src_track in src_tracks:
         print(f"Spotify:   {src_track.title} - {src_track.artist} - {src_track.album}")
 
-        try:
-            dst_track = lookup_song(
-                yt, src_track.title, src_track.artist, src_track.album, yt_search_algo
+        looked_up, video_id = catalog.result(track_id)
+        if looked_up:
+            #  The same Spotify track appeared earlier, so don't search for it again
+            if video_id is None:
+                print("  (Not found earlier in this run, skipping)")
+            else:
+                print(f"  (DUPLICATE, same track as earlier: {video_id})")
+                duplicate_count += 1
+            continue
+
+        resolution = resolve_track(
+            yt,
+            src_track,
+            yt_search_algo,
+            misses,
+            retry_misses,
+            speculative,
+            strategy,
+            cancel,
+            mappings,
+        )
+        if resolution.status == "known_miss":
+            print(
+                "  (Not found on a previous run, skipping.  Use --retry-misses to search again)"
             )
-        except Exception as e:
-            print(f"ERROR: Unable to look up song on YTMusic: {e}")
+            catalog.set_result(track_id, None)
+            known_misses.append(track_id)
+            continue
+        if resolution.track is None:
+            print(f"ERROR: Unable to look up song on YTMusic: {resolution.error}")
+            catalog.set_result(track_id, None)
             error_count += 1
             continue
+        dst_track = resolution.track
+        catalog.set_result(track_id, dst_track["videoId"])
 
-        yt_artist_name = "<Unknown>"
-        if "artists" in dst_track and len(dst_track["artists"]) > 0:
-            yt_artist_name = dst_track["artists"][0]["name"]
-        print(
-            f"  Youtube: {dst_track['title']} - {yt_artist_name} - {dst_track['album'] if 'album' in dst_track else '<Unknown>'}"
-        )
+        print(f"  Youtube: {format_yt_track(dst_track)}")
+        if resolution.status == "mapped":
+            mapped_count += 1
 
         if dst_track["videoId"] in tracks_added_set:
             print("(DUPLICATE, this track has already been added)")
             duplicate_count += 1
         tracks_added_set.add(dst_track["videoId"])
 
-        if not dry_run:
-            exception_sleep = 5
-            for _ in range(10):
-                try:
-                    if dst_pl_id is not None:
-                        yt.add_playlist_items(
-                            playlistId=dst_pl_id,
-                            videoIds=[dst_track["videoId"]],
-                            duplicates=False,
-                        )
-                    else:
-                        yt.rate_song(dst_track["videoId"], "LIKE")
-                    break
-                except Exception as e:
-                    print(
-                        f"ERROR: (Retrying add_playlist_items: {dst_pl_id} {dst_track['videoId']}) {e} in {exception_sleep} seconds"
-                    )
-                    time.sleep(exception_sleep)
-                    exception_sleep *= 2
+        wrote = False
+        if dst_pl_id is None and dst_track["videoId"] in liked_video_ids:
+            print("  (Already liked)")
+            already_liked_count += 1
+            done_ids.add(track_id)
+        elif not dry_run:
+            wrote = True
+            if dst_pl_id is not None:
+                response = retry.call(
+                    f"add_playlist_items: {dst_pl_id} {dst_track['videoId']}",
+                    lambda: yt.add_playlist_items(
+                        playlistId=dst_pl_id,
+                        videoIds=[dst_track["videoId"]],
+                        duplicates=False,
+                    ),
+                    cancel,
+                    succeeded=retry.playlist_write_succeeded,
+                )
+            else:
+                response = retry.call(
+                    f"rate_song: {dst_track['videoId']}",
+                    lambda: yt.rate_song(dst_track["videoId"], "LIKE"),
+                    cancel,
+                )
+                if response is not None:
+                    liked_video_ids.add(dst_track["videoId"])
+            if response is not None:
+                done_ids.add(track_id)
 
-        if track_sleep:
-            time.sleep(track_sleep)
+        #  A mapped track that was not written made no requests to wait after
+        if track_sleep and (resolution.status != "mapped" or wrote):
+            _sleep(track_sleep, cancel)
+    else:
+        if progress is not None:
+            progress(total, total)
+
+    misses.save()
+    mappings.save()
 
     print()
+    if known_misses:
+        print(f"Skipped {len(known_misses)} tracks not found on a previous run:")
+        for track_id in known_misses:
+            src_track = catalog.get(track_id)
+            print(f"  {src_track.title} - {src_track.artist} - {src_track.album}")
     print(
         f"Added {len(tracks_added_set)} tracks, encountered {duplicate_count} duplicates, {error_count} errors"
     )
+    if already_liked_count:
+        print(f"{already_liked_count} tracks were already liked")
+    if mapped_count:
+        print(f"{mapped_count} tracks were in the mapping database, without searching")
+    if strategy.lookups:
+        print("Lookup statistics:")
+        print("\n".join(strategy.report()))
+    return [catalog.get(track_id) for track_id in sorted(done_ids)]
+
+
+def copy_to_new_playlist(
+    src_tracks: Iterator[SongInfo],
+    title: str,
+    privacy_status: str = "PRIVATE",
+    dry_run: bool = False,
+    track_sleep: float = 0.1,
+    yt_search_algo: int = 0,
+    *,
+    yt: Optional[YTMusic] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[threading.Event] = None,
+    misses: Optional[NegativeCache] = None,
+    retry_misses: bool = False,
+    speculative: bool = False,
+    strategy: Optional[LookupStrategy] = None,
+    mappings: Optional[MappingDB] = None,
+    failed: Optional[List[SongInfo]] = None,
+) -> Optional[str]:
+    """Look up all the Spotify tracks, then create a YTMusic playlist with them.
+
+    The playlist is created with its first `PLAYLIST_BATCH_SIZE` tracks in the
+    `create_playlist` request, and the rest are added in batches of that size, so
+    a playlist costs a few requests instead of one per track (and there is no
+    wait after creating it).  Each track is looked up once (unless it is in
+    `mappings`, see `copier()`), and the playlist is only created if the lookups
+    finish (are not cancelled).  If `failed` is given, the Spotify tracks that
+    could not be found or added are appended to it.
+
+    Returns:
+        The ID of the created playlist, None if it was not created.
+    """
+    if yt is None:
+        yt = get_ytmusic()
+    if misses is None:
+        misses = NegativeCache()
+    if strategy is None:
+        strategy = LookupStrategy()
+    if mappings is None:
+        mappings = MappingDB()
+
+    catalog = TrackCatalog(profiling.iterate("spotify iteration", src_tracks))
+    unique_tracks = [catalog.get(track_id) for track_id in range(len(catalog))]
+    video_ids: List[str] = []
+    #  The Spotify tracks of each videoId, to report those whose add fails
+    sources: Dict[str, List[SongInfo]] = {}
+    not_found = 0
+    for src_track, resolution in resolve_tracks(
+        unique_tracks,
+        yt,
+        yt_search_algo,
+        misses,
+        retry_misses,
+        track_sleep,
+        speculative,
+        strategy,
+        progress=progress,
+        cancel=cancel,
+        mappings=mappings,
+    ):
+        if resolution.track is None:
+            not_found += 1
+            if failed is not None:
+                failed.append(src_track)
+        else:
+            video_ids.append(resolution.track["videoId"])
+            sources.setdefault(resolution.track["videoId"], []).append(src_track)
+    misses.save()
+    mappings.save()
+    video_ids = list(dict.fromkeys(video_ids))
+
+    print()
+    if strategy.lookups:
+        print("Lookup statistics:")
+        print("\n".join(strategy.report()))
+    if cancel is not None and cancel.is_set():
+        print("Copy cancelled, the playlist was not created.")
+        return None
+    print(f"Found {len(video_ids)} tracks, {not_found} not found")
+    if dry_run:
+        print(f"Would create playlist '{title}' with {len(video_ids)} tracks")
+        return None
+
+    pl_id = _ytmusic_create_playlist(
+        yt,
+        title=title,
+        description=title,
+        privacy_status=privacy_status,
+        video_ids=video_ids[:PLAYLIST_BATCH_SIZE],
+    )
+    print(f"NOTE: Created playlist '{title}' with ID: {pl_id}")
+    for start in range(PLAYLIST_BATCH_SIZE, len(video_ids), PLAYLIST_BATCH_SIZE):
+        batch = video_ids[start : start + PLAYLIST_BATCH_SIZE]
+        print(f"Adding tracks {start + 1}-{start + len(batch)} to {pl_id}")
+        response = retry.call(
+            f"add_playlist_items: {pl_id}",
+            lambda: yt.add_playlist_items(
+                playlistId=pl_id, videoIds=batch, duplicates=False
+            ),
+            cancel,
+            succeeded=retry.playlist_write_succeeded,
+            classifier=retry.classify_new_playlist,
+        )
+        if response is None and failed is not None:
+            failed.extend(track for video_id in batch for track in sources[video_id])
+    return pl_id
 
 
 def copy_playlist(
@@ -438,13 +1312,30 @@ def copy_playlist(
     yt_search_algo: int = 0,
     reverse_playlist: bool = True,
     privacy_status: str = "PRIVATE",
+    *,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[threading.Event] = None,
+    retry_misses: bool = False,
+    miss_ttl_days: float = DEFAULT_MISS_TTL_DAYS,
+    speculative: bool = False,
+    create_with_tracks: bool = False,
+    remap: bool = False,
 ):
     """
     Copy a Spotify playlist to a YTMusic playlist
     @@@
+
+    If the YTMusic playlist has to be created and `create_with_tracks` is set, the
+    tracks are looked up first and the playlist is created with them, see
+    `copy_to_new_playlist()`.  They are then always in Spotify order, whatever
+    `reverse_playlist` is.
+
+    With `remap`, the tracks are searched for again rather than taken from the
+    mapping database, and what is found replaces its mappings (see `MappingDB`).
     """
     print("Using search algo n°: ", yt_search_algo)
     yt = get_ytmusic()
+    mappings = MappingDB(remap=remap)
     pl_name: str = ""
 
     if ytmusic_playlist_id.startswith("+"):
@@ -456,10 +1347,33 @@ def copy_playlist(
     if ytmusic_playlist_id is None:
         if pl_name == "":
             print("No playlist name or ID provided, creating playlist...")
-            spotify_pls: dict = load_playlists_json()
-            for pl in spotify_pls["playlists"]:
-                if len(pl.keys()) > 3 and pl["id"] == spotify_playlist_id:
-                    pl_name = pl["name"]
+            pl_name = load_spotify_playlist(
+                spotify_playlist_id, spotify_encoding=spotify_playlists_encoding
+            )["name"]
+
+        if create_with_tracks:
+            #  The playlist is created with its tracks in one list, which keeps their
+            #  order, so there is no reversal to undo
+            copy_to_new_playlist(
+                iter_spotify_playlist(
+                    spotify_playlist_id,
+                    spotify_encoding=spotify_playlists_encoding,
+                    reverse_playlist=False,
+                ),
+                pl_name,
+                privacy_status,
+                dry_run,
+                track_sleep,
+                yt_search_algo,
+                yt=yt,
+                progress=progress,
+                cancel=cancel,
+                misses=NegativeCache(ttl_days=miss_ttl_days),
+                retry_misses=retry_misses,
+                speculative=speculative,
+                mappings=mappings,
+            )
+            return
 
         ytmusic_playlist_id = _ytmusic_create_playlist(
             yt,
@@ -485,6 +1399,12 @@ def copy_playlist(
         track_sleep,
         yt_search_algo,
         yt=yt,
+        progress=progress,
+        cancel=cancel,
+        misses=NegativeCache(ttl_days=miss_ttl_days),
+        retry_misses=retry_misses,
+        speculative=speculative,
+        mappings=mappings,
     )
 
 
@@ -495,14 +1415,32 @@ def copy_all_playlists(
     yt_search_algo: int = 0,
     reverse_playlist: bool = True,
     privacy_status: str = "PRIVATE",
+    *,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[threading.Event] = None,
+    retry_misses: bool = False,
+    miss_ttl_days: float = DEFAULT_MISS_TTL_DAYS,
+    speculative: bool = False,
+    create_with_tracks: bool = False,
+    remap: bool = False,
 ):
     """
     Copy all Spotify playlists (except Liked Songs) to YTMusic playlists
+
+    `progress`, `cancel`, `retry_misses` and `speculative` are passed along to `copier()` for each playlist.
+    With `create_with_tracks`, playlists that don't exist on YTMusic yet are created
+    with their tracks by `copy_to_new_playlist()`.  `remap` is as in `copy_playlist()`.
     """
     spotify_pls = load_playlists_json()
     yt = get_ytmusic()
+    misses = NegativeCache(ttl_days=miss_ttl_days)
+    strategy = LookupStrategy()
+    mappings = MappingDB(remap=remap)
 
     for src_pl in spotify_pls["playlists"]:
+        if cancel is not None and cancel.is_set():
+            print("Copy cancelled.")
+            return
         if str(src_pl.get("name")) == "Liked Songs":
             continue
 
@@ -512,6 +1450,30 @@ def copy_all_playlists(
 
         dst_pl_id = get_playlist_id_by_name(yt, pl_name)
         print(f"Looking up playlist '{pl_name}': id={dst_pl_id}")
+        if dst_pl_id is None and create_with_tracks:
+            #  In Spotify order, see copy_playlist()
+            copy_to_new_playlist(
+                iter_spotify_playlist(
+                    src_pl["id"],
+                    spotify_encoding=spotify_playlists_encoding,
+                    reverse_playlist=False,
+                ),
+                pl_name,
+                privacy_status,
+                dry_run,
+                track_sleep,
+                yt_search_algo,
+                yt=yt,
+                progress=progress,
+                cancel=cancel,
+                misses=misses,
+                retry_misses=retry_misses,
+                speculative=speculative,
+                strategy=strategy,
+                mappings=mappings,
+            )
+            print("\nPlaylist done!\n")
+            continue
         if dst_pl_id is None:
             dst_pl_id = _ytmusic_create_playlist(
                 yt, title=pl_name, description=pl_name, privacy_status=privacy_status
@@ -533,7 +1495,139 @@ def copy_all_playlists(
             dry_run,
             track_sleep,
             yt_search_algo,
+            yt=yt,
+            progress=progress,
+            cancel=cancel,
+            misses=misses,
+            retry_misses=retry_misses,
+            speculative=speculative,
+            strategy=strategy,
+            mappings=mappings,
         )
         print("\nPlaylist done!\n")
 
     print("All done!")
+
+
+def find_yt_album(yt: YTMusic, album_name: str, artist_name: str) -> Optional[Dict]:
+    """Find a Spotify album on YTMusic.
+
+    The album search hits are checked for one with the same title by the same
+    artist, compared normalized (see `normalize.match_key()`).
+
+    Returns:
+        Optional[Dict]: The album search hit, with the "playlistId" of its tracks
+        filled in, or None if the album was not found.
+    """
+    albums = yt.search(query=f"{album_name} by {artist_name}", filter="albums")
+    for album in albums[:ALBUM_CANDIDATES]:
+        if match_key(album.get("title")) != match_key(album_name):
+            continue
+        if not any(
+            match_key(artist.get("name")) == match_key(artist_name)
+            for artist in album.get("artists") or []
+        ):
+            continue
+        if not album.get("playlistId"):
+            try:
+                album["playlistId"] = yt.get_album(album["browseId"])["audioPlaylistId"]
+            except Exception as e:
+                print(f"Unable to lookup album ({e}), continuing...")
+                continue
+        return album
+    return None
+
+
+def copy_liked_albums(
+    spotify_playlist_file: str = "playlists.json",
+    spotify_encoding: str = "utf-8",
+    dry_run: bool = False,
+    track_sleep: float = 0.1,
+    yt_search_algo: int = 0,
+    *,
+    yt: Optional[YTMusic] = None,
+    misses: Optional[NegativeCache] = None,
+    retry_misses: bool = False,
+    speculative: bool = False,
+    mappings: Optional[MappingDB] = None,
+):
+    """
+    Save the Spotify liked albums to the YTMusic library as whole albums.
+
+    Each album is looked up once with `find_yt_album()` and its playlist is liked,
+    which saves the album to the library (unless it is already there).  The tracks
+    of albums that can't be found are liked one by one with `copier()` instead.
+    """
+    if yt is None:
+        yt = get_ytmusic()
+
+    try:
+        library_album_ids = {
+            album["browseId"] for album in yt.get_library_albums(limit=None)
+        }
+    except Exception as e:
+        print(f"WARNING: Unable to list library albums: {e}")
+        library_album_ids = set()
+
+    spotify_pls = load_playlists_json(spotify_playlist_file, spotify_encoding)
+    fallback_tracks = []
+    saved_count = 0
+    for saved_album in spotify_pls.get("albums") or []:
+        album = saved_album["album"]
+        artist_name = album["artists"][0]["name"] if album.get("artists") else ""
+        print(f"Spotify album: {album['name']} - {artist_name}")
+
+        try:
+            with profiling.stage("lookup"):
+                yt_album = find_yt_album(yt, album["name"], artist_name)
+        except Exception as e:
+            print(f"ERROR: Unable to look up album on YTMusic: {e}")
+            yt_album = None
+
+        saved = False
+        if yt_album is None:
+            print("  Not found, liking its tracks instead")
+        else:
+            print(f"  Youtube album: {yt_album['title']} ({yt_album['playlistId']})")
+            if yt_album.get("browseId") in library_album_ids:
+                print("  (Already in library)")
+                saved = True
+            elif dry_run:
+                print("  Would save the album")
+                saved = True
+            else:
+                saved = (
+                    retry.call(
+                        f"rate_playlist: {yt_album['playlistId']}",
+                        lambda: yt.rate_playlist(yt_album["playlistId"], "LIKE"),
+                    )
+                    is not None
+                )
+                if not saved:
+                    print("  Unable to save the album, liking its tracks instead")
+        if saved:
+            saved_count += 1
+        else:
+            for track in album["tracks"]["items"]:
+                fallback_tracks.append(_song_info(track, album))
+
+        if track_sleep:
+            _sleep(track_sleep)
+
+    print()
+    print(
+        f"{'Would save' if dry_run else 'Saved'} {saved_count} albums, {len(fallback_tracks)} tracks of other albums to like"
+    )
+    if fallback_tracks:
+        copier(
+            fallback_tracks,
+            None,
+            dry_run,
+            track_sleep,
+            yt_search_algo,
+            yt=yt,
+            misses=misses,
+            retry_misses=retry_misses,
+            speculative=speculative,
+            mappings=mappings,
+        )
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import gzip
+from typing import IO, Optional
+
+#  Compression formats, and the magic bytes the compressed files start with
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSIONS = ("gzip", "zstd")
+EXTENSIONS = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd"}
+
+#  Compression levels used when writing, favouring speed as backups are large
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def detect(filename: str) -> Optional[str]:
+    """Return the compression of a file from its first bytes, None if uncompressed."""
+    with open(filename, "rb") as f:
+        magic = f.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return "gzip"
+    if magic.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+def compression_for_filename(filename: str) -> Optional[str]:
+    """Return the compression implied by the extension of `filename`, if any."""
+    for extension, compression in EXTENSIONS.items():
+        if filename.lower().endswith(extension):
+            return compression
+    return None
+
+
+def _open_zstd(filename: str, mode: str, encoding: Optional[str]) -> IO:
+    try:
+        from compression import zstd  # Python 3.14+
+
+        return zstd.open(
+            filename, mode, level=ZSTD_LEVEL if "w" in mode else None, encoding=encoding
+        )
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstd compressed backups need Python 3.14 or the 'zstandard' package "
+            "(pip install zstandard)"
+        )
+    cctx = zstandard.ZstdCompressor(level=ZSTD_LEVEL) if "w" in mode else None
+    return zstandard.open(filename, mode, cctx=cctx, encoding=encoding)
+
+
+def open_backup(
+    filename: str,
+    mode: str = "r",
+    encoding: Optional[str] = "utf-8",
+    compression: Optional[str] = None,
+) -> IO:
+    """Open a Spotify backup, compressed or not.
+
+    When reading, the compression is detected from the contents of the file.  When
+    writing, `compression` ("gzip", "zstd" or None) is used, or if that is not
+    given, the compression implied by the extension (".gz" or ".zst").
+
+    Args:
+        `filename` (str): The backup file.
+        `mode` (str): "r" or "w" for text, "rb" or "wb" for bytes.
+        `encoding` (Optional[str]): The encoding of the text, ignored for bytes.
+        `compression` (Optional[str]): The compression to write with.
+    """
+    if mode not in ("r", "w", "rb", "wb"):
+        raise ValueError(f"Unsupported mode {mode!r}")
+    binary = "b" in mode
+    if binary:
+        encoding = None
+
+    if "r" in mode:
+        compression = detect(filename)
+    elif compression is None:
+        compression = compression_for_filename(filename)
+    elif compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r}")
+
+    if compression is None:
+        return open(filename, mode, encoding=encoding)
+    text_mode = mode if binary else mode + "t"
+    if compression == "gzip":
+        return gzip.open(
+            filename, text_mode, compresslevel=GZIP_LEVEL, encoding=encoding
+        )
+    return _open_zstd(filename, text_mode, encoding)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+
+import codecs
+import json
+import mmap
+import os
+import re
+from typing import Optional, Any, Callable, Dict, Iterator, List, Tuple
+
+from . import backup_compression, json_backend
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".index"
+
+_decoder = json.JSONDecoder()
+_WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+_WHITESPACE_BYTES_RE = re.compile(rb"[ \t\n\r]*")
+#  Number of bytes of a backup decoded at a time by BackupBytes
+_DECODE_WINDOW = 1 << 20
+
+
+def index_filename(filename: str) -> str:
+    """Return the name of the sidecar index file for the backup `filename`."""
+    return filename + INDEX_SUFFIX
+
+
+def _walk_backup(
+    peek: Callable[[int], str],
+    skip_whitespace: Callable[[int], int],
+    decode_at: Callable[[int], Tuple[Any, int]],
+    pos: int = 0,
+    read_element: Optional[Callable[[str, int], Tuple[Any, int]]] = None,
+    end: Optional[List[int]] = None,
+) -> Iterator[Tuple[str, int, int, Any]]:
+    """Walk the elements of the top-level arrays of a backup, see `iter_backup()`.
+
+    Args:
+        `peek`: Return the character at an offset, "" at the end of the backup.
+        `skip_whitespace`: Return the offset of the next non-whitespace character.
+        `decode_at`: Decode the JSON value at an offset, returning it and its end offset.
+        `pos`: The offset of the object to walk, the backup itself by default.
+        `read_element`: Read the array element of a key at an offset, returning it
+            and its end offset.  The element is decoded by default.
+        `end`: If given, the offset just past the object is appended to it.
+    """
+    if read_element is None:
+        read_element = lambda key, pos: decode_at(pos)
+
+    def skip(pos: int, expected: str = "") -> int:
+        pos = skip_whitespace(pos)
+        if expected and (peek(pos) == "" or peek(pos) not in expected):
+            raise ValueError(f"Expected {expected!r} at offset {pos} of backup")
+        return pos
+
+    pos = skip(pos, "{") + 1
+    if peek(skip(pos)) == "}":
+        if end is not None:
+            end.append(skip(pos) + 1)
+        return
+    while True:
+        key, pos = decode_at(skip(pos, '"'))
+        pos = skip(skip(pos, ":") + 1)
+        if peek(pos) == "[":
+            pos = skip(pos + 1)
+            if peek(pos) != "]":
+                while True:
+                    element, element_end = read_element(key, pos)
+                    yield key, pos, element_end, element
+                    pos = skip(element_end, ",]")
+                    if peek(pos) == "]":
+                        break
+                    pos = skip(pos + 1)
+            pos += 1
+        else:
+            _, pos = decode_at(pos)
+        pos = skip(pos, ",}")
+        if peek(pos) == "}":
+            if end is not None:
+                end.append(pos + 1)
+            return
+        pos += 1
+
+
+def iter_backup(text: str) -> Iterator[Tuple[str, int, int, Any]]:
+    """Walk the elements of the top-level arrays ("playlists" and "albums") of a backup.
+
+    Only one element is decoded at a time, so this needs little memory beyond `text`.
+
+    Args:
+        `text` (str): The backup file contents.
+
+    Raises:
+        ValueError: If the backup is not a JSON object.
+
+    Yields:
+        Tuple[str, int, int, Any]: The top-level key, the start and end offsets in
+        `text` of the element, and the decoded element.
+    """
+    return _walk_backup(
+        lambda pos: text[pos : pos + 1],
+        lambda pos: _WHITESPACE_RE.match(text, pos).end(),
+        lambda pos: _decoder.raw_decode(text, pos),
+    )
+
+
+class BackupBytes:
+    """Decodes the values of an undecoded backup, for example an mmap.
+
+    The backup is decoded a window at a time and the values in the window are all
+    decoded from it, a window only grows past `_DECODE_WINDOW` bytes to fit a value
+    that is larger.  So memory use is bounded by the largest value decoded rather
+    than the file.  All offsets are byte offsets.
+    """
+
+    def __init__(self, buf, encoding: str = "utf-8"):
+        self.buf = buf
+        self.encoding = encoding
+        self._utf8 = json_backend.is_utf8(encoding)
+        #  The decoded window, and the byte offsets of its start and end
+        self._text = ""
+        self._start = self._end = 0
+        self._final = False
+        self._ascii = True
+        #  A byte offset in the window and the matching offset in its text, only
+        #  ever moved forward so each part of the window is converted once
+        self._byte = self._char = 0
+
+    def _fill(self, pos: int, size: int) -> None:
+        self._final = pos + size >= len(self.buf)
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        self._text = decoder.decode(self.buf[pos : pos + size], final=self._final)
+        self._ascii = self._utf8 and self._text.isascii()
+        self._start = self._byte = pos
+        self._char = 0
+        if self._ascii:
+            self._end = pos + len(self._text)
+        else:
+            self._end = pos + len(self._text.encode(self.encoding))
+
+    def _text_offset(self, pos: int) -> Optional[int]:
+        """Return the offset in the window of byte `pos`, None if it is outside."""
+        if self._ascii:
+            return pos - self._start if self._start <= pos < self._end else None
+        if not self._byte <= pos < self._end:
+            return None
+        self._char += len(self.buf[self._byte : pos].decode(self.encoding))
+        self._byte = pos
+        return self._char
+
+    def _byte_offset(self, char: int) -> int:
+        """Return the byte offset of the offset `char` in the window."""
+        if self._ascii:
+            return self._start + char
+        self._byte += len(self._text[self._char : char].encode(self.encoding))
+        self._char = char
+        return self._byte
+
+    def peek(self, pos: int) -> str:
+        """Return the character at byte `pos`, "" at the end of the backup."""
+        return self.buf[pos : pos + 1].decode("ascii", errors="replace")
+
+    def skip_whitespace(self, pos: int) -> int:
+        """Return the offset of the next non-whitespace byte."""
+        return _WHITESPACE_BYTES_RE.match(self.buf, pos).end()
+
+    def decode_at(self, pos: int) -> Tuple[Any, int]:
+        """Decode the JSON value at byte `pos`, returning it and its end offset."""
+        size = _DECODE_WINDOW
+        char = self._text_offset(pos)
+        while True:
+            if char is not None:
+                try:
+                    value, end = _decoder.raw_decode(self._text, char)
+                except json.JSONDecodeError:
+                    if self._final:
+                        raise
+                else:
+                    #  A number or other bare value may continue past the window
+                    if end < len(self._text) or self._final:
+                        return value, self._byte_offset(end)
+                if char == 0:
+                    size = 4 * (self._end - pos)
+            self._fill(pos, size)
+            char = 0
+
+    def walk(
+        self,
+        pos: int = 0,
+        read_element: Optional[Callable[[str, int], Tuple[Any, int]]] = None,
+        end: Optional[List[int]] = None,
+    ) -> Iterator[Tuple[str, int, int, Any]]:
+        """Walk the elements of the arrays of the object at byte `pos`.
+
+        See `iter_backup()`, and `_walk_backup()` for `read_element` and `end`.
+        """
+        return _walk_backup(
+            self.peek, self.skip_whitespace, self.decode_at, pos, read_element, end
+        )
+
+
+def iter_backup_bytes(
+    buf, encoding: str = "utf-8"
+) -> Iterator[Tuple[str, int, int, Any]]:
+    """Like `iter_backup()`, but for the undecoded backup, for example an mmap.
+
+    The offsets are byte offsets, see `BackupBytes`.
+    """
+    return BackupBytes(buf, encoding).walk()
+
+
+def build_index(filename: str, encoding: str = "utf-8") -> Dict:
+    """Scan a backup and write its sidecar index.
+
+    The index records the byte offset and length of every playlist and album in the
+    backup, along with the playlist IDs and names, and the size and mtime of the
+    backup so a stale index can be detected.
+    """
+    st = os.stat(filename)
+    with open(filename, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as buf:
+        text = buf[:].decode(encoding)
+
+    #  Convert the str offsets from iter_backup() into byte offsets, the offsets
+    #  only ever increase so this encodes each part of the text once.
+    ascii_only = text.isascii()
+    char_pos = byte_pos = 0
+
+    def byte_offset(pos: int) -> int:
+        nonlocal char_pos, byte_pos
+        if ascii_only:
+            return pos
+        byte_pos += len(text[char_pos:pos].encode(encoding))
+        char_pos = pos
+        return byte_pos
+
+    playlists = []
+    albums = []
+    for key, start, end, element in iter_backup(text):
+        if key not in ("playlists", "albums") or not isinstance(element, dict):
+            continue
+        entry = {"offset": byte_offset(start)}
+        entry["length"] = byte_offset(end) - entry["offset"]
+        if key == "playlists":
+            entry["id"] = element.get("id")
+            entry["name"] = element.get("name")
+            entry["tracks"] = len(element.get("tracks") or [])
+            playlists.append(entry)
+        else:
+            albums.append(entry)
+
+    index = {
+        "version": INDEX_VERSION,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "playlists": playlists,
+        "albums": albums,
+    }
+
+    tmp_filename = index_filename(filename) + ".tmp"
+    try:
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_filename, index_filename(filename))
+    except OSError as e:
+        #  Still usable for this run, it will be rebuilt next time
+        print(f"WARNING: Unable to write index {index_filename(filename)}: {e}")
+
+    return index
+
+
+def load_index(filename: str, encoding: str = "utf-8") -> Optional[Dict]:
+    """Return the index for a backup, building it if it is missing or stale.
+
+    Compressed backups can't be read from an offset, so they are not indexed.
+
+    Returns:
+        Optional[Dict]: The index, or None if the backup can't be indexed.
+    """
+    #  Byte offsets can only be found by scanning for ASCII brackets in UTF-8 files
+    if not json_backend.is_utf8(encoding):
+        return None
+
+    try:
+        st = os.stat(filename)
+        if st.st_size == 0 or backup_compression.detect(filename) is not None:
+            return None
+        with open(index_filename(filename), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if (
+            index.get("version") == INDEX_VERSION
+            and index.get("size") == st.st_size
+            and index.get("mtime_ns") == st.st_mtime_ns
+        ):
+            return index
+    except (OSError, ValueError):
+        pass
+
+    try:
+        return build_index(filename, encoding)
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Unable to index {filename}, loading all of it: {e}")
+        return None
+
+
+def read_playlist(
+    filename: str, src_pl_id: Optional[str], encoding: str = "utf-8"
+) -> Optional[Dict]:
+    """Load a single playlist from a backup, parsing only that playlist.
+
+    Args:
+        `filename` (str): The backup file.
+        `src_pl_id` (Optional[str]): The playlist ID, or None for "Liked Songs".
+        `encoding` (str): The encoding of the backup file.
+
+    Raises:
+        ValueError: If the playlist is not in the backup.
+
+    Returns:
+        Optional[Dict]: The playlist, or None if the backup can't be indexed.
+    """
+    index = load_index(filename, encoding)
+    if index is None:
+        return None
+
+    for entry in index["playlists"]:
+        if src_pl_id is None and str(entry.get("name")) == "Liked Songs":
+            break
+        if src_pl_id is not None and str(entry.get("id")) == src_pl_id:
+            break
+    else:
+        raise ValueError(f"Could not find Spotify playlist {src_pl_id}")
+
+    with open(filename, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as buf:
+        data = buf[entry["offset"] : entry["offset"] + entry["length"]]
+    if not json_backend.is_utf8(encoding):
+        data = data.decode(encoding)
+    return json_backend.loads(data)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .song_info import SongInfo
+
+
+class TrackCatalog:
+    """A compact list of Spotify tracks, for operations on a whole library.
+
+    Each distinct track gets an integer track id, and the fields are kept in
+    parallel lists of interned strings, so a library that repeats the same artist
+    and album names thousands of times stores each name once, and identical tracks
+    are stored (and looked up) once.  Tracks are identical if they have the same
+    Spotify URI, or without one the same ISRC, and only tracks with neither are
+    told apart by their (title, artist, album), so two releases with the same names
+    (a clean and an explicit one) stay two tracks.  `sequence` is the order the
+    tracks were added in, as track ids, including repeats.  The other fields of a
+    track (its Spotify ids, duration...) are those of the first of the identical
+    tracks, and take no space for tracks that have none.
+
+    The result of looking up each track id can be recorded with `set_result()`,
+    so a track that appears more than once is only searched for once.
+    """
+
+    __slots__ = (
+        "titles",
+        "artists",
+        "albums",
+        "extras",
+        "sequence",
+        "video_ids",
+        "looked_up",
+        "_by_id",
+        "_by_title",
+        "_next_same_title",
+    )
+
+    def __init__(self, tracks: Iterable[SongInfo] = ()) -> None:
+        self.titles: List[str] = []
+        self.artists: List[str] = []
+        self.albums: List[Optional[str]] = []
+        #  The SongInfo fields after the names, None if they are all None
+        self.extras: List[Optional[tuple]] = []
+        self.sequence = array("l")
+        #  The YTMusic videoId found for each track id, None if not found
+        self.video_ids: List[Optional[str]] = []
+        #  1 for each track id that has been looked up
+        self.looked_up = bytearray()
+        #  The track id of each URI, or ISRC for tracks without one
+        self._by_id: Dict[str, int] = {}
+        #  For the tracks with neither, the first track id with each title, and the
+        #  next track id with the same title (or -1), which avoids keeping a key
+        #  tuple for every track
+        self._by_title: Dict[str, int] = {}
+        self._next_same_title = array("l")
+
+        for track in tracks:
+            self.add(track)
+
+    @staticmethod
+    def _intern(value: Optional[str]) -> Optional[str]:
+        return sys.intern(value) if isinstance(value, str) else value
+
+    def add(self, track: SongInfo) -> int:
+        """Add a track to the end of the sequence, returning its track id."""
+        title = self._intern(track.title)
+        artist = self._intern(track.artist)
+        album = self._intern(track.album)
+        identity = track.uri or (f"isrc:{track.isrc.upper()}" if track.isrc else None)
+
+        last_id = -1
+        if identity is not None:
+            track_id = self._by_id.get(identity, -1)
+            if track_id >= 0:
+                self.sequence.append(track_id)
+                return track_id
+        else:
+            track_id = self._by_title.get(title, -1)
+            while track_id >= 0:
+                if self.artists[track_id] is artist and self.albums[track_id] is album:
+                    self.sequence.append(track_id)
+                    return track_id
+                last_id = track_id
+                track_id = self._next_same_title[track_id]
+
+        track_id = len(self.titles)
+        if identity is not None:
+            self._by_id[identity] = track_id
+        elif last_id >= 0:
+            self._next_same_title[last_id] = track_id
+        else:
+            self._by_title[title] = track_id
+        self._next_same_title.append(-1)
+        self.titles.append(title)
+        self.artists.append(artist)
+        self.albums.append(album)
+        extras = tuple(track[3:])
+        self.extras.append(extras if any(x is not None for x in extras) else None)
+        self.video_ids.append(None)
+        self.looked_up.append(0)
+        self.sequence.append(track_id)
+        return track_id
+
+    def __len__(self) -> int:
+        """The number of distinct tracks."""
+        return len(self.titles)
+
+    def get(self, track_id: int) -> SongInfo:
+        """Return the track with id `track_id`."""
+        return SongInfo(
+            self.titles[track_id],
+            self.artists[track_id],
+            self.albums[track_id],
+            *(self.extras[track_id] or ()),
+        )
+
+    def __iter__(self) -> Iterator[Tuple[int, SongInfo]]:
+        """Iterate over the sequence, as (track id, track) pairs."""
+        for track_id in self.sequence:
+            yield track_id, self.get(track_id)
+
+    def set_result(self, track_id: int, video_id: Optional[str]) -> None:
+        """Record the videoId found for a track, or None if it was not found."""
+        self.video_ids[track_id] = self._intern(video_id)
+        self.looked_up[track_id] = 1
+
+    def result(self, track_id: int) -> Tuple[bool, Optional[str]]:
+        """Return whether the track has been looked up, and the videoId found."""
+        return bool(self.looked_up[track_id]), self.video_ids[track_id]
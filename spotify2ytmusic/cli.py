@@ -2,11 +2,15 @@
 
 import sys
 from argparse import ArgumentParser
-import pprint
 
 from . import backend
+from . import mapping
+from . import profiling
+from . import plan as plan_module
+from . import sync
 
 
+@profiling.profiled
 def list_liked_albums():
     """
     List albums that have been liked.
@@ -15,6 +19,7 @@ def list_liked_albums():
         print(f"{song.album} - {song.artist} - {song.title}")
 
 
+@profiling.profiled
 def list_playlists():
     """
     List the playlists on Spotify and YTMusic
@@ -36,6 +41,7 @@ def list_playlists():
         print(f"{pl['playlistId']} - {pl['title']:40} ({pl.get('count', '?')} tracks)")
 
 
+@profiling.profiled
 def create_playlist():
     """
     Create a YTMusic playlist
@@ -61,6 +67,7 @@ def create_playlist():
     backend.create_playlist(args.playlist_name, privacy_status=args.privacy)
 
 
+@profiling.profiled
 def search():
     """Search for a track on ytmusic"""
 
@@ -87,14 +94,27 @@ def search():
             default=0,
             help="Algorithm to use for search (0 = exact, 1 = extended, 2 = approximate)",
         )
+        parser.add_argument(
+            "--speculative",
+            action="store_true",
+            help="Run the album and song searches for each track concurrently, faster but uses more API calls (default: False)",
+        )
         return parser.parse_args()
 
     args = parse_arguments()
 
+    import pprint
+
     yt = backend.get_ytmusic()
     details = backend.ResearchDetails()
     ret = backend.lookup_song(
-        yt, args.track_name, args.artist, args.album, args.algo, details=details
+        yt,
+        args.track_name,
+        args.artist,
+        args.album,
+        args.algo,
+        details=details,
+        speculative=args.speculative,
     )
 
     print(f"Query: '{details.query}'")
@@ -108,6 +128,7 @@ def search():
             pprint.pprint(song)
 
 
+@profiling.profiled
 def load_liked_albums():
     """
     Load the "Liked" albums from Spotify into YTMusic.  Spotify stores liked albums separately
@@ -139,10 +160,49 @@ def load_liked_albums():
             help="Algorithm to use for search (0 = exact, 1 = extended, 2 = approximate)",
         )
 
+        parser.add_argument(
+            "--retry-misses",
+            action="store_true",
+            help="Search again for tracks that were not found on a previous run (default: False)",
+        )
+        parser.add_argument(
+            "--miss-ttl",
+            type=float,
+            default=backend.DEFAULT_MISS_TTL_DAYS,
+            help="Days to remember tracks that were not found, 0 to disable (default: 30)",
+        )
+        parser.add_argument(
+            "--remap",
+            action="store_true",
+            help="Search again for tracks in the mapping database, replacing their mappings with what is found, to correct wrong matches or after changing --algo (default: False)",
+        )
+        parser.add_argument(
+            "--speculative",
+            action="store_true",
+            help="Run the album and song searches for each track concurrently, faster but uses more API calls (default: False)",
+        )
+        parser.add_argument(
+            "--save-albums",
+            action="store_true",
+            help="Save each album to the YTMusic library as a whole, only liking the tracks of albums that can't be found (default: False)",
+        )
         return parser.parse_args()
 
     args = parse_arguments()
 
+    if args.save_albums:
+        backend.copy_liked_albums(
+            spotify_encoding=args.spotify_playlists_encoding,
+            dry_run=args.dry_run,
+            track_sleep=args.track_sleep,
+            yt_search_algo=args.algo,
+            misses=backend.NegativeCache(ttl_days=args.miss_ttl),
+            mappings=backend.MappingDB(remap=args.remap),
+            retry_misses=args.retry_misses,
+            speculative=args.speculative,
+        )
+        return
+
     spotify_pls = backend.load_playlists_json()
 
     backend.copier(
@@ -153,9 +213,14 @@ def load_liked_albums():
         args.dry_run,
         args.track_sleep,
         args.algo,
+        misses=backend.NegativeCache(ttl_days=args.miss_ttl),
+        mappings=backend.MappingDB(remap=args.remap),
+        retry_misses=args.retry_misses,
+        speculative=args.speculative,
     )
 
 
+@profiling.profiled
 def load_liked():
     """
     Load the "Liked Songs" playlist from Spotify into YTMusic.
@@ -192,6 +257,27 @@ def load_liked():
             "they are added in the opposite order from other commands in this program.",
         )
 
+        parser.add_argument(
+            "--retry-misses",
+            action="store_true",
+            help="Search again for tracks that were not found on a previous run (default: False)",
+        )
+        parser.add_argument(
+            "--miss-ttl",
+            type=float,
+            default=backend.DEFAULT_MISS_TTL_DAYS,
+            help="Days to remember tracks that were not found, 0 to disable (default: 30)",
+        )
+        parser.add_argument(
+            "--remap",
+            action="store_true",
+            help="Search again for tracks in the mapping database, replacing their mappings with what is found, to correct wrong matches or after changing --algo (default: False)",
+        )
+        parser.add_argument(
+            "--speculative",
+            action="store_true",
+            help="Run the album and song searches for each track concurrently, faster but uses more API calls (default: False)",
+        )
         return parser.parse_args()
 
     args = parse_arguments()
@@ -206,9 +292,14 @@ def load_liked():
         args.dry_run,
         args.track_sleep,
         args.algo,
+        misses=backend.NegativeCache(ttl_days=args.miss_ttl),
+        mappings=backend.MappingDB(remap=args.remap),
+        retry_misses=args.retry_misses,
+        speculative=args.speculative,
     )
 
 
+@profiling.profiled
 def copy_playlist():
     """
     Copy a Spotify playlist to a YTMusic playlist
@@ -260,6 +351,32 @@ def copy_playlist():
             help="The privacy seting of created playlists (PRIVATE, PUBLIC, UNLISTED, default PRIVATE)",
         )
 
+        parser.add_argument(
+            "--retry-misses",
+            action="store_true",
+            help="Search again for tracks that were not found on a previous run (default: False)",
+        )
+        parser.add_argument(
+            "--miss-ttl",
+            type=float,
+            default=backend.DEFAULT_MISS_TTL_DAYS,
+            help="Days to remember tracks that were not found, 0 to disable (default: 30)",
+        )
+        parser.add_argument(
+            "--remap",
+            action="store_true",
+            help="Search again for tracks in the mapping database, replacing their mappings with what is found, to correct wrong matches or after changing --algo (default: False)",
+        )
+        parser.add_argument(
+            "--speculative",
+            action="store_true",
+            help="Run the album and song searches for each track concurrently, faster but uses more API calls (default: False)",
+        )
+        parser.add_argument(
+            "--create-with-tracks",
+            action="store_true",
+            help="When the YTMusic playlist has to be created, look up all the tracks first and create it with them in Spotify order, which takes a few requests instead of one per track (default: False)",
+        )
         return parser.parse_args()
 
     args = parse_arguments()
@@ -271,9 +388,15 @@ def copy_playlist():
         spotify_playlists_encoding=args.spotify_playlists_encoding,
         reverse_playlist=not args.no_reverse_playlist,
         privacy_status=args.privacy,
+        retry_misses=args.retry_misses,
+        miss_ttl_days=args.miss_ttl,
+        speculative=args.speculative,
+        create_with_tracks=args.create_with_tracks,
+        remap=args.remap,
     )
 
 
+@profiling.profiled
 def copy_all_playlists():
     """
     Copy all Spotify playlists (except Liked Songs) to YTMusic playlists
@@ -315,6 +438,32 @@ def copy_all_playlists():
             help="The privacy seting of created playlists (PRIVATE, PUBLIC, UNLISTED, default PRIVATE)",
         )
 
+        parser.add_argument(
+            "--retry-misses",
+            action="store_true",
+            help="Search again for tracks that were not found on a previous run (default: False)",
+        )
+        parser.add_argument(
+            "--miss-ttl",
+            type=float,
+            default=backend.DEFAULT_MISS_TTL_DAYS,
+            help="Days to remember tracks that were not found, 0 to disable (default: 30)",
+        )
+        parser.add_argument(
+            "--remap",
+            action="store_true",
+            help="Search again for tracks in the mapping database, replacing their mappings with what is found, to correct wrong matches or after changing --algo (default: False)",
+        )
+        parser.add_argument(
+            "--speculative",
+            action="store_true",
+            help="Run the album and song searches for each track concurrently, faster but uses more API calls (default: False)",
+        )
+        parser.add_argument(
+            "--create-with-tracks",
+            action="store_true",
+            help="When the YTMusic playlist has to be created, look up all the tracks first and create it with them in Spotify order, which takes a few requests instead of one per track (default: False)",
+        )
         return parser.parse_args()
 
     args = parse_arguments()
@@ -324,6 +473,439 @@ def copy_all_playlists():
         spotify_playlists_encoding=args.spotify_playlists_encoding,
         reverse_playlist=not args.no_reverse_playlist,
         privacy_status=args.privacy,
+        retry_misses=args.retry_misses,
+        miss_ttl_days=args.miss_ttl,
+        speculative=args.speculative,
+        create_with_tracks=args.create_with_tracks,
+        remap=args.remap,
+    )
+
+
+@profiling.profiled
+def plan():
+    """
+    Look up Spotify tracks on YTMusic and save the results to a plan file, without
+    changing anything on YTMusic.  Use "apply" to write the plan.
+    """
+
+    def parse_arguments():
+        parser = ArgumentParser()
+        parser.add_argument(
+            "source",
+            type=str,
+            help="ID of the Spotify playlist to plan, 'liked' for the Liked Songs or 'liked_albums' for the liked albums.",
+        )
+        parser.add_argument(
+            "ytmusic_playlist_id",
+            type=str,
+            nargs="?",
+            default=None,
+            help="ID of the YTMusic playlist the plan is for, or '+NAME' to use (or create) a playlist by name.  If not given, the songs are liked.",
+        )
+        parser.add_argument(
+            "--output",
+            default=plan_module.DEFAULT_PLAN_FILE,
+            help="File to write the plan to (default: plan.json)",
+        )
+        parser.add_argument(
+            "--track-sleep",
+            type=float,
+            default=0.1,
+            help="Time to sleep between each track that is looked up (default: 0.1)",
+        )
+        parser.add_argument(
+            "--spotify-playlists-encoding",
+            default="utf-8",
+            help="The encoding of the `playlists.json` file.",
+        )
+        parser.add_argument(
+            "--algo",
+            type=int,
+            default=0,
+            help="Algorithm to use for search (0 = exact, 1 = extended, 2 = approximate)",
+        )
+        parser.add_argument(
+            "--retry-misses",
+            action="store_true",
+            help="Search again for tracks that were not found on a previous run (default: False)",
+        )
+        parser.add_argument(
+            "--miss-ttl",
+            type=float,
+            default=backend.DEFAULT_MISS_TTL_DAYS,
+            help="Days to remember tracks that were not found, 0 to disable (default: 30)",
+        )
+        parser.add_argument(
+            "--remap",
+            action="store_true",
+            help="Search again for tracks in the mapping database, replacing their mappings with what is found, to correct wrong matches or after changing --algo (default: False)",
+        )
+        parser.add_argument(
+            "--speculative",
+            action="store_true",
+            help="Run the album and song searches for each track concurrently, faster but uses more API calls (default: False)",
+        )
+
+        return parser.parse_args()
+
+    args = parse_arguments()
+
+    if args.source == "liked":
+        src_tracks = backend.iter_spotify_playlist(
+            None,
+            spotify_encoding=args.spotify_playlists_encoding,
+            reverse_playlist=False,
+        )
+    elif args.source == "liked_albums":
+        src_tracks = backend.iter_spotify_liked_albums(
+            spotify_encoding=args.spotify_playlists_encoding
+        )
+    else:
+        src_tracks = backend.iter_spotify_playlist(
+            args.source,
+            spotify_encoding=args.spotify_playlists_encoding,
+            #  The plan is applied in batches that keep its order
+            reverse_playlist=False,
+        )
+
+    plan_module.make_plan(
+        src_tracks,
+        args.output,
+        args.ytmusic_playlist_id,
+        args.algo,
+        args.track_sleep,
+        source=args.source,
+        misses=backend.NegativeCache(ttl_days=args.miss_ttl),
+        mappings=backend.MappingDB(remap=args.remap),
+        retry_misses=args.retry_misses,
+        speculative=args.speculative,
+    )
+
+
+@profiling.profiled
+def apply():
+    """
+    Write a plan file made by "plan" to YTMusic.
+    """
+
+    def parse_arguments():
+        parser = ArgumentParser()
+        parser.add_argument(
+            "plan_file",
+            type=str,
+            nargs="?",
+            default=plan_module.DEFAULT_PLAN_FILE,
+            help="The plan file to apply (default: plan.json)",
+        )
+        parser.add_argument(
+            "--ytmusic-playlist-id",
+            default=None,
+            help="ID (or '+NAME') of the YTMusic playlist to add to, instead of the one in the plan.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Do not add songs to destination playlist (default: False)",
+        )
+        parser.add_argument(
+            "--privacy",
+            default="PRIVATE",
+            help="The privacy seting of created playlists (PRIVATE, PUBLIC, UNLISTED, default PRIVATE)",
+        )
+
+        return parser.parse_args()
+
+    args = parse_arguments()
+
+    failed = plan_module.apply_plan(
+        args.plan_file,
+        args.ytmusic_playlist_id,
+        dry_run=args.dry_run,
+        privacy_status=args.privacy,
+    )
+    if failed:
+        sys.exit(1)
+
+
+@profiling.profiled
+def sync_playlist():
+    """
+    Update a YTMusic playlist to match a Spotify playlist, only adding, removing and
+    moving the tracks that differ.
+    """
+
+    def parse_arguments():
+        parser = ArgumentParser()
+        parser.add_argument(
+            "--track-sleep",
+            type=float,
+            default=0.1,
+            help="Time to sleep between each track that is looked up (default: 0.1)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only show the changes that would be made (default: False)",
+        )
+        parser.add_argument(
+            "spotify_playlist_id",
+            type=str,
+            help="ID of the Spotify playlist to sync from",
+        )
+        parser.add_argument(
+            "ytmusic_playlist_id",
+            type=str,
+            help="ID of the YTMusic playlist to sync to.  If this argument starts with a '+', it is asumed to be the playlist title rather than playlist ID.",
+        )
+        parser.add_argument(
+            "--spotify-playlists-encoding",
+            default="utf-8",
+            help="The encoding of the `playlists.json` file.",
+        )
+        parser.add_argument(
+            "--algo",
+            type=int,
+            default=0,
+            help="Algorithm to use for search (0 = exact, 1 = extended, 2 = approximate)",
+        )
+        parser.add_argument(
+            "--retry-misses",
+            action="store_true",
+            help="Search again for tracks that were not found on a previous run (default: False)",
+        )
+        parser.add_argument(
+            "--miss-ttl",
+            type=float,
+            default=backend.DEFAULT_MISS_TTL_DAYS,
+            help="Days to remember tracks that were not found, 0 to disable (default: 30)",
+        )
+        parser.add_argument(
+            "--remap",
+            action="store_true",
+            help="Search again for tracks in the mapping database, replacing their mappings with what is found, to correct wrong matches or after changing --algo (default: False)",
+        )
+        parser.add_argument(
+            "--speculative",
+            action="store_true",
+            help="Run the album and song searches for each track concurrently, faster but uses more API calls (default: False)",
+        )
+
+        return parser.parse_args()
+
+    args = parse_arguments()
+
+    yt = backend.get_ytmusic()
+    ytmusic_playlist_id = args.ytmusic_playlist_id
+    if ytmusic_playlist_id.startswith("+"):
+        pl_name = ytmusic_playlist_id[1:]
+        ytmusic_playlist_id = backend.get_playlist_id_by_name(yt, pl_name)
+        print(f"Looking up playlist '{pl_name}': id={ytmusic_playlist_id}")
+        if ytmusic_playlist_id is None:
+            print(
+                f"ERROR: No YTMusic playlist named '{pl_name}', use copy_playlist to create it"
+            )
+            sys.exit(1)
+
+    sync.sync_playlist(
+        backend.iter_spotify_playlist(
+            args.spotify_playlist_id,
+            spotify_encoding=args.spotify_playlists_encoding,
+            reverse_playlist=False,
+        ),
+        ytmusic_playlist_id,
+        args.dry_run,
+        args.track_sleep,
+        args.algo,
+        yt=yt,
+        misses=backend.NegativeCache(ttl_days=args.miss_ttl),
+        mappings=backend.MappingDB(remap=args.remap),
+        retry_misses=args.retry_misses,
+        speculative=args.speculative,
+    )
+
+
+@profiling.profiled
+def watch():
+    """
+    Periodically back up Spotify and sync the playlists and liked songs that changed
+    to YTMusic.
+    """
+    #  Imported here as the Spotify backup code is slow to import
+    from . import spotify_backup
+    from . import watch as watch_module
+
+    def parse_arguments():
+        parser = ArgumentParser()
+        parser.add_argument(
+            "backup_file",
+            type=str,
+            nargs="?",
+            default="playlists.json",
+            help="The Spotify backup, updated by each cycle (default: playlists.json)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=watch_module.DEFAULT_INTERVAL_MINUTES,
+            help="Minutes between cycles (default: 60)",
+        )
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=watch_module.DEFAULT_JITTER,
+            help="Fraction of the interval that the time between cycles varies by at random (default: 0.1)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run one cycle now and exit, for running from cron (default: False)",
+        )
+        parser.add_argument(
+            "--no-backup",
+            action="store_true",
+            help="Don't back up Spotify, only read the backup file written by another job (default: False)",
+        )
+        parser.add_argument(
+            "--token",
+            default="",
+            help="Spotify OAuth token to use instead of authorizing in the browser.  It can't be refreshed, so the watch stops when it expires, after about an hour.  Without it, the browser is opened once at start and the authorization is refreshed from then on, so run the first cycle where a browser can be used",
+        )
+        parser.add_argument(
+            "--state-file",
+            default=watch_module.DEFAULT_STATE_FILE,
+            help="File recording what has been synced (default: watch_state.json)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only show the changes that would be made (default: False)",
+        )
+        parser.add_argument(
+            "--track-sleep",
+            type=float,
+            default=0.1,
+            help="Time to sleep between each track that is looked up (default: 0.1)",
+        )
+        parser.add_argument(
+            "--algo",
+            type=int,
+            default=0,
+            help="Algorithm to use for search (0 = exact, 1 = extended, 2 = approximate)",
+        )
+        parser.add_argument(
+            "--privacy",
+            default="PRIVATE",
+            help="The privacy seting of created playlists (PRIVATE, PUBLIC, UNLISTED, default PRIVATE)",
+        )
+        parser.add_argument(
+            "--miss-ttl",
+            type=float,
+            default=backend.DEFAULT_MISS_TTL_DAYS,
+            help="Days to remember tracks that were not found, 0 to disable (default: 30)",
+        )
+        parser.add_argument(
+            "--remap",
+            action="store_true",
+            help="Search again for tracks in the mapping database, replacing their mappings with what is found, to correct wrong matches or after changing --algo (default: False)",
+        )
+        parser.add_argument(
+            "--speculative",
+            action="store_true",
+            help="Run the album and song searches for each track concurrently, faster but uses more API calls (default: False)",
+        )
+
+        return parser.parse_args()
+
+    args = parse_arguments()
+
+    watcher = watch_module.Watcher(
+        args.backup_file,
+        watch_module.WatchState(args.state_file),
+        backup=not args.no_backup,
+        token=args.token,
+        dry_run=args.dry_run,
+        track_sleep=args.track_sleep,
+        yt_search_algo=args.algo,
+        privacy_status=args.privacy,
+        speculative=args.speculative,
+        misses=backend.NegativeCache(ttl_days=args.miss_ttl),
+        mappings=backend.MappingDB(remap=args.remap),
+    )
+    try:
+        watcher.run(args.interval * 60, args.jitter, args.once)
+    except KeyboardInterrupt:
+        print("\nWatch stopped.")
+    except spotify_backup.SpotifyAuthError as e:
+        print(f"ERROR: Watch stopped: {e}")
+        if args.token:
+            print(
+                "       --token can't be refreshed, run s2yt_watch with a new token, or without one to authorize in the browser"
+            )
+        sys.exit(1)
+
+
+@profiling.profiled
+def export_mappings():
+    """
+    Write the track mappings found so far to a file, to import on another machine.
+    """
+
+    def parse_arguments():
+        parser = ArgumentParser()
+        parser.add_argument(
+            "mapping_file",
+            type=str,
+            help="The file to write the mappings to",
+        )
+        parser.add_argument(
+            "--min-confidence",
+            type=float,
+            default=0.0,
+            help="Only export mappings at least this sure of the match, 0.4 to 1 (default: 0, all of them)",
+        )
+
+        return parser.parse_args()
+
+    args = parse_arguments()
+
+    mappings = mapping.MappingDB()
+    count = mappings.write(args.mapping_file, args.min_confidence)
+    print(f"Exported {count} of {len(mappings)} track mappings to {args.mapping_file}")
+
+
+@profiling.profiled
+def import_mappings():
+    """
+    Add the track mappings exported by "export_mappings" to the mapping database.
+    """
+
+    def parse_arguments():
+        parser = ArgumentParser()
+        parser.add_argument(
+            "mapping_file",
+            type=str,
+            help="The file of mappings to import",
+        )
+        parser.add_argument(
+            "--min-confidence",
+            type=float,
+            default=0.0,
+            help="Only import mappings at least this sure of the match, 0.4 to 1 (default: 0, all of them)",
+        )
+
+        return parser.parse_args()
+
+    args = parse_arguments()
+
+    mappings = mapping.MappingDB()
+    try:
+        count = mappings.import_file(args.mapping_file, args.min_confidence)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Unable to import '{args.mapping_file}': {e}")
+        sys.exit(1)
+    mappings.save()
+    print(
+        f"Imported {count} track mappings, {len(mappings)} are now in {mappings.filename}"
     )
 
 
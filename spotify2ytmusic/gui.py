@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import os
+import queue
 import subprocess
 import sys
 import threading
@@ -10,8 +11,9 @@ from tkinter import ttk
 
 from . import cli
 from . import backend
+from . import profiling
 from . import spotify_backup
-from typing import Callable
+from typing import Callable, Optional, Tuple
 
 
 def create_label(parent: tk.Frame, text: str, **kwargs) -> tk.Label:
@@ -58,8 +60,22 @@ def create_button(parent: tk.Frame, text: str, **kwargs) -> tk.Button:
 class Window:
     """The main window of the application. It contains the tabs and the logs."""
 
-    def __init__(self) -> None:
-        """Initializes the main window of the application. It contains the tabs and the logs."""
+    # How often (in milliseconds) queued log output is flushed into the logs widget.
+    LOG_POLL_MS = 100
+    # Maximum number of queued writes inserted into the logs widget per flush.
+    LOG_BATCH_SIZE = 5000
+    # Maximum number of lines kept in the logs widget, older lines are dropped.
+    LOG_MAX_LINES = 5000
+    # How often (in milliseconds) a running task is checked for progress and completion.
+    TASK_POLL_MS = 100
+
+    def __init__(self, profile: Optional[str] = None) -> None:
+        """Initializes the main window of the application. It contains the tabs and the logs.
+
+        Args:
+            profile (Optional[str]): Profile each task, writing the profiles to this file name, or if it is "" to one named after the task, date and time, see `profiling`.
+        """
+        self.profile = profile
         self.root = tk.Tk()
         self.root.title("Spotify to YT Music")
         self.root.geometry("1280x720")
@@ -78,8 +94,10 @@ class Window:
         style.configure("TFrame", background="#26242f")
         style.configure("TNotebook", background="#121212")
 
-        # Redirect stdout to GUI
+        # Redirect stdout to GUI, output is queued and flushed by `pump_logs()`
+        self.log_queue: queue.Queue = queue.Queue()
         sys.stdout.write = self.redirector
+        self.root.after(self.LOG_POLL_MS, self.pump_logs)
 
         self.root.after(1, lambda: self.yt_login(auto=True))
         self.root.after(1, lambda: self.load_write_settings(0))
@@ -120,6 +138,22 @@ class Window:
         self.log_frame = ttk.Frame(self.paned_window)
         self.paned_window.add(self.log_frame, weight=1)
 
+        # Create the progress bar and cancel button for running tasks
+        self.task: Optional[threading.Thread] = None
+        self.cancel_event = threading.Event()
+        self.task_progress: Tuple[int, Optional[int]] = (0, None)
+
+        self.task_frame = ttk.Frame(self.log_frame)
+        self.task_frame.pack(fill=tk.X)
+        self.progress_bar = ttk.Progressbar(self.task_frame, mode="determinate")
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=1, padx=5, pady=5)
+        self.progress_label = create_label(self.task_frame, text="")
+        self.progress_label.pack(side=tk.LEFT, padx=5)
+        self.cancel_button = create_button(
+            self.task_frame, text="Cancel", command=self.cancel_task, state=tk.DISABLED
+        )
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
         # Create the Text widget for the logs
         self.logs = tk.Text(self.log_frame, font=("Helvetica", 14))
         self.logs.pack(fill=tk.BOTH, expand=1)
@@ -164,6 +198,7 @@ class Window:
                     self.var_algo.get(),
                 ),
                 next_tab=self.tab4,
+                cancellable=True,
             ),
         ).pack(anchor=tk.CENTER, expand=True)
 
@@ -192,6 +227,7 @@ class Window:
                 func=backend.copy_all_playlists,
                 args=(0.1, False, "utf-8", self.var_algo.get()),
                 next_tab=self.tab6,
+                cancellable=True,
             ),
         ).pack(anchor=tk.CENTER, expand=True)
 
@@ -224,6 +260,7 @@ class Window:
                     self.var_algo.get(),
                 ),
                 next_tab=self.tab6,
+                cancellable=True,
             ),
         ).pack(anchor=tk.CENTER, expand=True)
 
@@ -261,31 +298,138 @@ class Window:
 
     def redirector(self, input_str="") -> None:
         """
-        Inserts the input string into the logs widget and disables editing.
+        Queues the input string to be inserted into the logs widget.
+
+        This is called from worker threads, so it must not touch Tk directly, the
+        queue is drained from the Tk main loop by `pump_logs()`.
 
         Args:
             self: The instance of the class.
             input_str (str): The string to be inserted into the logs' widget.
         """
-        self.logs.config(state=tk.NORMAL)
-        self.logs.insert(tk.END, input_str)
-        self.logs.config(state=tk.DISABLED)
-        if self.var_scroll.get():
-            self.logs.see(tk.END)
+        self.log_queue.put(input_str)
+
+    def pump_logs(self) -> None:
+        """Moves queued output into the logs widget in one batch, then reschedules itself.
 
-    def call_func(self, func: Callable, args: tuple, next_tab: ttk.Frame) -> None:
+        The logs widget is capped at `LOG_MAX_LINES` lines so that very long copies
+        do not make the GUI progressively slower.
+        """
+        chunks = []
+        try:
+            while len(chunks) < self.LOG_BATCH_SIZE:
+                chunks.append(self.log_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        if chunks:
+            self.logs.config(state=tk.NORMAL)
+            self.logs.insert(tk.END, "".join(chunks))
+            line_count = int(self.logs.index("end-1c").split(".")[0])
+            if line_count > self.LOG_MAX_LINES:
+                self.logs.delete("1.0", f"{line_count - self.LOG_MAX_LINES + 1}.0")
+            self.logs.config(state=tk.DISABLED)
+            if self.var_scroll.get():
+                self.logs.see(tk.END)
+
+        self.root.after(self.LOG_POLL_MS, self.pump_logs)
+
+    def call_func(
+        self,
+        func: Callable,
+        args: tuple,
+        next_tab: ttk.Frame,
+        cancellable: bool = False,
+    ) -> None:
         """Calls the given function in a separate thread and switches to the next tab when the function is done.
 
+        The Tk main loop keeps running while the function works, completion is
+        detected by `poll_task()` which is scheduled with `after()`.
+
         Args:
             func (Callable): The function to be called.
             args (tuple): The arguments to be passed to the function. If no arguments are needed, pass an empty tuple.
             next_tab (ttk.Frame): The tab to switch to when the function is done. If no switch needed, pass the current one.
+            cancellable (bool): The function accepts `progress` and `cancel` keyword arguments, so the progress bar and cancel button are used.
         """
-        th = threading.Thread(target=func, args=args)
-        th.start()
-        while th.is_alive():
-            self.root.update()
-        self.tabControl.select(next_tab)
+        if self.task is not None and self.task.is_alive():
+            print("Another task is still running, wait for it to finish or cancel it.")
+            return
+
+        kwargs = {}
+        self.cancel_event = threading.Event()
+        self.task_progress = (0, None)
+        if cancellable:
+            kwargs = {"progress": self.report_progress, "cancel": self.cancel_event}
+            self.cancel_button.config(state=tk.NORMAL)
+
+        self.progress_bar.config(mode="indeterminate")
+        self.progress_bar.start()
+        self.progress_label.config(text="")
+
+        self.task = threading.Thread(
+            target=self.run_task, args=(func, args, kwargs), daemon=True
+        )
+        self.task.start()
+        self.root.after(self.TASK_POLL_MS, lambda: self.poll_task(next_tab))
+
+    def run_task(self, func: Callable, args: tuple, kwargs: dict) -> None:
+        """Runs in the task thread, reporting errors instead of silently dying.
+
+        Args:
+            func (Callable): The function to be called.
+            args (tuple): The positional arguments to be passed to the function.
+            kwargs (dict): The keyword arguments to be passed to the function.
+        """
+        try:
+            if self.profile is None:
+                func(*args, **kwargs)
+            else:
+                with profiling.recording(
+                    getattr(func, "__name__", "task"), self.profile
+                ):
+                    func(*args, **kwargs)
+        except SystemExit:
+            print("Task stopped, see the errors above.")
+        except Exception as e:
+            print(f"ERROR: {e}")
+
+    def report_progress(self, done: int, total: Optional[int]) -> None:
+        """Progress callback, called from the task thread.
+
+        Only records the values, the progress bar is updated by `poll_task()` in the Tk thread.
+        """
+        self.task_progress = (done, total)
+
+    def cancel_task(self) -> None:
+        """Asks the running task to stop after the track it is working on."""
+        print("Cancelling, waiting for the current track to finish...")
+        self.cancel_event.set()
+        self.cancel_button.config(state=tk.DISABLED)
+
+    def poll_task(self, next_tab: ttk.Frame) -> None:
+        """Updates the progress bar and checks whether the running task is done.
+
+        Args:
+            next_tab (ttk.Frame): The tab to switch to when the task is done.
+        """
+        done, total = self.task_progress
+        if total:
+            if str(self.progress_bar.cget("mode")) != "determinate":
+                self.progress_bar.stop()
+                self.progress_bar.config(mode="determinate")
+            self.progress_bar.config(maximum=total, value=done)
+            self.progress_label.config(text=f"{done}/{total}")
+
+        if self.task is not None and self.task.is_alive():
+            self.root.after(self.TASK_POLL_MS, lambda: self.poll_task(next_tab))
+            return
+
+        self.progress_bar.stop()
+        self.progress_bar.config(mode="determinate", value=0)
+        self.cancel_button.config(state=tk.DISABLED)
+        if not self.cancel_event.is_set():
+            self.tabControl.select(next_tab)
         print()
 
     def yt_login(self, auto=False) -> None:
@@ -369,7 +513,10 @@ class Window:
 
 
 def main() -> None:
-    ui = Window()
+    profile = profiling.option_from_argv(sys.argv)
+    if profile is None:
+        profile = profiling.option_from_env()
+    ui = Window(profile)
     ui.root.mainloop()
 
 
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+#  Environment variables that turn on the cache for the YTMusic client, see
+#  `backend._ytmusic_session()`.
+MODE_ENV = "S2YT_HTTP_CACHE_MODE"
+FILE_ENV = "S2YT_HTTP_CACHE"
+DEFAULT_CACHE_FILE = "http_cache.sqlite"
+
+#  "off": no cache, "record": always use the network and store the responses,
+#  "replay": only use stored responses, never the network, "prefer": use stored
+#  responses when there are any, otherwise the network (storing the response).
+MODES = ("off", "record", "replay", "prefer")
+
+#  YTMusic API endpoints (after "/youtubei/v1/") of the track lookups, only these
+#  are stored and replayed.  Anything else always goes to the network, and fails in
+#  "replay" mode: the writes, like adding to a playlist, and the reads of the user's
+#  playlists, liked songs and library, which change and are compared against to
+#  decide what to write.
+LOOKUP_ENDPOINTS = ("search", "music/get_search_suggestions")
+#  The "browse" endpoint is only a lookup for the browseIds of albums and artists
+LOOKUP_BROWSE_PREFIXES = ("MPREb_", "UC")
+
+
+def mode_from_env() -> str:
+    """Return the cache mode set in the environment, "off" if not set."""
+    mode = os.environ.get(MODE_ENV, "off").strip().lower() or "off"
+    if mode not in MODES:
+        raise ValueError(f"{MODE_ENV} must be one of {', '.join(MODES)}, not {mode!r}")
+    return mode
+
+
+def request_key(request: requests.PreparedRequest) -> Optional[str]:
+    """Return the key a request is stored under, or None if it is not cacheable.
+
+    Only the track lookups are cacheable, see `LOOKUP_ENDPOINTS`.  The key is the
+    method, the URL without the API key (but with the other query parameters, which
+    include the continuation token when reading more pages) and the JSON body
+    without its "context" (which holds client versions and other details that
+    change between runs).
+    """
+    parts = urlsplit(request.url)
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+
+    if "/youtubei/v1/" in parts.path:
+        endpoint = parts.path.split("/youtubei/v1/", 1)[1]
+        if endpoint == "browse":
+            browse_id = data.get("browseId") if isinstance(data, dict) else None
+            if not str(browse_id or "").startswith(LOOKUP_BROWSE_PREFIXES):
+                return None
+        elif endpoint not in LOOKUP_ENDPOINTS:
+            return None
+    elif request.method != "GET":
+        return None
+
+    if isinstance(data, dict):
+        data.pop("context", None)
+        body = json.dumps(data, sort_keys=True).encode("utf-8")
+
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if k != "key"))
+
+    digest = hashlib.sha256()
+    for part in (request.method, parts.netloc, parts.path, query):
+        digest.update(part.encode("utf-8") + b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class ResponseStore:
+    """Recorded HTTP responses, zlib compressed in an SQLite database."""
+
+    def __init__(self, filename: str = DEFAULT_CACHE_FILE) -> None:
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(filename, check_same_thread=False)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, url TEXT, status INTEGER, reason TEXT,"
+                " headers TEXT, body BLOB, created REAL)"
+            )
+
+    def get(self, key: str) -> Optional[Tuple[int, str, dict, bytes]]:
+        """Return the (status, reason, headers, body) stored for `key`, or None."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT status, reason, headers, body FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        status, reason, headers, body = row
+        return status, reason, json.loads(headers), zlib.decompress(body)
+
+    def put(self, key: str, url: str, response: requests.Response) -> None:
+        """Store a response under `key`."""
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            #  The stored body is already decoded
+            if name.lower() not in ("content-encoding", "content-length", "set-cookie")
+        }
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    url.split("?", 1)[0],
+                    response.status_code,
+                    response.reason,
+                    json.dumps(headers),
+                    zlib.compress(response.content),
+                    time.time(),
+                ),
+            )
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
+
+
+class CachingAdapter(HTTPAdapter):
+    """A transport adapter that records and replays responses, see `MODES`."""
+
+    def __init__(self, store: ResponseStore, mode: str = "prefer", **kwargs) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown HTTP cache mode {mode!r}")
+        super().__init__(**kwargs)
+        self.store = store
+        self.mode = mode
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        key = request_key(request) if self.mode != "off" else None
+
+        if key is not None and self.mode in ("replay", "prefer"):
+            stored = self.store.get(key)
+            if stored is not None:
+                return self._replayed_response(request, *stored)
+        if self.mode == "replay":
+            raise requests.exceptions.ConnectionError(
+                f"No recorded response for {request.method} {request.url.split('?', 1)[0]}"
+                " (HTTP cache is in replay mode)",
+                request=request,
+            )
+
+        response = super().send(request, **kwargs)
+        if key is not None and 200 <= response.status_code < 300:
+            self.store.put(key, request.url, response)
+        return response
+
+    @staticmethod
+    def _replayed_response(
+        request: requests.PreparedRequest,
+        status: int,
+        reason: str,
+        headers: dict,
+        body: bytes,
+    ) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
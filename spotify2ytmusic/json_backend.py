@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+import codecs
+import contextlib
+import gc
+import io
+import json
+import mmap
+import os
+import threading
+from typing import Any, IO, Union
+
+#  Environment variable to choose the JSON engine: "auto" (the default) uses orjson
+#  if it is installed, "orjson" or "stdlib" force one.
+ENGINE_ENV = "S2YT_JSON_ENGINE"
+ENGINES = ("auto", "orjson", "stdlib")
+
+_NOT_IMPORTED = object()
+_orjson: Any = _NOT_IMPORTED
+
+
+def _import_orjson():
+    """Return the orjson module, None if it is not installed.
+
+    It is only imported when JSON is first read or written, so commands that don't
+    do either start faster.
+    """
+    global _orjson
+    if _orjson is _NOT_IMPORTED:
+        try:
+            import orjson
+        except ImportError:
+            orjson = None
+        _orjson = orjson
+    return _orjson
+
+
+def engine() -> str:
+    """Return the JSON engine in use, "orjson" or "stdlib"."""
+    choice = os.environ.get(ENGINE_ENV, "auto").strip().lower() or "auto"
+    if choice not in ENGINES:
+        raise ValueError(
+            f"{ENGINE_ENV} must be one of {', '.join(ENGINES)}, not {choice!r}"
+        )
+    if choice == "stdlib":
+        return "stdlib"
+    if _import_orjson() is None:
+        if choice == "orjson":
+            raise ImportError(f"{ENGINE_ENV}=orjson but orjson is not installed")
+        return "stdlib"
+    return "orjson"
+
+
+def is_utf8(encoding: str) -> bool:
+    """Can text in `encoding` be read as UTF-8 bytes, is it UTF-8 or ASCII?"""
+    try:
+        return codecs.lookup(encoding).name in ("utf-8", "ascii")
+    except LookupError:
+        return False
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    """Pause the cyclic garbage collector while parsing.
+
+    Parsing a backup creates millions of dicts and lists, which would otherwise
+    trigger many collections that walk everything created so far, for more time
+    than the parsing itself.  Parsed JSON can't contain reference cycles.
+
+    The collector is shared by the whole process, so it is only paused when no
+    other thread is running, such as the GUI's or those of concurrent lookups.
+    """
+    enabled = gc.isenabled() and threading.active_count() == 1
+    if enabled:
+        gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON from UTF-8 bytes or a str."""
+    with _gc_paused():
+        if engine() == "orjson":
+            return _import_orjson().loads(data)
+        return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode `obj` as UTF-8 JSON.
+
+    orjson writes compact JSON with the non-ASCII characters as they are, the
+    standard library writes the same JSON as `json.dump()` always has, with them
+    escaped, so the file can be read with any ASCII compatible encoding.
+    """
+    if engine() == "orjson":
+        return _import_orjson().dumps(obj)
+    return json.dumps(obj).encode("ascii")
+
+
+def load(f: IO[bytes], encoding: str = "utf-8") -> Any:
+    """Load JSON from the binary file `f`, for example one from `open_backup()`.
+
+    With orjson, a plain UTF-8 file on disk is parsed straight from a memory map of
+    it, so it is never copied into a Python bytes or str object.
+    """
+    with _gc_paused():
+        return _load(f, encoding)
+
+
+def _load(f: IO[bytes], encoding: str) -> Any:
+    if not is_utf8(encoding):
+        text = io.TextIOWrapper(f, encoding=encoding)
+        try:
+            return json.load(text)
+        finally:
+            text.detach()
+    if engine() != "orjson":
+        return json.loads(f.read())
+    orjson = _import_orjson()
+
+    if not isinstance(f, io.BufferedReader):
+        #  A decompressing reader
+        return orjson.loads(f.read())
+    if os.fstat(f.fileno()).st_size == 0:
+        #  mmap can't map an empty file, let the parser report the error
+        return orjson.loads(b"")
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        view = memoryview(buf)
+        try:
+            return orjson.loads(view)
+        finally:
+            view.release()
+
+
+def dump_file(obj: Any, f: IO[bytes]) -> None:
+    """Write `obj` as JSON to the binary file `f`."""
+    f.write(dumps(obj))
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional
+
+from .normalize import fold, same
+
+DEFAULT_MAPPING_FILE = "track_mappings.json"
+MAPPING_VERSION = 1
+
+#  Where a mapping came from: found by a search on this machine, or written by hand
+SOURCE_LOOKUP = "lookup"
+SOURCE_MANUAL = "manual"
+
+
+def match_confidence(
+    title: str, artist: str, album: Optional[str], dst_track: Dict
+) -> float:
+    """How sure we are that the YTMusic `dst_track` is the Spotify track, 0.4 to 1.
+
+    The title counts for most, then the artist, then the album, each compared once
+    normalized (see `normalize.match_key()`).
+    """
+    confidence = 0.4
+    if same(title, dst_track.get("title")):
+        confidence += 0.3
+    if any(same(artist, a.get("name")) for a in dst_track.get("artists") or []):
+        confidence += 0.2
+    yt_album = dst_track.get("album")
+    if isinstance(yt_album, dict):
+        yt_album = yt_album.get("name")
+    if album and same(album, yt_album):
+        confidence += 0.1
+    return round(confidence, 2)
+
+
+class MappingDB:
+    """Known Spotify track to YTMusic videoId mappings, checked before searching.
+
+    Each mapping is found by the Spotify track URI, the ISRC, or the folded title,
+    artist and album, whichever are known.  The names only tell tracks apart when
+    one of them has no URI or ISRC, two releases with the same names (the clean and
+    explicit versions, a single and its album) keep their own mappings.  Along with
+    the videoId a mapping records its provenance (`source`: "lookup" or "manual",
+    the search algorithm, when it was made, and the file it was imported from) and
+    a `confidence` (see `match_confidence()`).  Mappings can be exported and
+    imported into the database of another machine, where they resolve tracks
+    without any searches.
+    """
+
+    def __init__(
+        self, filename: str = DEFAULT_MAPPING_FILE, remap: bool = False
+    ) -> None:
+        """
+        Args:
+            `filename` (str): The file the mappings are stored in.
+            `remap` (bool): Find no tracks, so they are all searched for again, and
+                let what the searches find replace the mappings, for example to
+                correct wrong matches or to use another search algorithm.
+        """
+        self.filename = filename
+        self.remap = remap
+        #  The mappings by their first key, and every key to that first key
+        self.records: Dict[str, Dict] = {}
+        self.index: Dict[str, str] = {}
+        self.dirty = False
+
+        if os.path.exists(filename):
+            try:
+                records = self.read(filename)
+            except ValueError as e:
+                print(f"WARNING: Ignoring unreadable track mappings '{filename}': {e}")
+                records = []
+            for record in records:
+                self.add(record)
+            self.dirty = False
+
+    @staticmethod
+    def read(filename: str) -> List[Dict]:
+        """Read the mappings in a mapping file."""
+        with open(filename, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get("version") != MAPPING_VERSION:
+            raise ValueError(f"not a version {MAPPING_VERSION} mapping file")
+        return [r for r in data.get("mappings") or [] if r.get("videoId")]
+
+    @staticmethod
+    def keys(
+        title: Optional[str],
+        artist: Optional[str],
+        album: Optional[str],
+        uri: Optional[str] = None,
+        isrc: Optional[str] = None,
+    ) -> List[str]:
+        """The keys a track is found by, most specific first.
+
+        The name key is only folded (see `normalize.fold()`), not reduced to its
+        match key, so "Song (Live)" and "Song - 2011 Remaster" are not found by the
+        mapping of "Song".
+        """
+        keys = []
+        if uri:
+            keys.append(f"uri:{uri}")
+        if isrc:
+            keys.append(f"isrc:{isrc.upper()}")
+        if title:
+            keys.append(
+                "name:" + "\t".join(fold(x) for x in (title, artist, album or ""))
+            )
+        return keys
+
+    @staticmethod
+    def _identified(record: Dict) -> bool:
+        """Does the mapping know the Spotify URI or ISRC of its track?"""
+        return bool(record.get("uri") or record.get("isrc"))
+
+    def _lookup(self, key: str, identified: bool) -> Optional[str]:
+        """Return the first key of the mapping found by `key`, or None.
+
+        When the track looked for and the mapping both have a URI or ISRC, they
+        are only the same track if those match, not by the name key.
+        """
+        primary = self.index.get(key)
+        if (
+            primary is not None
+            and identified
+            and key.startswith("name:")
+            and self._identified(self.records[primary])
+        ):
+            return None
+        return primary
+
+    def _record_keys(self, record: Dict) -> List[str]:
+        return self.keys(
+            record.get("title"),
+            record.get("artist"),
+            record.get("album"),
+            record.get("uri"),
+            record.get("isrc"),
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.records.values())
+
+    def find(
+        self,
+        title: str,
+        artist: str,
+        album: Optional[str],
+        uri: Optional[str] = None,
+        isrc: Optional[str] = None,
+    ) -> Optional[Dict]:
+        """Return the mapping for a Spotify track, None if there is none (or `remap`
+        is set)."""
+        if self.remap:
+            return None
+        for key in self.keys(title, artist, album, uri, isrc):
+            primary = self._lookup(key, bool(uri or isrc))
+            if primary is not None:
+                return self.records[primary]
+        return None
+
+    def add(self, record: Dict, replace: bool = False) -> bool:
+        """Add a mapping, replacing those with any of the same keys unless one of
+        them has a higher confidence (or whatever their confidence, with `replace`).
+
+        Returns:
+            Whether the mapping was added.
+        """
+        identified = self._identified(record)
+        existing = {
+            self._lookup(key, identified) for key in self._record_keys(record)
+        } - {None}
+        old_records = [self.records[primary] for primary in existing]
+        confidence = record.get("confidence", 0)
+        if not replace and any(
+            old.get("confidence", 0) > confidence for old in old_records
+        ):
+            return False
+
+        record = dict(record)
+        for old in old_records:
+            #  Keep the identifiers a lookup by name does not know
+            if old["videoId"] == record["videoId"]:
+                for field in ("uri", "isrc"):
+                    if not record.get(field) and old.get(field):
+                        record[field] = old[field]
+        for primary in existing:
+            for key in self._record_keys(self.records.pop(primary)):
+                if self.index.get(key) == primary:
+                    del self.index[key]
+
+        keys = self._record_keys(record)
+        if not keys:
+            return False
+        self.records[keys[0]] = record
+        for key in keys:
+            self.index[key] = keys[0]
+        self.dirty = True
+        return True
+
+    def add_lookup(
+        self,
+        title: str,
+        artist: str,
+        album: Optional[str],
+        dst_track: Dict,
+        algo: int,
+        uri: Optional[str] = None,
+        isrc: Optional[str] = None,
+    ) -> None:
+        """Record the YTMusic track that a search found for a Spotify track.
+
+        With `remap`, it replaces the mapping of the track whatever its confidence.
+        """
+        yt_album = dst_track.get("album")
+        self.add(
+            {
+                "title": title,
+                "artist": artist,
+                "album": album,
+                "uri": uri,
+                "isrc": isrc,
+                "videoId": dst_track["videoId"],
+                "match": {
+                    "title": dst_track.get("title"),
+                    "artists": [a["name"] for a in dst_track.get("artists") or []],
+                    "album": (
+                        yt_album.get("name") if isinstance(yt_album, dict) else yt_album
+                    ),
+                },
+                "confidence": match_confidence(title, artist, album, dst_track),
+                "source": SOURCE_LOOKUP,
+                "algo": algo,
+                "created": int(time.time()),
+            },
+            replace=self.remap,
+        )
+
+    @staticmethod
+    def as_track(record: Dict) -> Dict:
+        """Return a mapping as a YTMusic track, like the ones `lookup_song()` returns."""
+        match = record.get("match") or {}
+        return {
+            "videoId": record["videoId"],
+            "title": match.get("title") or record.get("title"),
+            "artists": [{"name": name} for name in match.get("artists") or []],
+            "album": {"name": match.get("album")},
+        }
+
+    def write(self, filename: str, min_confidence: float = 0.0) -> int:
+        """Write the mappings with at least `min_confidence` to `filename`.
+
+        Returns:
+            The number of mappings written.
+        """
+        records = [
+            record
+            for record in self.records.values()
+            if record.get("confidence", 0) >= min_confidence
+        ]
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": MAPPING_VERSION, "mappings": records},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_filename, filename)
+        return len(records)
+
+    def save(self) -> None:
+        """Write the database back to disk, if it changed."""
+        if not self.dirty:
+            return
+        self.write(self.filename)
+        self.dirty = False
+
+    def import_file(self, filename: str, min_confidence: float = 0.0) -> int:
+        """Add the mappings exported to `filename` (by `write()`) to the database.
+
+        Mappings below `min_confidence`, and those that a mapping already in the
+        database is more confident about, are skipped.
+
+        Returns:
+            The number of mappings added.
+        """
+        added = 0
+        for record in self.read(filename):
+            if record.get("confidence", 0) < min_confidence:
+                continue
+            record.setdefault("imported_from", os.path.basename(filename))
+            if self.add(record):
+                added += 1
+        return added
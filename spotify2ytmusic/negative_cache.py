@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import time
+from typing import Dict, Optional
+
+from .normalize import fold
+
+DEFAULT_MISS_CACHE_FILE = "lookup_misses.json"
+DEFAULT_MISS_TTL_DAYS = 30.0
+
+
+class NegativeCache:
+    """Tracks that could not be found on YTMusic on a previous run.
+
+    Lookups that fail are recorded by a normalized key of the track and the search
+    algorithm used, so that known-unfindable tracks can be skipped without spending
+    any API calls until the entry is older than the TTL.
+    """
+
+    def __init__(
+        self,
+        filename: str = DEFAULT_MISS_CACHE_FILE,
+        ttl_days: float = DEFAULT_MISS_TTL_DAYS,
+    ) -> None:
+        """
+        Args:
+            `filename` (str): The file the misses are stored in.
+            `ttl_days` (float): How long a miss is remembered for, 0 disables the cache.
+        """
+        self.filename = filename
+        self.ttl = ttl_days * 86400
+        self.entries: Dict[str, float] = {}
+        self.dirty = False
+
+        if self.ttl > 0 and os.path.exists(filename):
+            with open(filename, "r", encoding="utf-8") as f:
+                try:
+                    entries = json.load(f)
+                except json.decoder.JSONDecodeError as e:
+                    print(f"WARNING: Ignoring unreadable miss cache '{filename}': {e}")
+                    entries = {}
+            now = time.time()
+            self.entries = {
+                key: when for key, when in entries.items() if now - when < self.ttl
+            }
+            self.dirty = len(self.entries) != len(entries)
+
+    @staticmethod
+    def make_key(title: str, artist: str, album: Optional[str], algo: int) -> str:
+        """Return the cache key for a track looked up with search algorithm `algo`."""
+        parts = [fold(x) for x in (title, artist, album)]
+        return "\t".join([str(algo)] + parts)
+
+    def is_miss(self, title: str, artist: str, album: Optional[str], algo: int) -> bool:
+        """Was this track not found on a run within the TTL?"""
+        when = self.entries.get(self.make_key(title, artist, album, algo))
+        return when is not None and time.time() - when < self.ttl
+
+    def add(self, title: str, artist: str, album: Optional[str], algo: int) -> None:
+        """Record that the track could not be found."""
+        if self.ttl <= 0:
+            return
+        self.entries[self.make_key(title, artist, album, algo)] = time.time()
+        self.dirty = True
+
+    def discard(self, title: str, artist: str, album: Optional[str], algo: int) -> None:
+        """Forget a recorded miss, for example when a retry found the track."""
+        key = self.make_key(title, artist, album, algo)
+        if key in self.entries:
+            del self.entries[key]
+            self.dirty = True
+
+    def save(self) -> None:
+        """Write the cache back to disk, if it changed."""
+        if not self.dirty:
+            return
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_filename, self.filename)
+        self.dirty = False
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+import functools
+import re
+import unicodedata
+from typing import Optional
+
+#  Size of the memo of each normalizing function, enough for the names of a large
+#  library so each title, artist and album is only normalized once per run.
+CACHE_SIZE = 1 << 16
+
+#  Parts of a name that don't make it another recording: "Remastered 2011", "2011
+#  Remaster", "Bonus Track", "Deluxe Edition".  Others, like "Live", "Acoustic",
+#  "Demo", "Radio Edit" or "Remix", are kept so those versions don't match.
+_NEUTRAL = (
+    r"(?:\d{4}\s+)?(?:digital(?:ly)?\s+)?remaster(?:ed)?(?:\s+\d{4})?(?:\s+version)?"
+    r"|bonus\s+track|(?:deluxe|expanded)(?:\s+edition)?"
+)
+#  "(Remastered 2011)", "[feat. X]", "(with X)"
+_BRACKETS_RE = re.compile(
+    rf"\s*[\(\[\{{]\s*(?:{_NEUTRAL}|(?:feat\.?|ft\.?|featuring|with)\s[^\)\]\}}]*)"
+    r"\s*[\)\]\}]"
+)
+#  " - Remastered 2011", " - 2011 Remaster"
+_SUFFIX_RE = re.compile(rf"\s+-\s+(?:{_NEUTRAL})\s*$")
+#  " feat. X", " ft X", " featuring X" outside of brackets
+_FEATURE_RE = re.compile(r"\s+(?:feat\.?|ft\.?|featuring)\s+.*$")
+_APOSTROPHE_RE = re.compile(r"['\u2019`]")
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def fold(text: Optional[str]) -> str:
+    """Fold Unicode forms, case and whitespace, so equal names compare equal.
+
+    Nothing is removed from the name, this is used for keys that must still tell
+    "Song" and "Song (Live)" apart, like the miss cache.
+    """
+    text = unicodedata.normalize("NFKC", str(text or "")).casefold()
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def match_key(text: Optional[str]) -> str:
+    """Return the canonical form of a title, artist or album name, for matching.
+
+    On top of `fold()`, remasters ("(Remastered 2011)", " - 2011 Remaster"), other
+    parts that name the same recording (see `_NEUTRAL`), featured artists and
+    punctuation are removed, and "&" is treated as "and".  Versions like "(Live)" or
+    " - Radio Edit" are kept.  If that would leave nothing, the folded name is used.
+    """
+    folded = fold(text)
+    key = _BRACKETS_RE.sub("", folded)
+    key = _SUFFIX_RE.sub("", key)
+    key = _FEATURE_RE.sub("", key)
+    key = _APOSTROPHE_RE.sub("", key.replace("&", " and "))
+    key = _WHITESPACE_RE.sub(" ", _PUNCTUATION_RE.sub(" ", key).replace("_", " "))
+    return key.strip() or folded
+
+
+def same(a: Optional[str], b: Optional[str]) -> bool:
+    """Are the two names the same, once normalized with `match_key()`?"""
+    return match_key(a) == match_key(b)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import sys
+from typing import Optional, Iterator, Dict, List, TYPE_CHECKING
+
+from . import backend, retry
+from .backend import PLAYLIST_BATCH_SIZE, SongInfo
+from .mapping import MappingDB
+from .negative_cache import NegativeCache
+from .strategy import LookupStrategy
+
+if TYPE_CHECKING:
+    from ytmusicapi import YTMusic
+
+
+PLAN_VERSION = 1
+DEFAULT_PLAN_FILE = "plan.json"
+
+
+def make_plan(
+    src_tracks: Iterator[SongInfo],
+    plan_file: str = DEFAULT_PLAN_FILE,
+    dst_pl_id: Optional[str] = None,
+    yt_search_algo: int = 0,
+    track_sleep: float = 0.1,
+    *,
+    source: Optional[str] = None,
+    yt: Optional[YTMusic] = None,
+    misses: Optional[NegativeCache] = None,
+    retry_misses: bool = False,
+    speculative: bool = False,
+    strategy: Optional[LookupStrategy] = None,
+    mappings: Optional[MappingDB] = None,
+) -> Dict:
+    """Look up every Spotify track on YTMusic and write the results to a plan file.
+
+    Nothing is written to YTMusic, the plan can be reviewed (or edited) and then
+    written with `apply_plan()`.
+
+    Args:
+        `src_tracks` (Iterator[SongInfo]): The Spotify tracks to look up.
+        `plan_file` (str): The file to write the plan to.
+        `dst_pl_id` (Optional[str]): The YTMusic playlist ID (or "+name") the plan is for, None to like the songs.
+        `yt_search_algo` (int): The search algorithm, see `backend.lookup_song()`.
+        `track_sleep` (float): Time to sleep between each track that is looked up.
+        `source` (Optional[str]): Description of where the tracks came from, for the plan file.
+
+    Returns:
+        Dict: The plan that was written.
+    """
+    if yt is None:
+        yt = backend.get_ytmusic()
+    if misses is None:
+        misses = NegativeCache()
+    if strategy is None:
+        strategy = LookupStrategy()
+    if mappings is None:
+        mappings = MappingDB()
+
+    tracks: List[Dict] = []
+    for src_track, resolution in backend.resolve_tracks(
+        src_tracks,
+        yt,
+        yt_search_algo,
+        misses,
+        retry_misses,
+        track_sleep,
+        speculative,
+        strategy,
+        mappings=mappings,
+    ):
+        entry = {
+            "title": src_track.title,
+            "artist": src_track.artist,
+            "album": src_track.album,
+            "status": resolution.status,
+        }
+        if src_track.uri:
+            entry["uri"] = src_track.uri
+        if resolution.track is not None:
+            dst_track = resolution.track
+            album = dst_track.get("album")
+            entry["videoId"] = dst_track["videoId"]
+            entry["match"] = {
+                "title": dst_track.get("title"),
+                "artists": [a["name"] for a in dst_track.get("artists") or []],
+                "album": album.get("name") if isinstance(album, dict) else album,
+                "resultType": dst_track.get("resultType"),
+            }
+        else:
+            entry["error"] = resolution.error
+        tracks.append(entry)
+
+    misses.save()
+    mappings.save()
+
+    plan = {
+        "version": PLAN_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "source": source,
+        "destination": dst_pl_id,
+        "algo": yt_search_algo,
+        "tracks": tracks,
+    }
+    tmp_file = plan_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(plan, f, indent=1, ensure_ascii=False)
+    os.replace(tmp_file, plan_file)
+
+    found = sum(1 for t in tracks if "videoId" in t)
+    print()
+    print(f"Found {found} of {len(tracks)} tracks, plan written to {plan_file}")
+    if strategy.lookups:
+        print("Lookup statistics:")
+        print("\n".join(strategy.report()))
+
+    return plan
+
+
+def load_plan(plan_file: str = DEFAULT_PLAN_FILE) -> Dict:
+    """Load a plan written by `make_plan()`."""
+    with open(plan_file, "r", encoding="utf-8") as f:
+        plan = json.load(f)
+    if plan.get("version") != PLAN_VERSION:
+        print(
+            f"ERROR: Plan file {plan_file} has version {plan.get('version')}, expected {PLAN_VERSION}"
+        )
+        sys.exit(1)
+    return plan
+
+
+def apply_plan(
+    plan_file: str = DEFAULT_PLAN_FILE,
+    dst_pl_id: Optional[str] = None,
+    dry_run: bool = False,
+    privacy_status: str = "PRIVATE",
+    *,
+    yt: Optional[YTMusic] = None,
+) -> int:
+    """Write the tracks found by `make_plan()` to YTMusic.
+
+    No searching is done, the videoIds are added to the playlist in batches of
+    `PLAYLIST_BATCH_SIZE`, or liked if the plan has no destination playlist (skipping
+    those that are already liked).
+
+    Args:
+        `plan_file` (str): The plan file to apply.
+        `dst_pl_id` (Optional[str]): YTMusic playlist ID (or "+name") to use instead of the one in the plan.
+        `dry_run` (bool): Only show what would be done.
+        `privacy_status` (str: PRIVATE, PUBLIC, UNLISTED): Privacy of a playlist created for a "+name" destination.
+
+    Returns:
+        int: The number of likes or batches of tracks that could not be written.
+    """
+    plan = load_plan(plan_file)
+    if dst_pl_id is None:
+        dst_pl_id = plan.get("destination")
+
+    video_ids = list(
+        dict.fromkeys(t["videoId"] for t in plan["tracks"] if t.get("videoId"))
+    )
+    print(
+        f"Plan has {len(video_ids)} tracks to add ({len(plan['tracks']) - len(video_ids)} not found)"
+    )
+
+    if yt is None:
+        yt = backend.get_ytmusic()
+
+    if dst_pl_id is not None and dst_pl_id.startswith("+"):
+        pl_name = dst_pl_id[1:]
+        dst_pl_id = backend.get_playlist_id_by_name(yt, pl_name)
+        print(f"Looking up playlist '{pl_name}': id={dst_pl_id}")
+        if dst_pl_id is None:
+            if dry_run:
+                print(
+                    f"Would create playlist '{pl_name}' and add {len(video_ids)} tracks"
+                )
+                return 0
+            dst_pl_id = backend._ytmusic_create_playlist(
+                yt, title=pl_name, description=pl_name, privacy_status=privacy_status
+            )
+            print(f"NOTE: Created playlist '{pl_name}' with ID: {dst_pl_id}")
+
+    failed = 0
+    if dst_pl_id is None:
+        liked_video_ids = backend.get_liked_video_ids(yt)
+        already_liked = [v for v in video_ids if v in liked_video_ids]
+        video_ids = [v for v in video_ids if v not in liked_video_ids]
+        print(f"Liking {len(video_ids)} tracks ({len(already_liked)} already liked)")
+        for video_id in video_ids:
+            if dry_run:
+                continue
+            liked = retry.call(
+                f"rate_song: {video_id}", lambda: yt.rate_song(video_id, "LIKE")
+            )
+            if liked is None:
+                failed += 1
+        writes = f"{failed} of {len(video_ids)} likes"
+    else:
+        batches = 0
+        for start in range(0, len(video_ids), PLAYLIST_BATCH_SIZE):
+            batch = video_ids[start : start + PLAYLIST_BATCH_SIZE]
+            batches += 1
+            print(f"Adding tracks {start + 1}-{start + len(batch)} to {dst_pl_id}")
+            if dry_run:
+                continue
+            added = retry.call(
+                f"add_playlist_items: {dst_pl_id}",
+                lambda: yt.add_playlist_items(
+                    playlistId=dst_pl_id, videoIds=batch, duplicates=False
+                ),
+                succeeded=retry.playlist_write_succeeded,
+            )
+            if added is None:
+                failed += 1
+        writes = f"{failed} of {batches} batches of tracks"
+
+    if dry_run:
+        print("Dry run, nothing was written.")
+    elif failed:
+        print(f"ERROR: {writes} failed, apply the plan again to retry them.")
+    else:
+        print("Plan applied!")
+    return failed
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import io
+import os
+import sys
+import threading
+import time
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    #  Only imported once a profile is recorded, every command imports this module
+    import cProfile
+    import pstats
+
+#  Environment variable that turns on profiling: "1" to write the profile to the
+#  default file names, or the file name to use (without the extension).
+PROFILE_ENV = "S2YT_PROFILE"
+#  Command line option that turns on profiling, "--profile" or "--profile=NAME".
+PROFILE_OPTION = "--profile"
+
+#  The stages the time of a run is broken down into.  Time outside of all of them
+#  (starting up, listing the YTMusic library, printing...) is reported as "other".
+STAGES = ("backup load", "spotify iteration", "lookup", "write", "sleep")
+OTHER = "other"
+
+#  Number of functions listed for each stage in the report.
+TOP_FUNCTIONS = 15
+
+T = TypeVar("T")
+
+
+class Profile:
+    """The profile of one run, broken down by stage.
+
+    Each stage has its own `cProfile.Profile`, and only the profiler of the
+    innermost stage is enabled, so the time of a "backup load" inside a "spotify
+    iteration" counts towards the backup load only.  The functions are profiled in
+    the thread that started the profile, other threads (like the speculative
+    lookups) are seen as time spent waiting for them.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.thread_id = threading.get_ident()
+        self.profilers: Dict[str, cProfile.Profile] = {}
+        self.seconds: Dict[str, float] = {stage: 0.0 for stage in STAGES + (OTHER,)}
+        self.calls: Dict[str, int] = {stage: 0 for stage in STAGES + (OTHER,)}
+        #  [stage, time it was last entered or resumed]
+        self.stack: List[list] = []
+        self.start_time = 0.0
+        self.wall_time = 0.0
+
+    def _profiler(self, stage: str) -> cProfile.Profile:
+        if stage not in self.profilers:
+            import cProfile
+
+            self.profilers[stage] = cProfile.Profile()
+        return self.profilers[stage]
+
+    def _pause(self, now: float) -> None:
+        """Stop timing the innermost stage."""
+        stage, since = self.stack[-1]
+        self._profiler(stage).disable()
+        self.seconds[stage] += now - since
+
+    def _resume(self, now: float) -> None:
+        """Start timing the innermost stage again."""
+        self.stack[-1][1] = now
+        self._profiler(self.stack[-1][0]).enable()
+
+    def start(self) -> None:
+        self.start_time = time.perf_counter()
+        self.stack = [[OTHER, self.start_time]]
+        self.calls[OTHER] = 1
+        self._profiler(OTHER).enable()
+
+    def stop(self) -> None:
+        now = time.perf_counter()
+        while self.stack:
+            self._pause(now)
+            self.stack.pop()
+        self.wall_time = now - self.start_time
+
+    def enter(self, stage: str) -> None:
+        if stage not in self.seconds:
+            raise ValueError(f"Unknown profiling stage {stage!r}")
+        now = time.perf_counter()
+        if stage != self.stack[-1][0]:
+            self.calls[stage] += 1
+        self._pause(now)
+        self.stack.append([stage, now])
+        self._resume(now)
+
+    def exit(self) -> None:
+        now = time.perf_counter()
+        self._pause(now)
+        self.stack.pop()
+        self._resume(now)
+
+    def stats(self, stage: Optional[str] = None) -> Optional[pstats.Stats]:
+        """The function statistics of `stage`, or of the whole run if None."""
+        profilers = [
+            profiler
+            for name, profiler in self.profilers.items()
+            if stage is None or name == stage
+        ]
+        import pstats
+
+        stats = None
+        for profiler in profilers:
+            profiler.create_stats()
+            if not profiler.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profiler, stream=io.StringIO())
+            else:
+                stats.add(profiler)
+        return stats
+
+    def summary(self) -> List[str]:
+        """The time of each stage, as lines of text."""
+        lines = [
+            f"Profile of {self.name}: {self.wall_time:.2f} seconds",
+            f"  {'stage':<20} {'seconds':>10} {'%':>6} {'calls':>8}",
+        ]
+        for stage in STAGES + (OTHER,):
+            percent = (
+                100 * self.seconds[stage] / self.wall_time if self.wall_time else 0
+            )
+            lines.append(
+                f"  {stage:<20} {self.seconds[stage]:>10.2f} {percent:>6.1f}"
+                f" {self.calls[stage]:>8}"
+            )
+        return lines
+
+    def report(self) -> str:
+        """The stage times, and the functions taking the most time in each stage."""
+        out = io.StringIO()
+        out.write("\n".join(self.summary()) + "\n")
+        for stage in sorted(self.seconds, key=self.seconds.get, reverse=True):
+            stats = self.stats(stage)
+            if stats is None:
+                continue
+            out.write(f"\n== {stage}: {self.seconds[stage]:.2f} seconds\n")
+            stats.stream = out
+            stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        return out.getvalue()
+
+    def save(self, base_name: str) -> List[str]:
+        """Write the report to `base_name`.txt, and the statistics of the whole run
+        (for `pstats`, snakeviz and the like) to `base_name`.prof.
+
+        Returns:
+            The names of the files written.
+        """
+        filenames = []
+        stats = self.stats()
+        if stats is not None:
+            stats.dump_stats(base_name + ".prof")
+            filenames.append(base_name + ".prof")
+        with open(base_name + ".txt", "w", encoding="utf-8") as f:
+            f.write(self.report())
+        filenames.append(base_name + ".txt")
+        return filenames
+
+
+#  The profile being recorded, if any
+_active: Optional[Profile] = None
+
+
+def _current() -> Optional[Profile]:
+    profile = _active
+    if profile is None or profile.thread_id != threading.get_ident():
+        return None
+    return profile
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Count the time spent in the block towards the stage `name`, see `STAGES`.
+
+    This does nothing unless a profile is being recorded.
+    """
+    profile = _current()
+    if profile is None:
+        yield
+        return
+    profile.enter(name)
+    try:
+        yield
+    finally:
+        profile.exit()
+
+
+def iterate(name: str, iterable: Iterable[T]) -> Iterator[T]:
+    """Iterate over `iterable`, counting the time spent getting each item (in a
+    generator, for example) towards the stage `name`."""
+    if _current() is None:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def option_from_argv(argv: List[str]) -> Optional[str]:
+    """Remove "--profile" or "--profile=NAME" from `argv`, returning "" or NAME.
+
+    Returns:
+        None if the option is not given.
+    """
+    for i, arg in enumerate(argv[1:], 1):
+        if arg == "--":
+            break
+        if arg == PROFILE_OPTION or arg.startswith(PROFILE_OPTION + "="):
+            del argv[i]
+            return arg[len(PROFILE_OPTION) + 1 :]
+    return None
+
+
+def option_from_env() -> Optional[str]:
+    """Return "" or the file name set in S2YT_PROFILE, None if profiling is off."""
+    value = os.environ.get(PROFILE_ENV, "").strip()
+    if value.lower() in ("", "0", "no", "false", "off"):
+        return None
+    if value.lower() in ("1", "yes", "true", "on"):
+        return ""
+    return value
+
+
+@contextlib.contextmanager
+def recording(name: str, base_name: str = "") -> Iterator[Profile]:
+    """Profile the block, writing the report when it ends (even by an exception).
+
+    Args:
+        `name` (str): What is being profiled, like the command name.
+        `base_name` (str): The name of the files written, without the extension,
+            "s2yt-profile-<name>-<date and time>" if empty.
+    """
+    global _active
+
+    if _active is not None:
+        #  Already recording, the block is part of that profile
+        yield _active
+        return
+
+    if not base_name:
+        base_name = f"s2yt-profile-{name}-{time.strftime('%Y%m%d-%H%M%S')}"
+    profile = Profile(name)
+    _active = profile
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+        _active = None
+        print()
+        print("\n".join(profile.summary()))
+        try:
+            filenames = profile.save(base_name)
+            print(f"Profile written to {', '.join(filenames)}")
+        except OSError as e:
+            print(f"ERROR: Unable to write the profile: {e}")
+
+
+def profiled(func: Callable) -> Callable:
+    """Decorator for the command line entry points, adding the `--profile` option.
+
+    The option is taken out of `sys.argv` before the command parses its
+    arguments.  Setting S2YT_PROFILE in the environment profiles the command too.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        base_name = option_from_argv(sys.argv)
+        if base_name is None:
+            base_name = option_from_env()
+        if base_name is None:
+            return func(*args, **kwargs)
+        with recording(func.__name__, base_name):
+            return func(*args, **kwargs)
+
+    return wrapper
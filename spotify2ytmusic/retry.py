@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, TypeVar
+
+from . import profiling
+
+#  What a failed request says about retrying it, see `classify()`
+TRANSIENT = "transient"  # network errors, server errors: retry with back-off
+RATE_LIMIT = "rate-limit"  # HTTP 429: retry after a longer wait
+AUTH = "auth"  # HTTP 401 and 403: retrying won't help until the login is fixed
+PERMANENT = "permanent"  # other client errors (bad videoId, missing playlist...)
+
+#  ytmusicapi raises errors with messages like "Server returned HTTP 400: Bad
+#  Request." (as plain Exceptions in older versions), so the status is read from it
+_HTTP_STATUS_RE = re.compile(r"\bHTTP (\d{3})\b")
+
+T = TypeVar("T")
+
+
+class WriteFailed(Exception):
+    """A write that returned a response saying it did not succeed."""
+
+    def __init__(self, description: str, response) -> None:
+        super().__init__(f"{description} did not succeed: {response}")
+        self.response = response
+
+
+def playlist_write_succeeded(response) -> bool:
+    """Did a playlist write succeed?
+
+    ytmusicapi's playlist writes don't raise when YTMusic turns them down, they
+    return the status ("STATUS_SUCCEEDED"), a dict with the status, or the whole
+    response if it has none.
+    """
+    status = response.get("status") if isinstance(response, dict) else response
+    return isinstance(status, str) and "SUCCEEDED" in status
+
+
+@dataclass
+class RetryPolicy:
+    """How often, and how long to wait before, a failed request is retried.
+
+    The wait before retry N (from 0) is a random time between half of and the whole
+    of `base_delay * 2**N`, capped at `max_delay`.  After a rate limit it is at
+    least `rate_limit_delay`, and up to half as long again.  The randomness keeps
+    requests that failed together from being retried together.
+    """
+
+    tries: int = 6
+    base_delay: float = 2.0
+    max_delay: float = 60.0
+    #  The shortest wait after a rate limit, unless the server asks for another
+    rate_limit_delay: float = 30.0
+
+    def delay(
+        self, attempt: int, kind: str, retry_after: Optional[float] = None
+    ) -> float:
+        """The seconds to wait after failed attempt number `attempt` (from 0)."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay * 5)
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        if kind == RATE_LIMIT:
+            delay = max(delay, self.rate_limit_delay)
+            return random.uniform(delay, delay * 1.5)
+        return random.uniform(delay / 2, delay)
+
+
+class CircuitBreaker:
+    """Pauses all requests while YTMusic looks to be down or rate limiting.
+
+    After `threshold` transient or rate limit failures in a row (from any thread)
+    the breaker opens, and every request waits in `wait()` for `cooldown` seconds.
+    Then one request is let through: if it works the breaker closes, if not it
+    opens again for twice as long (up to `max_cooldown`).
+    """
+
+    def __init__(
+        self, threshold: int = 5, cooldown: float = 60.0, max_cooldown: float = 900.0
+    ) -> None:
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.cooldown = cooldown
+        #  time.monotonic() when requests may go again, None if closed
+        self.open_until: Optional[float] = None
+        self.trial_running = False
+
+    def wait(self, cancel: Optional[threading.Event] = None) -> bool:
+        """Wait until a request may be made.
+
+        Returns:
+            False if `cancel` was set while waiting.
+        """
+        announced = False
+        while True:
+            with self.lock:
+                if self.open_until is None:
+                    return True
+                remaining = self.open_until - time.monotonic()
+                if remaining <= 0 and not self.trial_running:
+                    #  Let one request through to see if YTMusic is back
+                    self.trial_running = True
+                    return True
+            if not announced:
+                print(
+                    f"NOTE: YTMusic requests keep failing, pausing for {max(remaining, 0):.0f} seconds"
+                )
+                announced = True
+            if not _sleep(max(remaining, 1.0), cancel):
+                return False
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            self.open_until = None
+            self.trial_running = False
+
+    def record_failure(self, kind: str) -> None:
+        """Count a failure, opening the breaker if it is a transient or rate limit
+        failure that makes `threshold` in a row (or a failed trial request)."""
+        if kind not in (TRANSIENT, RATE_LIMIT):
+            #  YTMusic answered, so it is up
+            self.record_success()
+            return
+        with self.lock:
+            self.failures += 1
+            if self.trial_running:
+                self.trial_running = False
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self.open_until = time.monotonic() + self.cooldown
+            elif self.failures >= self.threshold and self.open_until is None:
+                self.open_until = time.monotonic() + self.cooldown
+
+
+#  The policy and breaker used when none are given, the breaker is shared by all the
+#  requests of the process so an outage pauses all of them
+DEFAULT_POLICY = RetryPolicy()
+BREAKER = CircuitBreaker()
+
+
+def _sleep(seconds: float, cancel: Optional[threading.Event] = None) -> bool:
+    """Sleep for `seconds`, returning False if `cancel` got set."""
+    with profiling.stage("sleep"):
+        if cancel is None:
+            time.sleep(seconds)
+            return True
+        return not cancel.wait(seconds)
+
+
+def status_code(e: BaseException) -> Optional[int]:
+    """The HTTP status of a failed request, if it can be found in the exception."""
+    code = getattr(getattr(e, "response", None), "status_code", None)
+    if isinstance(code, int):
+        return code
+    m = _HTTP_STATUS_RE.search(str(e))
+    return int(m.group(1)) if m else None
+
+
+def classify(e: BaseException) -> str:
+    """Return what kind of failure an exception is: TRANSIENT, RATE_LIMIT, AUTH or
+    PERMANENT."""
+    if isinstance(e, WriteFailed):
+        #  A failure status is YTMusic turning the write down, a response without
+        #  one is incomplete and may do better next time
+        status = (
+            e.response.get("status") if isinstance(e.response, dict) else e.response
+        )
+        return PERMANENT if isinstance(status, str) else TRANSIENT
+    code = status_code(e)
+    if code is not None:
+        if code == 429:
+            return RATE_LIMIT
+        if code in (401, 403):
+            return AUTH
+        if code in (408, 409, 425) or code >= 500:
+            return TRANSIENT
+        if 400 <= code < 500:
+            return PERMANENT
+    #  Network errors and timeouts, including those of requests
+    if isinstance(e, (OSError, json.JSONDecodeError)):
+        return TRANSIENT
+    if isinstance(e, (ValueError, TypeError, KeyError, IndexError, AttributeError)):
+        return PERMANENT
+    return TRANSIENT
+
+
+def classify_new_playlist(e: BaseException) -> str:
+    """`classify()` for writes to a playlist that was just created.
+
+    A new playlist can take a moment to show up, so until it does the writes to it
+    fail with "not found" (HTTP 404), which is then worth retrying.
+    """
+    if status_code(e) == 404:
+        return TRANSIENT
+    return classify(e)
+
+
+def _retry_after(e: BaseException) -> Optional[float]:
+    """The seconds the server asked to wait in a Retry-After header, if any."""
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def call(
+    description: str,
+    func: Callable[[], T],
+    cancel: Optional[threading.Event] = None,
+    policy: Optional[RetryPolicy] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    succeeded: Optional[Callable[[T], bool]] = None,
+    classifier: Callable[[BaseException], str] = classify,
+) -> Optional[T]:
+    """Call `func()`, retrying it according to `policy` if it fails.
+
+    Transient failures and rate limits are retried with back-off, permanent and
+    auth failures are not.  While `breaker` is open, the call waits for it.  If
+    `succeeded` is given, a result it rejects is a failure too (a `WriteFailed`),
+    see `playlist_write_succeeded()`.  Failures are sorted by `classifier`.
+
+    Returns:
+        The result of `func()`, or None if it did not succeed (or `cancel` was set).
+    """
+    if policy is None:
+        policy = DEFAULT_POLICY
+    if breaker is None:
+        breaker = BREAKER
+
+    for attempt in range(policy.tries):
+        if cancel is not None and cancel.is_set():
+            return None
+        if not breaker.wait(cancel):
+            return None
+        try:
+            with profiling.stage("write"):
+                result = func()
+            if succeeded is not None and not succeeded(result):
+                raise WriteFailed(description, result)
+        except Exception as e:
+            kind = classifier(e)
+            breaker.record_failure(kind)
+            if kind == AUTH:
+                print(f"ERROR: ({description}) {e}")
+                print(
+                    "       Not authorized, is the YTMusic login still valid?  Try running 's2yt_ytoauth'"
+                )
+                return None
+            if kind == PERMANENT:
+                print(f"ERROR: ({description}) {e}")
+                return None
+            if attempt + 1 == policy.tries:
+                print(f"ERROR: (Giving up on {description}) {e}")
+                return None
+            delay = policy.delay(attempt, kind, _retry_after(e))
+            print(f"ERROR: (Retrying {description}) {e} in {delay:.0f} seconds")
+            if not _sleep(delay, cancel):
+                return None
+        else:
+            breaker.record_success()
+            return result
+    return None
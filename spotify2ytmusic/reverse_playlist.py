@@ -1,12 +1,78 @@
 #!/usr/bin/env python3
 
-import json
+import mmap
 import os
 import shutil
+import tempfile
 from argparse import ArgumentParser
 
+from . import backup_compression, backup_index
+
+#  Unchanged parts of the backup are copied in chunks of this many bytes
+_COPY_CHUNK = 1 << 20
+
+
+def _copy_range(buf, out, start: int, end: int) -> None:
+    """Copy bytes `start` to `end` of `buf` to the file `out`, a chunk at a time."""
+    for pos in range(start, end, _COPY_CHUNK):
+        out.write(buf[pos : min(pos + _COPY_CHUNK, end)])
+
+
+def _reverse_into(buf, out) -> None:
+    """Write the backup in `buf` to the file `out`, with each playlist's tracks reversed.
+
+    The tracks are copied as they are in reverse order, so only their offsets are
+    needed and each playlist is walked rather than decoded and encoded again.
+    """
+    backup = backup_index.BackupBytes(buf)
+
+    def read_element(key: str, start: int):
+        if key != "playlists" or backup.peek(start) != "{":
+            return None, backup.decode_at(start)[1]
+        tracks = []
+        end = []
+        for name, track_start, track_end, _ in backup.walk(start, end=end):
+            if name == "tracks":
+                tracks.append((track_start, track_end))
+        return tracks, end[0]
+
+    pos = 0
+    for key, _, _, tracks in backup.walk(read_element=read_element):
+        if key != "playlists" or not tracks:
+            continue
+        # Reverse the tracks in the playlist, keeping the separators between them
+        _copy_range(buf, out, pos, tracks[0][0])
+        for i, (start, end) in enumerate(reversed(tracks)):
+            _copy_range(buf, out, start, end)
+            if i + 1 < len(tracks):
+                _copy_range(buf, out, tracks[i][1], tracks[i + 1][0])
+        pos = tracks[-1][1]
+    _copy_range(buf, out, pos, len(buf))
+
+
+def _backup_filename(input_file: str) -> str:
+    """The name the backup of `input_file` is copied to before it is reversed.
+
+    "_backup" goes before the ".json", and any compression extension is kept, so
+    "lib.json" and "lib.json.gz" have their own backups.
+    """
+    root, extension = os.path.splitext(input_file)
+    compression_extension = ""
+    if extension.lower() in backup_compression.EXTENSIONS:
+        compression_extension = extension
+        root, extension = os.path.splitext(root)
+    return f"{root}_backup{extension or '.json'}{compression_extension}"
+
 
 def reverse_playlist(input_file="playlists.json", verbose=True, replace=False) -> int:
+    """Reverse the order of the tracks in every playlist of a backup file.
+
+    The backup is rewritten one playlist at a time, so only the largest playlist
+    needs to fit in memory.  Everything other than the playlist tracks is copied
+    unchanged, and the new file is written to a temporary file that then replaces
+    the original.  A compressed backup is decompressed to a temporary file first,
+    and the result is compressed the same way.
+    """
     if os.path.exists(input_file) and not replace:
         if verbose:
             print(
@@ -15,28 +81,44 @@ def reverse_playlist(input_file="playlists.json", verbose=True, replace=False) -
         return 1
 
     print("Backing up file...")
-    shutil.copyfile(input_file, input_file.split(".")[0] + "_backup.json")
-    # Load the JSON file
-    with open(input_file, "r") as file:
-        if verbose:
-            print("Loading initial JSON file...")
-        data = json.load(file)
-
-    # Copy the data to a new dictionary
-    data2 = data.copy()
+    shutil.copyfile(input_file, _backup_filename(input_file))
 
     if verbose:
         print("Reversing playlists...")
-    # Reverse the order of items in the "tracks" list
-    for i in range(len(data2["playlists"])):
-        # Reverse the tracks in the playlist
-        data2["playlists"][i]["tracks"] = data2["playlists"][i]["tracks"][::-1]
+    out_dir = os.path.dirname(os.path.abspath(input_file))
+    compression = backup_compression.detect(input_file)
+    temp_files = []
+    try:
+        source = input_file
+        if compression is not None:
+            #  The playlists are found by their offset, so work on a decompressed copy
+            with backup_compression.open_backup(
+                input_file, "rb"
+            ) as src, tempfile.NamedTemporaryFile(
+                "wb", dir=out_dir, prefix=".reverse_playlist-", delete=False
+            ) as plain:
+                temp_files.append(plain.name)
+                shutil.copyfileobj(src, plain, _COPY_CHUNK)
+            source = plain.name
 
-    if verbose:
-        print("Writing to file... (this can take a while)")
-    # Write the modified JSON back to the file
-    with open(input_file, "w") as file:
-        json.dump(data2, file)
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=out_dir, prefix=".reverse_playlist-", delete=False
+        ) as out:
+            temp_files.append(out.name)
+        with open(source, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as buf, backup_compression.open_backup(
+            out.name, "wb", compression=compression
+        ) as out_file:
+            _reverse_into(buf, out_file)
+
+        # Replace the original file with the reversed one, keeping its permissions
+        shutil.copymode(input_file, out.name)
+        os.replace(out.name, input_file)
+        temp_files.remove(out.name)
+    finally:
+        for name in temp_files:
+            os.unlink(name)
 
     if verbose:
         print("Done!")
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+
+#  A Spotify track.  The names are always known, the other fields (from the backup,
+#  see `backend._song_info()`) are None for tracks made up by hand.  `artists` is a
+#  tuple of the names of all the artists, `artist` being the first.
+SongInfo = namedtuple(
+    "SongInfo",
+    [
+        "title",
+        "artist",
+        "album",
+        "spotify_id",
+        "uri",
+        "duration_ms",
+        "artists",
+        "album_id",
+        "isrc",
+    ],
+    defaults=(None,) * 6,
+)
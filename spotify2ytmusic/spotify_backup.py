@@ -3,43 +3,129 @@
 #  This file is licensed under the MIT license
 #  This file originates from https://github.com/caseychu/spotify-backup
 
+import base64
 import codecs
+import hashlib
 import http.client
 import http.server
 import json
 import re
+import secrets
 import sys
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
 import webbrowser
+from argparse import ArgumentParser
+
+try:
+    from . import backup_compression, json_backend
+except ImportError:
+    #  Run directly as a script
+    import backup_compression
+    import json_backend
+
+
+class SpotifyAuthError(Exception):
+    """The Spotify token is not (or no longer) valid, and could not be refreshed."""
 
 
 class SpotifyAPI:
     """Class to interact with the Spotify API using an OAuth token."""
 
     BASE_URL = "https://api.spotify.com/v1/"
+    TOKEN_URL = "https://accounts.spotify.com/api/token"
+    #  A refreshable token is refreshed this many seconds before it expires
+    REFRESH_MARGIN = 300
 
     def __init__(self, auth):
         self._auth = auth
+        #  Set by `authorize_refreshable()`
+        self._client_id = None
+        self._refresh_token = None
+        self._expires_at = 0.0
 
     def get(self, url, params={}, tries=3):
-        """Fetch a resource from Spotify API."""
+        """Fetch a resource from Spotify API.
+
+        A token from `authorize_refreshable()` is refreshed when it is about to
+        expire, or is rejected.
+
+        Raises:
+            SpotifyAuthError: If the token is rejected and can't be refreshed.
+        """
         url = self._construct_url(url, params)
         for _ in range(tries):
+            if self._refresh_token and time.time() > self._expires_at:
+                self.refresh()
             try:
                 req = self._create_request(url)
                 return self._read_response(req)
+            except urllib.error.HTTPError as err:
+                if err.code != 401:
+                    print(f"Error fetching URL {url}: {err}")
+                    time.sleep(2)
+                elif self._refresh_token:
+                    print(f"Spotify token rejected fetching URL {url}, refreshing it")
+                    self._expires_at = 0.0
+                else:
+                    raise SpotifyAuthError(
+                        f"The Spotify token was rejected fetching {url}, it has probably expired"
+                    ) from err
             except Exception as err:
                 print(f"Error fetching URL {url}: {err}")
                 time.sleep(2)
         sys.exit("Failed to fetch data from Spotify API after retries.")
 
+    def refresh(self):
+        """Replace the token of `authorize_refreshable()` with a new one."""
+        self._request_token(
+            {
+                "grant_type": "refresh_token",
+                "refresh_token": self._refresh_token,
+                "client_id": self._client_id,
+            }
+        )
+
+    def _request_token(self, params):
+        """Get a token from the Spotify accounts service."""
+        req = urllib.request.Request(
+            self.TOKEN_URL,
+            data=urllib.parse.urlencode(params).encode("ascii"),
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        try:
+            token = self._read_response(req)
+        except urllib.error.HTTPError as err:
+            raise SpotifyAuthError(f"Unable to get a Spotify token: {err}") from err
+        self._auth = token["access_token"]
+        self._refresh_token = token.get("refresh_token", self._refresh_token)
+        self._expires_at = (
+            time.time() + token.get("expires_in", 3600) - self.REFRESH_MARGIN
+        )
+
     def list(self, url, params={}):
         """Fetch paginated resources and return as a combined list."""
+        return self.list_if_changed(url, params, None)
+
+    def list_if_changed(self, url, params, previous):
+        """`list()`, or `previous` (the list from an earlier backup) if the first page
+        shows that the list has not changed: it has as many items, and the newest
+        are the same (see `_item_key()`).
+
+        Only works for lists with the newest items first, like the saved tracks and
+        albums.
+        """
         response = self.get(url, params)
         items = response["items"]
+        if (
+            previous is not None
+            and response.get("total") == len(previous)
+            and [_item_key(item) for item in items]
+            == [_item_key(item) for item in previous[: len(items)]]
+        ):
+            return previous
 
         while response["next"]:
             response = self.get(response["next"])
@@ -61,6 +147,50 @@ class SpotifyAPI:
         except SpotifyAPI._Authorization as auth:
             return SpotifyAPI(auth.access_token)
 
+    @staticmethod
+    def authorize_refreshable(client_id, scope):
+        """Like `authorize()`, but with the authorization code flow (with PKCE), so
+        the token is refreshed when it expires instead of authorizing again."""
+        redirect_uri = f"http://127.0.0.1:{SpotifyAPI._SERVER_PORT}/redirect"
+        verifier = secrets.token_urlsafe(64)
+        challenge = base64.urlsafe_b64encode(
+            hashlib.sha256(verifier.encode("ascii")).digest()
+        )
+        url = "https://accounts.spotify.com/authorize?" + urllib.parse.urlencode(
+            {
+                "response_type": "code",
+                "client_id": client_id,
+                "scope": scope,
+                "redirect_uri": redirect_uri,
+                "code_challenge_method": "S256",
+                "code_challenge": challenge.rstrip(b"=").decode("ascii"),
+            }
+        )
+        print(f"Open this link if the browser doesn't open automatically: {url}")
+        webbrowser.open(url)
+
+        server = SpotifyAPI._AuthorizationServer("127.0.0.1", SpotifyAPI._SERVER_PORT)
+        try:
+            while True:
+                server.handle_request()
+        except SpotifyAPI._AuthorizationCode as auth:
+            code = auth.code
+        finally:
+            server.server_close()
+
+        spotify = SpotifyAPI(None)
+        spotify._client_id = client_id
+        spotify._request_token(
+            {
+                "grant_type": "authorization_code",
+                "code": code,
+                "redirect_uri": redirect_uri,
+                "client_id": client_id,
+                "code_verifier": verifier,
+            }
+        )
+        return spotify
+
     @staticmethod
     def _construct_auth_url(client_id, scope, redirect_uri):
         return "https://accounts.spotify.com/authorize?" + urllib.parse.urlencode(
@@ -103,6 +233,15 @@ class SpotifyAPI:
 
     class _AuthorizationHandler(http.server.BaseHTTPRequestHandler):
         def do_GET(self):
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+            if self.path.startswith("/redirect") and "error" in query:
+                self._send_page(b"Authorization failed, you may close this window.")
+                raise SpotifyAuthError(
+                    f"Spotify authorization failed: {query['error'][0]}"
+                )
+            if self.path.startswith("/redirect") and "code" in query:
+                self._send_page(b"Thanks! You may now close this window.")
+                raise SpotifyAPI._AuthorizationCode(query["code"][0])
             if self.path.startswith("/redirect"):
                 self._redirect_to_token()
             elif self.path.startswith("/token?"):
@@ -128,6 +267,12 @@ class SpotifyAPI:
             access_token = re.search("access_token=([^&]*)", self.path).group(1)
             raise SpotifyAPI._Authorization(access_token)
 
+        def _send_page(self, text):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            self.wfile.write(b"<script>close()</script>" + text)
+
         def log_message(self, format, *args):
             pass
 
@@ -135,22 +280,72 @@ class SpotifyAPI:
         def __init__(self, access_token):
             self.access_token = access_token
 
+    class _AuthorizationCode(Exception):
+        def __init__(self, code):
+            self.code = code
+
+
+def _item_key(item):
+    """What tells saved tracks and albums apart: when and what was saved."""
+    saved = item.get("track") or item.get("album") or {}
+    return item.get("added_at"), saved.get("uri")
+
+
+def load_previous(file):
+    """Load an earlier backup to update with `fetch_user_data()`, None if there is
+    none (or it can't be read)."""
+    try:
+        with backup_compression.open_backup(file, "rb") as f:
+            return json_backend.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Unable to read the previous backup '{file}': {e}")
+        return None
 
-def fetch_user_data(spotify, dump):
-    """Fetch playlists and liked songs based on the dump parameter."""
+
+def fetch_user_data(spotify, dump, previous=None):
+    """Fetch playlists and liked songs based on the dump parameter.
+
+    With `previous` (an earlier backup, see `load_previous()`), only what changed
+    since is fetched: the tracks of playlists with the same snapshot_id, and the
+    liked songs and albums if their first page is the same, are taken from it.
+    """
     playlists = []
     liked_albums = []
+    previous_playlists = {}
+    previous_liked = None
+    previous_albums = None
+    if previous is not None:
+        for playlist in previous.get("playlists") or []:
+            if playlist.get("id") is None and playlist.get("name") == "Liked Songs":
+                previous_liked = playlist["tracks"]
+            elif playlist.get("snapshot_id"):
+                previous_playlists[playlist["id"]] = playlist
+        previous_albums = previous.get("albums")
 
     if "liked" in dump:
         print("Loading liked albums and songs...")
-        liked_tracks = spotify.list("me/tracks", {"limit": 50})
-        liked_albums = spotify.list("me/albums", {"limit": 50})
+        liked_tracks = spotify.list_if_changed(
+            "me/tracks", {"limit": 50}, previous_liked
+        )
+        liked_albums = spotify.list_if_changed(
+            "me/albums", {"limit": 50}, previous_albums
+        )
         playlists.append({"name": "Liked Songs", "tracks": liked_tracks})
 
     if "playlists" in dump:
         print("Loading playlists...")
         playlist_data = spotify.list("me/playlists", {"limit": 50})
         for playlist in playlist_data:
+            unchanged = previous_playlists.get(playlist["id"])
+            if (
+                unchanged is not None
+                and unchanged["snapshot_id"] == playlist.get("snapshot_id")
+                and isinstance(unchanged.get("tracks"), list)
+            ):
+                playlist["tracks"] = unchanged["tracks"]
+                continue
             print(f"Loading playlist: {playlist['name']}")
             playlist["tracks"] = spotify.list(
                 playlist["tracks"]["href"], {"limit": 100}
@@ -160,35 +355,48 @@ def fetch_user_data(spotify, dump):
     return playlists, liked_albums
 
 
-def write_to_file(file, format, playlists, liked_albums):
-    """Write fetched data to a file in the specified format."""
+def write_to_file(file, format, playlists, liked_albums, compress=None):
+    """Write fetched data to a file in the specified format.
+
+    The file is compressed with `compress` ("gzip" or "zstd"), or if that is not
+    given, as implied by the file extension (".gz" or ".zst").
+    """
     print(f"Writing to {file}...")
-    with open(file, "w", encoding="utf-8") as f:
-        if format == "json":
-            json.dump({"playlists": playlists, "albums": liked_albums}, f)
-        else:
-            for playlist in playlists:
-                f.write(playlist["name"] + "\r\n")
-                for track in playlist["tracks"]:
-                    if track["track"]:
-                        f.write(
-                            "{name}\t{artists}\t{album}\t{uri}\t{release_date}\r\n".format(
-                                uri=track["track"]["uri"],
-                                name=track["track"]["name"],
-                                artists=", ".join(
-                                    [
-                                        artist["name"]
-                                        for artist in track["track"]["artists"]
-                                    ]
-                                ),
-                                album=track["track"]["album"]["name"],
-                                release_date=track["track"]["album"]["release_date"],
-                            )
+    if format == "json":
+        #  orjson is used to write it if it is installed, see `json_backend`
+        with backup_compression.open_backup(file, "wb", compression=compress) as f:
+            json_backend.dump_file({"playlists": playlists, "albums": liked_albums}, f)
+        return
+
+    with backup_compression.open_backup(
+        file, "w", encoding="utf-8", compression=compress
+    ) as f:
+        for playlist in playlists:
+            f.write(playlist["name"] + "\r\n")
+            for track in playlist["tracks"]:
+                if track["track"]:
+                    f.write(
+                        "{name}\t{artists}\t{album}\t{uri}\t{release_date}\r\n".format(
+                            uri=track["track"]["uri"],
+                            name=track["track"]["name"],
+                            artists=", ".join(
+                                [artist["name"] for artist in track["track"]["artists"]]
+                            ),
+                            album=track["track"]["album"]["name"],
+                            release_date=track["track"]["album"]["release_date"],
                         )
-                f.write("\r\n")
-
-
-def main(dump="playlists,liked", format="json", file="playlists.json", token=""):
+                    )
+            f.write("\r\n")
+
+
+def main(
+    dump="playlists,liked",
+    format="json",
+    file="playlists.json",
+    token="",
+    compress=None,
+    incremental=False,
+):
     print("Starting backup...")
     spotify = (
         SpotifyAPI(token)
@@ -199,10 +407,47 @@ def main(dump="playlists,liked", format="json", file="playlists.json", token="")
         )
     )
 
-    playlists, liked_albums = fetch_user_data(spotify, dump)
-    write_to_file(file, format, playlists, liked_albums)
+    previous = load_previous(file) if incremental else None
+    playlists, liked_albums = fetch_user_data(spotify, dump, previous)
+    write_to_file(file, format, playlists, liked_albums, compress)
     print(f"Backup completed! Data written to {file}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = ArgumentParser(description="Back up Spotify playlists and liked songs")
+    parser.add_argument(
+        "file",
+        nargs="?",
+        default="playlists.json",
+        help="File to write the backup to, compressed if it ends in .gz or .zst (default: playlists.json)",
+    )
+    parser.add_argument(
+        "--dump",
+        default="playlists,liked",
+        help="What to back up: playlists, liked, or both separated by commas (default: playlists,liked)",
+    )
+    parser.add_argument(
+        "--format",
+        default="json",
+        choices=["json", "txt"],
+        help="Format of the backup (default: json)",
+    )
+    parser.add_argument(
+        "--token",
+        default="",
+        help="Spotify OAuth token to use instead of authorizing in the browser",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=backup_compression.COMPRESSIONS,
+        default=None,
+        help="Compress the backup (default: by the file extension)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only fetch the playlists that changed since the backup in FILE (default: False)",
+    )
+    args = parser.parse_args()
+
+    main(args.dump, args.format, args.file, args.token, args.compress, args.incremental)
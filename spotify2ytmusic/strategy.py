@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+from typing import Dict, List, Optional
+
+from .normalize import same
+
+#  The ways `backend.lookup_song()` can find a track: the tracks of the albums found
+#  by an album search, a song search, and (for search algorithm 2) a video search.
+PATHS = ("album", "song", "video")
+DEFAULT_ORDER = ["album", "song"]
+
+#  Lookups made with the default order before the statistics are trusted
+MIN_ATTEMPTS = 20
+#  Every this many lookups use the default order, so the album path statistics
+#  keep being updated while the song path is preferred.
+EXPLORE_EVERY = 10
+
+
+class PathStats:
+    """How often a lookup path found the track, and how many API calls it took."""
+
+    __slots__ = ("attempts", "hits", "calls")
+
+    def __init__(self) -> None:
+        self.attempts = 0
+        self.hits = 0
+        self.calls = 0
+
+    def hit_rate(self) -> float:
+        """The smoothed fraction of attempts that found the track."""
+        return (self.hits + 1) / (self.attempts + 2)
+
+    def expected_cost(self) -> float:
+        """The expected number of API calls spent per track found by this path."""
+        average_calls = self.calls / self.attempts if self.attempts else 1.0
+        return average_calls / self.hit_rate()
+
+
+class LookupStrategy:
+    """Choose the order `backend.lookup_song()` tries the album and song paths in.
+
+    The album path is tried first by default as it is the most accurate, but it
+    costs up to four calls and often fails for singles and compilations.  The song
+    path only returns early when the first search hits an exact title and artist
+    match, so trying it first is cheap when it works.  The hit rate and number of
+    calls of each path are recorded, and once there are enough lookups the path with
+    the lowest expected cost per track found is tried first.  Tracks whose album has
+    the same name as the track (usually singles) always try the song path first.
+    """
+
+    def __init__(self, adaptive: bool = True) -> None:
+        """
+        Args:
+            `adaptive` (bool): Reorder the paths, if False only statistics are kept.
+        """
+        self.adaptive = adaptive
+        self.stats: Dict[str, PathStats] = {path: PathStats() for path in PATHS}
+        self.lookups = 0
+        self.orders: Dict[str, int] = {}
+
+    def order(self, track_name: str, album_name: Optional[str]) -> List[str]:
+        """Return the paths to try for a track, cheapest expected first."""
+        self.lookups += 1
+        order = self._choose_order(track_name, album_name)
+        self._count_order("-".join(order))
+        return order
+
+    def concurrent(self) -> None:
+        """Count a lookup that tries the paths all at once (a speculative lookup),
+        whose attempts are still recorded with `record()`."""
+        self.lookups += 1
+        self._count_order("concurrent")
+
+    def _count_order(self, key: str) -> None:
+        self.orders[key] = self.orders.get(key, 0) + 1
+
+    def _choose_order(self, track_name: str, album_name: Optional[str]) -> List[str]:
+        if not self.adaptive:
+            return list(DEFAULT_ORDER)
+        if album_name and same(album_name, track_name):
+            return ["song", "album"]
+        if self.lookups % EXPLORE_EVERY == 0 or any(
+            self.stats[path].attempts < MIN_ATTEMPTS for path in DEFAULT_ORDER
+        ):
+            return list(DEFAULT_ORDER)
+        return sorted(DEFAULT_ORDER, key=lambda path: self.stats[path].expected_cost())
+
+    def record(self, path: str, hit: bool, calls: int) -> None:
+        """Record an attempt of `path`, that made `calls` API calls."""
+        stats = self.stats[path]
+        stats.attempts += 1
+        stats.hits += int(hit)
+        stats.calls += calls
+
+    def report(self) -> List[str]:
+        """Describe the statistics, one line per path that was tried."""
+        lines = []
+        for path in PATHS:
+            stats = self.stats[path]
+            if not stats.attempts:
+                continue
+            lines.append(
+                f"  {path}: {stats.hits} of {stats.attempts} found, "
+                f"{stats.calls / stats.attempts:.1f} calls per attempt"
+            )
+        total_calls = sum(stats.calls for stats in self.stats.values())
+        if self.lookups:
+            lines.append(
+                f"  {total_calls / self.lookups:.1f} calls per track, orders used: "
+                + ", ".join(f"{key} {count}" for key, count in self.orders.items())
+            )
+        return lines
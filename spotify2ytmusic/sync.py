@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import bisect
+from typing import Optional, Iterator, Dict, List, Set, Tuple, TYPE_CHECKING
+
+from . import backend, retry
+from .backend import PLAYLIST_BATCH_SIZE, SongInfo
+from .mapping import MappingDB
+from .negative_cache import NegativeCache
+from .strategy import LookupStrategy
+
+if TYPE_CHECKING:
+    from ytmusicapi import YTMusic
+
+
+def plan_changes(
+    current_items: List[Dict], target_ids: List[str]
+) -> Tuple[List[Dict], List[str]]:
+    """Work out which playlist items to remove and which videoIds to add.
+
+    Args:
+        `current_items` (List[Dict]): The playlist items, in order, with "videoId" and "setVideoId".
+        `target_ids` (List[str]): The videoIds the playlist should contain, without duplicates.
+
+    Returns:
+        Tuple[List[Dict], List[str]]: The items to remove (those not in the target,
+        and repeats of an item already in the playlist), and the videoIds to add.
+    """
+    target_set = set(target_ids)
+    seen: Set[str] = set()
+    removals = []
+    for item in current_items:
+        if item["videoId"] not in target_set or item["videoId"] in seen:
+            removals.append(item)
+        seen.add(item["videoId"])
+
+    additions = [video_id for video_id in target_ids if video_id not in seen]
+    return removals, additions
+
+
+def _longest_increasing(values: List[int]) -> Set[int]:
+    """Return the indexes of a longest strictly increasing subsequence of `values`."""
+    tail_values: List[int] = []
+    tail_indexes: List[int] = []
+    previous = [-1] * len(values)
+
+    for i, value in enumerate(values):
+        n = bisect.bisect_left(tail_values, value)
+        if n > 0:
+            previous[i] = tail_indexes[n - 1]
+        if n == len(tail_values):
+            tail_values.append(value)
+            tail_indexes.append(i)
+        else:
+            tail_values[n] = value
+            tail_indexes[n] = i
+
+    result = set()
+    i = tail_indexes[-1] if tail_indexes else -1
+    while i >= 0:
+        result.add(i)
+        i = previous[i]
+    return result
+
+
+def plan_moves(
+    kept_ids: List[str], target_ids: List[str]
+) -> List[Tuple[str, Optional[str]]]:
+    """Work out the fewest moves that put the playlist into the target order.
+
+    The items in the playlist that are in the longest run of correct relative order
+    stay put, every other target item (including any not in the playlist yet) is
+    moved just before the item that follows it in the target.  The moves are ordered
+    from the end of the target to the start, so each successor is already in place
+    when an item is moved.
+
+    Args:
+        `kept_ids` (List[str]): videoIds of the items in the playlist, in playlist order.
+        `target_ids` (List[str]): The videoIds in the wanted order, without duplicates.
+
+    Returns:
+        List[Tuple[str, Optional[str]]]: (videoId, successor videoId) pairs, a
+        successor of None means moving the item to the end of the playlist.
+    """
+    position = {video_id: i for i, video_id in enumerate(kept_ids)}
+    in_playlist = [video_id for video_id in target_ids if video_id in position]
+    stay = {
+        in_playlist[i] for i in _longest_increasing([position[v] for v in in_playlist])
+    }
+
+    moves = []
+    for i in range(len(target_ids) - 1, -1, -1):
+        if target_ids[i] in stay:
+            continue
+        successor = target_ids[i + 1] if i + 1 < len(target_ids) else None
+        moves.append((target_ids[i], successor))
+    return moves
+
+
+def _match_item(
+    src_track: SongInfo, current_items: List[Dict], mappings: MappingDB
+) -> Optional[str]:
+    """Return the videoId of a Spotify track known without searching, if any.
+
+    That is the videoId of its mapping, otherwise that of the playlist item with the
+    same title, artist and duration (see `backend._exact_song()`).
+    """
+    record = mappings.find(
+        src_track.title,
+        src_track.artist,
+        src_track.album,
+        src_track.uri,
+        src_track.isrc,
+    )
+    if record is not None:
+        return record["videoId"]
+    item = backend._exact_song(
+        current_items,
+        src_track.title,
+        src_track.artist,
+        artists=src_track.artists,
+        duration_ms=src_track.duration_ms,
+    )
+    return item["videoId"] if item is not None else None
+
+
+def sync_playlist(
+    src_tracks: Iterator[SongInfo],
+    dst_pl_id: str,
+    dry_run: bool = False,
+    track_sleep: float = 0.1,
+    yt_search_algo: int = 0,
+    *,
+    yt: Optional[YTMusic] = None,
+    misses: Optional[NegativeCache] = None,
+    retry_misses: bool = False,
+    speculative: bool = False,
+    strategy: Optional[LookupStrategy] = None,
+    mappings: Optional[MappingDB] = None,
+    failed: Optional[List[SongInfo]] = None,
+) -> bool:
+    """Make a YTMusic playlist match the Spotify playlist with as few changes as possible.
+
+    Rather than adding every track, the playlist is read and only the tracks that
+    are missing are added, those no longer on Spotify are removed, and the tracks
+    that are out of order are moved.
+
+    Args:
+        `src_tracks` (Iterator[SongInfo]): The Spotify tracks, in the wanted order.
+        `dst_pl_id` (str): The YTMusic playlist ID.
+        `dry_run` (bool): Only show the changes that would be made.
+        `track_sleep` (float): Time to sleep between each track that is looked up.
+        `yt_search_algo` (int): The search algorithm, see `backend.lookup_song()`.
+        `failed` (Optional[List[SongInfo]]): If given, the Spotify tracks that could
+            not be found, added or moved into place are appended to it.
+
+    Each Spotify track is first matched to its mapping, then to the playlist item
+    with the same name, and only the tracks matched to neither are searched for, so
+    a playlist that is nearly in sync takes few calls.
+
+    Returns:
+        bool: False if the YTMusic playlist could not be read, or tracks could not
+        be removed from it.
+    """
+    if yt is None:
+        yt = backend.get_ytmusic()
+    if misses is None:
+        misses = NegativeCache()
+    if strategy is None:
+        strategy = LookupStrategy()
+    if mappings is None:
+        mappings = MappingDB()
+
+    try:
+        yt_pl = yt.get_playlist(playlistId=dst_pl_id, limit=None)
+    except Exception as e:
+        print(f"ERROR: Unable to find YTMusic playlist {dst_pl_id}: {e}")
+        return False
+    print(f"== Youtube Playlist: {yt_pl['title']}")
+
+    current_items = [
+        item
+        for item in yt_pl.get("tracks") or []
+        if item.get("videoId") and item.get("setVideoId")
+    ]
+
+    #  The Spotify tracks and their videoIds, None for the tracks not found
+    order: List[Tuple[SongInfo, Optional[str]]] = []
+    #  The Spotify tracks of each videoId, to report those whose changes fail
+    sources: Dict[str, List[SongInfo]] = {}
+    failed_ids: Set[str] = set()
+    lookup_errors = 0
+
+    def fail(video_ids: List[str]) -> None:
+        for video_id in video_ids:
+            if video_id not in failed_ids:
+                failed_ids.add(video_id)
+                if failed is not None:
+                    failed.extend(sources[video_id])
+
+    #  Only the tracks with no mapping and no item in the playlist are searched for
+    unmatched: List[int] = []
+    for src_track in src_tracks:
+        order.append((src_track, _match_item(src_track, current_items, mappings)))
+        if order[-1][1] is None:
+            unmatched.append(len(order) - 1)
+    print(f"{len(order) - len(unmatched)} tracks matched without searching")
+
+    for i, (src_track, resolution) in zip(
+        unmatched,
+        backend.resolve_tracks(
+            [order[i][0] for i in unmatched],
+            yt,
+            yt_search_algo,
+            misses,
+            retry_misses,
+            track_sleep,
+            speculative,
+            strategy,
+            mappings=mappings,
+        ),
+    ):
+        if resolution.track is None:
+            if resolution.status == "error":
+                lookup_errors += 1
+        else:
+            order[i] = (src_track, resolution.track["videoId"])
+    misses.save()
+    mappings.save()
+
+    target_ids: List[str] = []
+    for src_track, video_id in order:
+        if video_id is None:
+            if failed is not None:
+                failed.append(src_track)
+            continue
+        target_ids.append(video_id)
+        sources.setdefault(video_id, []).append(src_track)
+    target_ids = list(dict.fromkeys(target_ids))
+    removals, additions = plan_changes(current_items, target_ids)
+    if lookup_errors and removals:
+        print(
+            f"WARNING: {lookup_errors} tracks could not be looked up, not removing anything"
+        )
+        removals = []
+
+    removed = {id(item) for item in removals}
+    kept_items = [item for item in current_items if id(item) not in removed]
+    kept_ids = list(dict.fromkeys(item["videoId"] for item in kept_items))
+    #  Where the added tracks end up depends on the playlist settings, this assumes
+    #  they are appended and the moves are planned again once they are added.
+    moves = plan_moves(kept_ids + additions, target_ids)
+
+    print()
+    print(
+        f"Sync: {len(removals)} to remove, {len(additions)} to add, {len(moves)} to move"
+    )
+    if dry_run:
+        for item in removals:
+            print(f"  Remove: {item.get('title')} ({item['videoId']})")
+        for video_id in additions:
+            print(f"  Add: {video_id}")
+        for video_id, successor in moves:
+            print(f"  Move: {video_id} before {successor or '<end>'}")
+        return True
+
+    not_removed = 0
+    for start in range(0, len(removals), PLAYLIST_BATCH_SIZE):
+        batch = removals[start : start + PLAYLIST_BATCH_SIZE]
+        response = retry.call(
+            f"remove_playlist_items: {dst_pl_id}",
+            lambda: yt.remove_playlist_items(dst_pl_id, batch),
+            succeeded=retry.playlist_write_succeeded,
+        )
+        if response is None:
+            not_removed += len(batch)
+
+    set_video_ids = {}
+    for item in kept_items:
+        set_video_ids.setdefault(item["videoId"], item["setVideoId"])
+    for start in range(0, len(additions), PLAYLIST_BATCH_SIZE):
+        batch = additions[start : start + PLAYLIST_BATCH_SIZE]
+        response = retry.call(
+            f"add_playlist_items: {dst_pl_id}",
+            lambda: yt.add_playlist_items(
+                playlistId=dst_pl_id, videoIds=batch, duplicates=False
+            ),
+            succeeded=retry.playlist_write_succeeded,
+        )
+        if response is None:
+            fail(batch)
+        elif isinstance(response, dict):
+            for result in response.get("playlistEditResults") or []:
+                if result and result.get("setVideoId"):
+                    set_video_ids[result["videoId"]] = result["setVideoId"]
+
+    if additions:
+        #  Read the playlist back, so only the tracks out of order are moved and
+        #  the new items' setVideoIds are known even if the responses left them out
+        try:
+            yt_pl = yt.get_playlist(playlistId=dst_pl_id, limit=None)
+        except Exception as e:
+            print(
+                f"WARNING: Unable to read back {dst_pl_id}, moving all new tracks: {e}"
+            )
+            moves = plan_moves(kept_ids, target_ids)
+        else:
+            items = [
+                item
+                for item in yt_pl.get("tracks") or []
+                if item.get("videoId") and item.get("setVideoId")
+            ]
+            for item in items:
+                set_video_ids.setdefault(item["videoId"], item["setVideoId"])
+            moves = plan_moves(
+                list(dict.fromkeys(item["videoId"] for item in items)), target_ids
+            )
+
+    for video_id, successor in moves:
+        if video_id not in set_video_ids or (
+            successor is not None and successor not in set_video_ids
+        ):
+            print(f"WARNING: Unable to move {video_id}, it is not in the playlist")
+            fail([video_id])
+            continue
+        move_item = (
+            set_video_ids[video_id]
+            if successor is None
+            else (set_video_ids[video_id], set_video_ids[successor])
+        )
+        response = retry.call(
+            f"edit_playlist: move {video_id}",
+            lambda: yt.edit_playlist(dst_pl_id, moveItem=move_item),
+            succeeded=retry.playlist_write_succeeded,
+        )
+        if response is None:
+            fail([video_id])
+
+    if not_removed:
+        print(f"ERROR: Unable to remove {not_removed} tracks from {dst_pl_id}")
+        return False
+    print("Playlist synced!")
+    return True
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+
+from . import backend, spotify_backup, sync
+from .backend import SongInfo
+from .mapping import MappingDB
+from .negative_cache import NegativeCache
+from .strategy import LookupStrategy
+
+if TYPE_CHECKING:
+    from ytmusicapi import YTMusic
+
+DEFAULT_STATE_FILE = "watch_state.json"
+STATE_VERSION = 1
+DEFAULT_INTERVAL_MINUTES = 60.0
+#  The wait between cycles is up to this fraction of the interval shorter or longer,
+#  so that many watchers started together don't all hit the APIs together.
+DEFAULT_JITTER = 0.1
+
+
+class WatchState:
+    """What `Watcher` has synced, kept in a file between cycles and runs.
+
+    For each Spotify playlist it records the version (see `playlist_version()`)
+    last synced and the YTMusic playlist it is synced to, and it records the liked
+    songs already copied, so that a cycle only works on what changed since.
+    """
+
+    def __init__(self, filename: str = DEFAULT_STATE_FILE) -> None:
+        self.filename = filename
+        #  Spotify playlist id to {"name", "version", "ytmusic_id"}
+        self.playlists: Dict[str, Dict] = {}
+        #  The keys (see `track_key()`) of the liked songs copied
+        self.liked: Set[str] = set()
+        #  time.time() at the end of the last cycle, 0 if there was none
+        self.last_cycle = 0.0
+
+        if os.path.exists(filename):
+            try:
+                with open(filename, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if not isinstance(data, dict) or data.get("version") != STATE_VERSION:
+                    raise ValueError(f"not a version {STATE_VERSION} state file")
+            except ValueError as e:
+                print(f"WARNING: Ignoring unreadable watch state '{filename}': {e}")
+                data = {}
+            self.playlists = data.get("playlists") or {}
+            self.liked = set(data.get("liked") or [])
+            self.last_cycle = data.get("last_cycle") or 0.0
+
+    def save(self) -> None:
+        """Write the state to disk."""
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": STATE_VERSION,
+                    "last_cycle": self.last_cycle,
+                    "playlists": self.playlists,
+                    "liked": sorted(self.liked),
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_filename, self.filename)
+
+
+def track_key(track: SongInfo) -> str:
+    """What a Spotify track is known by in the state: its URI, or its names."""
+    return track.uri or "\t".join(
+        str(x) for x in (track.title, track.artist, track.album)
+    )
+
+
+def playlist_version(src_pl: Dict) -> str:
+    """Something that changes whenever a playlist of the backup changes.
+
+    That is the Spotify snapshot_id, or for backups without one, a hash of the
+    tracks.
+    """
+    if src_pl.get("snapshot_id"):
+        return src_pl["snapshot_id"]
+    digest = hashlib.sha1()
+    for item in src_pl.get("tracks") or []:
+        track = (item or {}).get("track") or {}
+        digest.update(f"{track.get('uri')}\t{track.get('name')}\n".encode("utf-8"))
+    return "tracks:" + digest.hexdigest()
+
+
+def changed_playlists(data: Dict, state: WatchState) -> List[Dict]:
+    """The playlists of the backup `data` that changed since they were synced."""
+    return [
+        src_pl
+        for src_pl in data.get("playlists") or []
+        if src_pl.get("id") is not None
+        and (state.playlists.get(src_pl["id"]) or {}).get("version")
+        != playlist_version(src_pl)
+    ]
+
+
+def new_liked_tracks(data: Dict, state: WatchState) -> Tuple[List[SongInfo], Set[str]]:
+    """The liked songs of the backup `data` not copied yet (oldest first), and the
+    keys of all the liked songs."""
+    for src_pl in data.get("playlists") or []:
+        if src_pl.get("id") is None and src_pl.get("name") == "Liked Songs":
+            tracks = list(backend.iter_playlist_tracks(src_pl))
+            keys = {track_key(track) for track in tracks}
+            return [t for t in tracks if track_key(t) not in state.liked], keys
+    return [], set()
+
+
+def next_delay(interval: float, jitter: float = DEFAULT_JITTER) -> float:
+    """The seconds to wait for the next cycle, `interval` give or take `jitter`."""
+    return interval * random.uniform(1 - jitter, 1 + jitter)
+
+
+class Watcher:
+    """Backs up Spotify and syncs what changed to YTMusic, in cycles.
+
+    Each cycle makes an incremental backup (see `spotify_backup.fetch_user_data()`),
+    so only the playlists with a new snapshot_id are fetched, then syncs only the
+    playlists that changed since the last cycle with `sync.sync_playlist()` (or
+    creates them with `backend.copy_to_new_playlist()`), and likes the new liked
+    songs.  With the mapping database, tracks that were synced before are not
+    searched for again, so the cost of a cycle follows the changes rather than the
+    size of the library.
+
+    Playlists deleted on Spotify, and songs that are no longer liked, are left
+    alone on YTMusic.
+    """
+
+    def __init__(
+        self,
+        backup_file: str = "playlists.json",
+        state: Optional[WatchState] = None,
+        *,
+        backup: bool = True,
+        token: str = "",
+        dry_run: bool = False,
+        track_sleep: float = 0.1,
+        yt_search_algo: int = 0,
+        privacy_status: str = "PRIVATE",
+        speculative: bool = False,
+        yt: Optional[YTMusic] = None,
+        misses: Optional[NegativeCache] = None,
+        mappings: Optional[MappingDB] = None,
+    ) -> None:
+        """
+        Args:
+            `backup_file` (str): The Spotify backup, updated by each cycle.
+            `state` (Optional[WatchState]): What was synced, from the default file if None.
+            `backup` (bool): Back up Spotify each cycle, if False the backup file is
+                only read (for a backup made by another job).
+            `token` (str): Spotify OAuth token, if empty the browser authorization is
+                used.  A token can't be refreshed, so the watcher stops once it expires.
+        """
+        self.backup_file = backup_file
+        self.state = state if state is not None else WatchState()
+        self.backup = backup
+        self.token = token
+        self.dry_run = dry_run
+        self.track_sleep = track_sleep
+        self.yt_search_algo = yt_search_algo
+        self.privacy_status = privacy_status
+        self.speculative = speculative
+        self.yt = yt
+        self.misses = misses if misses is not None else NegativeCache()
+        self.mappings = mappings if mappings is not None else MappingDB()
+        self.strategy = LookupStrategy()
+        self._spotify: Optional[spotify_backup.SpotifyAPI] = None
+
+    def spotify(self) -> spotify_backup.SpotifyAPI:
+        """The Spotify API, authorized in the browser on first use (unless there is a
+        token) and refreshed from then on, so the browser is only opened once."""
+        if self._spotify is None:
+            if self.token:
+                self._spotify = spotify_backup.SpotifyAPI(self.token)
+            else:
+                self._spotify = spotify_backup.SpotifyAPI.authorize_refreshable(
+                    client_id="5c098bcc800e45d49e476265bc9b6934",
+                    scope="playlist-read-private playlist-read-collaborative user-library-read",
+                )
+        return self._spotify
+
+    def load(self) -> Dict:
+        """Update the backup (unless backing up is off) and return its contents."""
+        if not self.backup:
+            return backend.load_playlists_json(self.backup_file)
+
+        previous = spotify_backup.load_previous(self.backup_file)
+        playlists, liked_albums = spotify_backup.fetch_user_data(
+            self.spotify(), "playlists,liked", previous
+        )
+        spotify_backup.write_to_file(self.backup_file, "json", playlists, liked_albums)
+        return {"playlists": playlists, "albums": liked_albums}
+
+    def sync_playlist(self, src_pl: Dict) -> None:
+        """Sync one changed Spotify playlist, recording it in the state.
+
+        The version of the playlist is only recorded if all its tracks were found
+        and written, otherwise the playlist is synced again next cycle.
+        """
+        synced = self.state.playlists.get(src_pl["id"]) or {}
+        pl_name = src_pl["name"] or f"Unnamed Spotify Playlist {src_pl['id']}"
+        print(f"== Watch: playlist '{pl_name}' changed")
+
+        dst_pl_id = synced.get("ytmusic_id") or backend.get_playlist_id_by_name(
+            self.yt, pl_name
+        )
+        src_tracks = backend.iter_playlist_tracks(src_pl, reverse_playlist=False)
+        failed: List[SongInfo] = []
+        if dst_pl_id is None:
+            dst_pl_id = backend.copy_to_new_playlist(
+                src_tracks,
+                pl_name,
+                self.privacy_status,
+                self.dry_run,
+                self.track_sleep,
+                self.yt_search_algo,
+                yt=self.yt,
+                misses=self.misses,
+                speculative=self.speculative,
+                strategy=self.strategy,
+                mappings=self.mappings,
+                failed=failed,
+            )
+            if dst_pl_id is None:
+                return
+        elif not sync.sync_playlist(
+            src_tracks,
+            dst_pl_id,
+            self.dry_run,
+            self.track_sleep,
+            self.yt_search_algo,
+            yt=self.yt,
+            misses=self.misses,
+            speculative=self.speculative,
+            strategy=self.strategy,
+            mappings=self.mappings,
+            failed=failed,
+        ):
+            #  Deleted on YTMusic, or not all of the tracks removed?  Sync it again
+            #  next cycle, looking it up by name
+            self.state.playlists.pop(src_pl["id"], None)
+            self.state.save()
+            return
+
+        if self.dry_run:
+            return
+        version = playlist_version(src_pl)
+        if failed:
+            print(
+                f"== Watch: {len(failed)} tracks of '{pl_name}' were not synced, trying again next cycle"
+            )
+            version = synced.get("version")
+        self.state.playlists[src_pl["id"]] = {
+            "name": pl_name,
+            "version": version,
+            "ytmusic_id": dst_pl_id,
+        }
+        self.state.save()
+
+    def copy_liked(self, new_tracks: List[SongInfo], keys: Set[str]) -> None:
+        """Like the new liked songs, recording the ones that were liked in the state.
+
+        `keys` are those of all the liked songs on Spotify, the songs no longer
+        liked are forgotten.  Songs that could not be found or liked are left out
+        of the state, so the next cycle tries them again.
+        """
+        print(f"== Watch: {len(new_tracks)} new liked songs")
+        done = backend.copier(
+            new_tracks,
+            None,
+            self.dry_run,
+            self.track_sleep,
+            self.yt_search_algo,
+            yt=self.yt,
+            misses=self.misses,
+            speculative=self.speculative,
+            strategy=self.strategy,
+            mappings=self.mappings,
+        )
+        if not self.dry_run:
+            self.state.liked = (self.state.liked & keys) | {
+                track_key(track) for track in done
+            }
+            self.state.save()
+
+    def run_cycle(self, cancel: Optional[threading.Event] = None) -> None:
+        """Back up Spotify, and sync the playlists and liked songs that changed."""
+        data = self.load()
+        changed = changed_playlists(data, self.state)
+        new_liked, liked_keys = new_liked_tracks(data, self.state)
+        print(
+            f"== Watch: {len(changed)} changed playlists, {len(new_liked)} new liked songs"
+        )
+
+        if (changed or new_liked) and self.yt is None:
+            self.yt = backend.get_ytmusic()
+        for src_pl in changed:
+            if cancel is not None and cancel.is_set():
+                return
+            self.sync_playlist(src_pl)
+        if new_liked and not (cancel is not None and cancel.is_set()):
+            self.copy_liked(new_liked, liked_keys)
+
+        #  Forget the playlists deleted on Spotify
+        src_pl_ids = {src_pl.get("id") for src_pl in data.get("playlists") or []}
+        for src_pl_id in list(self.state.playlists):
+            if src_pl_id not in src_pl_ids:
+                del self.state.playlists[src_pl_id]
+        if not self.dry_run:
+            self.state.last_cycle = time.time()
+            self.state.save()
+
+    def run(
+        self,
+        interval: float = DEFAULT_INTERVAL_MINUTES * 60,
+        jitter: float = DEFAULT_JITTER,
+        once: bool = False,
+        cancel: Optional[threading.Event] = None,
+    ) -> None:
+        """Run a cycle every `interval` seconds (give or take `jitter`), until
+        `cancel` is set.
+
+        A watcher started again waits for the rest of the interval since the last
+        cycle recorded in the state, unless `once` is set, which runs one cycle now.
+
+        Raises:
+            spotify_backup.SpotifyAuthError: If the Spotify token expired (or was
+                revoked), which every later cycle would fail on too.
+        """
+        delay = 0.0
+        if not once and self.state.last_cycle:
+            delay = max(0.0, self.state.last_cycle + interval - time.time())
+        while True:
+            if delay:
+                print(
+                    f"== Watch: next cycle at {time.strftime('%H:%M:%S', time.localtime(time.time() + delay))}"
+                )
+                if cancel is None:
+                    time.sleep(delay)
+                elif cancel.wait(delay):
+                    return
+            try:
+                self.run_cycle(cancel)
+            except spotify_backup.SpotifyAuthError:
+                raise
+            except (Exception, SystemExit) as e:
+                #  The backup and the copy exit on some errors, which should only
+                #  end this cycle
+                print(f"ERROR: Watch cycle failed: {e!r}")
+            if once or (cancel is not None and cancel.is_set()):
+                return
+            delay = next_delay(interval, jitter)
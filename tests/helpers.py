@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from spotify2ytmusic.mapping import MappingDB
+from spotify2ytmusic.negative_cache import NegativeCache
+
+
+def fake_search(query, filter, found=None):
+    """A YTMusic search that finds no albums, and a song "vid-{query}" otherwise.
+
+    If `found` is given, only the songs with those titles are found.
+    """
+    if filter == "albums":
+        return []
+    if found is not None and query.rsplit(" by ", 1)[0] not in found:
+        return []
+    return [{"videoId": f"vid-{query}", "title": query, "artists": []}]
+
+
+def fake_ytmusic(liked=(), found=None):
+    """A YTMusic using `fake_search()`, with the video IDs `liked` already liked."""
+    yt = MagicMock()
+    yt.search.side_effect = lambda query, filter: fake_search(query, filter, found)
+    yt.get_liked_songs.return_value = {"tracks": [{"videoId": v} for v in liked]}
+    yt.add_playlist_items.return_value = {"status": "STATUS_SUCCEEDED"}
+    yt.remove_playlist_items.return_value = "STATUS_SUCCEEDED"
+    yt.edit_playlist.return_value = "STATUS_SUCCEEDED"
+    return yt
+
+
+class CacheTestCase(unittest.TestCase):
+    """Gives each test an empty `misses` cache in a temporary directory."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.misses = NegativeCache(os.path.join(self.tmpdir.name, "misses.json"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+
+class MappingTestCase(CacheTestCase):
+    """`CacheTestCase`, with empty `mappings` as well."""
+
+    def setUp(self):
+        super().setUp()
+        self.mappings = MappingDB(os.path.join(self.tmpdir.name, "mappings.json"))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+import json
+import os
+import tempfile
+import unittest
+
+from spotify2ytmusic import backend, backup_compression, spotify_backup
+from spotify2ytmusic.reverse_playlist import reverse_playlist
+
+
+def have_zstd():
+    try:
+        from compression import zstd  # noqa: F401
+
+        return True
+    except ImportError:
+        pass
+    try:
+        import zstandard  # noqa: F401
+
+        return True
+    except ImportError:
+        return False
+
+
+class TestBackupCompression(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        with open("tests/playliststest.json", "r", encoding="utf-8") as f:
+            self.data = json.load(f)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def check_compression(self, compression, extension):
+        filename = os.path.join(self.tmpdir.name, "playlists.json" + extension)
+        spotify_backup.write_to_file(filename, "json", self.data["playlists"], [])
+        self.assertEqual(backup_compression.detect(filename), compression)
+        self.assertEqual(
+            backend.load_playlists_json(filename)["playlists"], self.data["playlists"]
+        )
+
+        pl = self.data["playlists"][0]
+        self.assertEqual(
+            backend.load_spotify_playlist(pl["id"], filename)["tracks"], pl["tracks"]
+        )
+        self.assertFalse(os.path.exists(filename + ".index"))
+
+        self.assertEqual(reverse_playlist(filename, verbose=False, replace=True), 0)
+        self.assertEqual(backup_compression.detect(filename), compression)
+        self.assertEqual(
+            backend.load_playlists_json(filename)["playlists"][0]["tracks"],
+            pl["tracks"][::-1],
+        )
+
+    def test_gzip(self):
+        self.check_compression("gzip", ".gz")
+
+    @unittest.skipUnless(have_zstd(), "zstd is not available")
+    def test_zstd(self):
+        self.check_compression("zstd", ".zst")
+
+    def test_plain_and_forced(self):
+        filename = os.path.join(self.tmpdir.name, "playlists.json")
+        spotify_backup.write_to_file(filename, "json", [], [])
+        self.assertIsNone(backup_compression.detect(filename))
+
+        spotify_backup.write_to_file(filename, "json", [], [], compress="gzip")
+        self.assertEqual(backup_compression.detect(filename), "gzip")
+        self.assertEqual(
+            backend.load_playlists_json(filename), {"playlists": [], "albums": []}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+from spotify2ytmusic import backup_index
+
+
+class TestBackupIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, "playlists.json")
+        shutil.copyfile("tests/playliststest.json", self.filename)
+        with open(self.filename, "r", encoding="utf-8") as f:
+            self.data = json.load(f)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_read_playlist_matches_full_load(self):
+        for pl in self.data["playlists"]:
+            src_pl_id = None if pl["name"] == "Liked Songs" else pl["id"]
+            self.assertEqual(backup_index.read_playlist(self.filename, src_pl_id), pl)
+        self.assertTrue(os.path.exists(backup_index.index_filename(self.filename)))
+
+        with self.assertRaises(ValueError):
+            backup_index.read_playlist(self.filename, "no-such-playlist")
+
+    def test_compact_file_and_albums(self):
+        self.data["albums"] = [
+            {"album": {"name": 'Album "{[quoted]}"', "tracks": {"items": []}}},
+            {"album": {"name": "Ålbum ☃", "tracks": {"items": [{"name": "]}"}]}}},
+        ]
+        with open(self.filename, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        index = backup_index.load_index(self.filename)
+
+        self.assertEqual(len(index["albums"]), len(self.data["albums"]))
+        with open(self.filename, "rb") as f:
+            raw = f.read()
+        for entry, album in zip(index["albums"], self.data["albums"]):
+            data = raw[entry["offset"] : entry["offset"] + entry["length"]]
+            self.assertEqual(json.loads(data), album)
+
+    def test_bytes_match_text(self):
+        self.data["albums"] = [{"album": {"name": "Ålbum ☃ " * 50}}] * 20
+        text = json.dumps(self.data, ensure_ascii=False, indent=2)
+        raw = text.encode("utf-8")
+        expected = [
+            (key, element) for key, _, _, element in backup_index.iter_backup(text)
+        ]
+
+        #  Windows smaller than the values, and windows holding many of them
+        for window in (256, 1 << 20):
+            with unittest.mock.patch.object(backup_index, "_DECODE_WINDOW", window):
+                found = []
+                for key, start, end, element in backup_index.iter_backup_bytes(raw):
+                    self.assertEqual(json.loads(raw[start:end]), element)
+                    found.append((key, element))
+            self.assertEqual(found, expected)
+
+    def test_stale_index_is_rebuilt(self):
+        backup_index.load_index(self.filename)
+        self.data["playlists"][0]["id"] = "renamed"
+        with open(self.filename, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.utime(self.filename, ns=(0, 0))
+
+        pl = backup_index.read_playlist(self.filename, "renamed")
+        self.assertEqual(pl["name"], self.data["playlists"][0]["name"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+import unittest
+
+from spotify2ytmusic import backend
+from spotify2ytmusic.catalog import TrackCatalog
+
+from helpers import MappingTestCase, fake_ytmusic
+
+
+class TestTrackCatalog(MappingTestCase):
+    def test_ids_and_interning(self):
+        tracks = [
+            backend.SongInfo("Survival", "Yes", "Yes"),
+            backend.SongInfo("Roundabout", "Yes", "Fragile"),
+            backend.SongInfo("Survival", "Yes", "Yes"),
+        ]
+        catalog = TrackCatalog(tracks)
+        self.assertEqual(len(catalog), 2)
+        self.assertEqual(list(catalog.sequence), [0, 1, 0])
+        self.assertEqual([track for _, track in catalog], tracks)
+        self.assertIs(catalog.artists[0], catalog.artists[1])
+
+        self.assertEqual(catalog.result(0), (False, None))
+        catalog.set_result(0, "vid")
+        self.assertEqual(catalog.result(0), (True, "vid"))
+
+    def test_spotify_ids_are_identity(self):
+        clean = backend.SongInfo("Song", "Artist", "Album", uri="spotify:track:1")
+        explicit = backend.SongInfo("Song", "Artist", "Album", uri="spotify:track:2")
+        by_isrc = backend.SongInfo("Song", "Artist", "Album", isrc="usabc1234567")
+        catalog = TrackCatalog(
+            [clean, explicit, clean, by_isrc, by_isrc._replace(isrc="USABC1234567")]
+        )
+        self.assertEqual(list(catalog.sequence), [0, 1, 0, 2, 2])
+        self.assertEqual(catalog.get(1), explicit)
+
+    def test_copier_looks_up_repeats_once(self):
+        yt = fake_ytmusic()
+        tracks = [backend.SongInfo("Survival", "Yes", "Yes")] * 3
+        backend.copier(
+            tracks,
+            "PL_test",
+            track_sleep=0,
+            yt=yt,
+            misses=self.misses,
+            mappings=self.mappings,
+        )
+        self.assertEqual(yt.search.call_count, 2)
+        yt.add_playlist_items.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
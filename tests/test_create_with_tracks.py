@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+
+from spotify2ytmusic import backend, retry
+
+from helpers import MappingTestCase, fake_ytmusic
+
+
+class TestCreateWithTracks(MappingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.yt = fake_ytmusic()
+        self.yt.create_playlist.return_value = "PLnew"
+
+    def copy(self, yt, src, **kwargs):
+        with redirect_stdout(io.StringIO()), patch.object(backend, "_sleep") as sleep:
+            pl_id = backend.copy_to_new_playlist(
+                src,
+                "New",
+                track_sleep=0,
+                yt=yt,
+                misses=self.misses,
+                mappings=self.mappings,
+                **kwargs,
+            )
+        sleep.assert_not_called()
+        return pl_id
+
+    def test_batches(self):
+        titles = [f"Song {i}" for i in range(250)]
+        yt = fake_ytmusic(found=set(titles) - {"Song 5"})
+        yt.create_playlist.return_value = "PLnew"
+        src = [backend.SongInfo(title, "Artist", "Album") for title in titles]
+        #  Repeated tracks are looked up and added once
+        src += src[:10]
+
+        self.assertEqual(self.copy(yt, src), "PLnew")
+
+        queries = [
+            call.kwargs["query"]
+            for call in yt.search.call_args_list
+            if call.kwargs["filter"] == "songs"
+        ]
+        self.assertEqual(len(queries), len(set(queries)))
+        yt.create_playlist.assert_called_once()
+        created = yt.create_playlist.call_args.kwargs["video_ids"]
+        added = [
+            video_id
+            for call in yt.add_playlist_items.call_args_list
+            for video_id in call.kwargs["videoIds"]
+        ]
+        self.assertEqual(len(created), backend.PLAYLIST_BATCH_SIZE)
+        self.assertEqual(yt.add_playlist_items.call_count, 2)
+        self.assertEqual(
+            created + added, [f"vid-{t} by Artist" for t in titles if t != "Song 5"]
+        )
+
+    def test_new_playlist_not_found_yet(self):
+        titles = [f"Song {i}" for i in range(backend.PLAYLIST_BATCH_SIZE + 1)]
+        yt = fake_ytmusic()
+        yt.create_playlist.return_value = "PLnew"
+        yt.add_playlist_items.side_effect = [
+            Exception("Server returned HTTP 404: Not Found."),
+            {"status": "STATUS_SUCCEEDED"},
+        ]
+        failed = []
+        src = [backend.SongInfo(title, "Artist", "Album") for title in titles]
+        with patch.object(retry, "_sleep", return_value=True) as sleep:
+            self.assertEqual(self.copy(yt, src, failed=failed), "PLnew")
+        self.assertEqual(yt.add_playlist_items.call_count, 2)
+        sleep.assert_called_once()
+        self.assertEqual(failed, [])
+
+    def test_spotify_order(self):
+        """The created playlist is in Spotify order, even with reverse_playlist."""
+        spotify_file = os.path.abspath("tests/playliststest.json")
+        pl_id = "68QlHDwCiXfhodLpS72iOx"
+        queries = [
+            f"{song.title} by {song.artist}"
+            for song in backend.iter_spotify_playlist(
+                pl_id, spotify_file, reverse_playlist=False
+            )
+        ]
+        iter_playlist = backend.iter_spotify_playlist
+
+        def iter_spotify_playlist(src_pl_id, **kwargs):
+            return iter_playlist(src_pl_id, spotify_file, **kwargs)
+
+        yt = self.yt
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        try:
+            with (
+                redirect_stdout(io.StringIO()),
+                patch.object(backend, "get_ytmusic", return_value=yt),
+                patch.object(backend, "get_playlist_id_by_name", return_value=None),
+                patch.object(backend, "iter_spotify_playlist", iter_spotify_playlist),
+                patch.object(backend, "_sleep"),
+            ):
+                backend.copy_playlist(
+                    pl_id,
+                    "+New",
+                    track_sleep=0,
+                    reverse_playlist=True,
+                    create_with_tracks=True,
+                )
+        finally:
+            os.chdir(cwd)
+
+        created = yt.create_playlist.call_args.kwargs["video_ids"]
+        self.assertEqual(created, list(dict.fromkeys("vid-" + q for q in queries)))
+
+    def test_dry_run_and_cancel(self):
+        yt = self.yt
+        src = [backend.SongInfo("Song", "Artist", "Album")]
+        self.assertIsNone(self.copy(yt, src, dry_run=True))
+
+        cancel = MagicMock()
+        cancel.is_set.return_value = True
+        self.assertIsNone(self.copy(yt, src, cancel=cancel))
+        yt.create_playlist.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
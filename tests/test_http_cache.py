@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from spotify2ytmusic import http_cache
+
+SEARCH_URL = "https://music.youtube.com/youtubei/v1/search?alt=json&key=abc"
+EDIT_URL = "https://music.youtube.com/youtubei/v1/browse/edit_playlist?alt=json"
+BROWSE_URL = "https://music.youtube.com/youtubei/v1/browse?alt=json"
+
+
+def network_response(request, **kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = "OK"
+    response.headers["Content-Type"] = "application/json; charset=utf-8"
+    response._content = b'{"query": %d}' % network_response.calls
+    response.url = request.url
+    response.request = request
+    network_response.calls += 1
+    return response
+
+
+class TestHTTPCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = http_cache.ResponseStore(
+            os.path.join(self.tmpdir.name, "cache.sqlite")
+        )
+        network_response.calls = 0
+        patcher = patch.object(HTTPAdapter, "send", side_effect=network_response)
+        self.network = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def session(self, mode):
+        session = requests.Session()
+        session.mount("https://", http_cache.CachingAdapter(self.store, mode))
+        return session
+
+    def search(self, session, client_version="1.0", query="survival"):
+        body = {"context": {"client": {"clientVersion": client_version}}}
+        body["query"] = query
+        return session.post(SEARCH_URL, json=body)
+
+    def test_record_then_replay(self):
+        recorded = self.search(self.session("record")).json()
+        self.assertEqual(self.network.call_count, 1)
+
+        replay = self.session("replay")
+        self.assertEqual(self.search(replay, client_version="2.0").json(), recorded)
+        self.assertEqual(self.network.call_count, 1)
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.search(replay, query="roundabout")
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            replay.post(SEARCH_URL + "&ctoken=next", json={"query": "survival"})
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            replay.post(EDIT_URL, json={"playlistId": "PL"})
+
+    def test_prefer_falls_back_to_network(self):
+        prefer = self.session("prefer")
+        first = self.search(prefer).json()
+        self.assertEqual(self.search(prefer).json(), first)
+        self.assertEqual(self.network.call_count, 1)
+
+        #  Writes are never served from the cache
+        prefer.post(EDIT_URL, json={"playlistId": "PL"})
+        prefer.post(EDIT_URL, json={"playlistId": "PL"})
+        self.assertEqual(self.network.call_count, 3)
+
+    def test_only_lookups_are_cached(self):
+        prefer = self.session("prefer")
+        for _ in range(2):
+            prefer.post(BROWSE_URL, json={"browseId": "MPREb_drama"})
+        self.assertEqual(self.network.call_count, 1)
+
+        #  Playlists, liked songs and the library are always read from YTMusic
+        for browse_id in ("VLPL", "VLLM", "FEmusic_liked_albums", None):
+            for _ in range(2):
+                prefer.post(BROWSE_URL, json={"browseId": browse_id})
+        self.assertEqual(self.network.call_count, 9)
+
+    def test_mode_from_env(self):
+        with patch.dict(os.environ, {http_cache.MODE_ENV: "Replay"}):
+            self.assertEqual(http_cache.mode_from_env(), "replay")
+        with patch.dict(os.environ, {http_cache.MODE_ENV: "bogus"}):
+            with self.assertRaises(ValueError):
+                http_cache.mode_from_env()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+import gc
+import gzip
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from spotify2ytmusic import backend, json_backend
+
+DATA = {
+    "playlists": [
+        {
+            "name": "Sigur Rós - Ágætis byrjun",
+            "tracks": [{"track": {"name": "Svefn-g-englar", "uri": "spotify:x"}}],
+        }
+    ],
+    "albums": [],
+}
+
+
+def engines():
+    return ["stdlib"] + (["orjson"] if json_backend._import_orjson() else [])
+
+
+class TestJsonBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, data, opener=open):
+        filename = os.path.join(self.tmpdir.name, name)
+        with opener(filename, "wb") as f:
+            f.write(data)
+        return filename
+
+    def test_engine_selection(self):
+        with patch.dict(os.environ, {json_backend.ENGINE_ENV: "stdlib"}):
+            self.assertEqual(json_backend.engine(), "stdlib")
+        with patch.dict(os.environ, {json_backend.ENGINE_ENV: "bogus"}):
+            self.assertRaises(ValueError, json_backend.engine)
+        with patch.object(json_backend, "_import_orjson", return_value=None):
+            with patch.dict(os.environ, {json_backend.ENGINE_ENV: "auto"}):
+                self.assertEqual(json_backend.engine(), "stdlib")
+            with patch.dict(os.environ, {json_backend.ENGINE_ENV: "orjson"}):
+                self.assertRaises(ImportError, json_backend.engine)
+
+    def test_round_trip(self):
+        for engine in engines():
+            with self.subTest(engine=engine), patch.dict(
+                os.environ, {json_backend.ENGINE_ENV: engine}
+            ):
+                encoded = json_backend.dumps(DATA)
+                self.assertIsInstance(encoded, bytes)
+                self.assertEqual(json.loads(encoded.decode("utf-8")), DATA)
+                self.assertEqual(json_backend.loads(encoded), DATA)
+
+    def test_stdlib_writes_ascii(self):
+        with patch.dict(os.environ, {json_backend.ENGINE_ENV: "stdlib"}):
+            encoded = json_backend.dumps(DATA)
+        self.assertEqual(encoded, json.dumps(DATA).encode("ascii"))
+        latin1 = self.write("latin1.json", encoded)
+        self.assertEqual(backend.load_playlists_json(latin1, "latin-1"), DATA)
+
+    def test_gc_only_paused_without_threads(self):
+        paused = []
+        loads = json.loads
+
+        def parse(data):
+            paused.append(not gc.isenabled())
+            return loads(data)
+
+        with patch.object(json_backend.json, "loads", parse), patch.dict(
+            os.environ, {json_backend.ENGINE_ENV: "stdlib"}
+        ):
+            json_backend.loads(b"{}")
+            stop = threading.Event()
+            thread = threading.Thread(target=stop.wait)
+            thread.start()
+            try:
+                json_backend.loads(b"{}")
+            finally:
+                stop.set()
+                thread.join()
+        self.assertEqual(paused, [True, False])
+        self.assertTrue(gc.isenabled())
+
+    def test_load_playlists_json(self):
+        encoded = json.dumps(DATA).encode("utf-8")
+        plain = self.write("playlists.json", encoded)
+        compressed = self.write("playlists.json.gz", encoded, gzip.open)
+        latin1 = self.write(
+            "latin1.json", json.dumps(DATA, ensure_ascii=False).encode("latin-1")
+        )
+        for engine in engines():
+            with self.subTest(engine=engine), patch.dict(
+                os.environ, {json_backend.ENGINE_ENV: engine}
+            ):
+                self.assertEqual(backend.load_playlists_json(plain), DATA)
+                self.assertEqual(backend.load_playlists_json(compressed), DATA)
+                self.assertEqual(backend.load_playlists_json(latin1, "latin-1"), DATA)
+
+    def test_load_empty_file(self):
+        empty = self.write("empty.json", b"")
+        for engine in engines():
+            with self.subTest(engine=engine), patch.dict(
+                os.environ, {json_backend.ENGINE_ENV: engine}
+            ):
+                self.assertRaises(ValueError, backend.load_playlists_json, empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
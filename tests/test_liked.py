@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+import json
+import os
+import unittest
+
+from spotify2ytmusic import backend, plan
+
+from helpers import MappingTestCase, fake_ytmusic
+
+
+class TestSkipLiked(MappingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src_tracks = [
+            backend.SongInfo(f"Track {i}", "Artist", "Album") for i in range(4)
+        ]
+
+    def test_copier_skips_liked(self):
+        yt = fake_ytmusic(["vid-Track 1 by Artist", "vid-Track 3 by Artist"])
+        backend.copier(
+            self.src_tracks,
+            None,
+            track_sleep=0,
+            yt=yt,
+            misses=self.misses,
+            mappings=self.mappings,
+        )
+        yt.get_liked_songs.assert_called_once_with(limit=None)
+        self.assertEqual(
+            [call.args[0] for call in yt.rate_song.call_args_list],
+            ["vid-Track 0 by Artist", "vid-Track 2 by Artist"],
+        )
+
+    def test_copier_returns_liked(self):
+        yt = fake_ytmusic(["vid-Track 1 by Artist"])
+        #  The like of Track 2 fails
+        yt.rate_song.side_effect = lambda video_id, rating: (
+            None if "Track 2" in video_id else {}
+        )
+        done = backend.copier(
+            self.src_tracks,
+            None,
+            track_sleep=0,
+            yt=yt,
+            misses=self.misses,
+            mappings=self.mappings,
+        )
+        self.assertEqual([t.title for t in done], ["Track 0", "Track 1", "Track 3"])
+
+    def test_apply_skips_liked(self):
+        plan_file = os.path.join(self.tmpdir.name, "plan.json")
+        yt = fake_ytmusic(["vid-Track 0 by Artist"])
+        plan.make_plan(
+            self.src_tracks,
+            plan_file,
+            track_sleep=0,
+            yt=yt,
+            misses=self.misses,
+            mappings=self.mappings,
+        )
+        plan.apply_plan(plan_file, yt=yt)
+        with open(plan_file) as f:
+            self.assertEqual(len(json.load(f)["tracks"]), 4)
+        self.assertEqual(yt.rate_song.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+import io
+import json
+import os
+import unittest
+from contextlib import redirect_stdout
+
+from spotify2ytmusic import backend
+
+from helpers import MappingTestCase, fake_search, fake_ytmusic
+
+
+def spotify_album(name, artist, tracks):
+    return {
+        "album": {
+            "name": name,
+            "artists": [{"name": artist}],
+            "tracks": {
+                "items": [{"name": t, "artists": [{"name": artist}]} for t in tracks]
+            },
+        }
+    }
+
+
+class TestCopyLikedAlbums(MappingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.backup = os.path.join(self.tmpdir.name, "playlists.json")
+        with open(self.backup, "w") as f:
+            json.dump(
+                {
+                    "playlists": [],
+                    "albums": [
+                        spotify_album(
+                            "Drama", "Yes", ["Machine Messiah", "Tempus Fugit"]
+                        ),
+                        spotify_album("Fragile", "Yes", ["Roundabout"]),
+                        spotify_album("Unknown", "Nobody", ["A", "B"]),
+                    ],
+                },
+                f,
+            )
+
+        self.yt = fake_ytmusic()
+        self.yt.get_library_albums.return_value = [{"browseId": "fragile"}]
+
+        def search(query, filter):
+            if filter != "albums":
+                return fake_search(query, filter)
+            return [
+                {
+                    "title": "Drama",
+                    "artists": [{"name": "Yes"}],
+                    "browseId": "drama",
+                },
+                {
+                    "title": "Fragile",
+                    "artists": [{"name": "Yes"}],
+                    "browseId": "fragile",
+                    "playlistId": "OLAK-fragile",
+                },
+            ]
+
+        self.yt.search.side_effect = search
+        self.yt.get_album.return_value = {
+            "audioPlaylistId": "OLAK-drama",
+            "tracks": [],
+        }
+
+    def copy(self, dry_run=False):
+        with redirect_stdout(io.StringIO()) as out:
+            backend.copy_liked_albums(
+                self.backup,
+                dry_run=dry_run,
+                track_sleep=0,
+                yt=self.yt,
+                misses=self.misses,
+                mappings=self.mappings,
+            )
+        return out.getvalue()
+
+    def liked_songs(self):
+        return [call.args[0] for call in self.yt.rate_song.call_args_list]
+
+    def test_albums_saved_whole(self):
+        self.assertIn("Saved 2 albums", self.copy())
+        self.yt.rate_playlist.assert_called_once_with("OLAK-drama", "LIKE")
+        self.assertEqual(self.liked_songs(), ["vid-A by Nobody", "vid-B by Nobody"])
+
+    def test_failed_save_likes_tracks(self):
+        self.yt.rate_playlist.return_value = None
+        self.assertIn("Saved 1 albums", self.copy())
+        self.assertEqual(
+            self.liked_songs(),
+            [
+                "vid-Machine Messiah by Yes",
+                "vid-Tempus Fugit by Yes",
+                "vid-A by Nobody",
+                "vid-B by Nobody",
+            ],
+        )
+
+    def test_dry_run(self):
+        self.assertIn("Would save 2 albums", self.copy(dry_run=True))
+        self.yt.rate_playlist.assert_not_called()
+        self.yt.rate_song.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
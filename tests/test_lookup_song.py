@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+
+import time
+import unittest
+
+from spotify2ytmusic import backend
+from spotify2ytmusic.strategy import LookupStrategy, MIN_ATTEMPTS
+
+
+class FakeYTMusic:
+    """Just enough of YTMusic for lookup_song(), with a delay on every call."""
+
+    def __init__(self, albums, songs, delay=0.05):
+        self.albums = albums
+        self.songs = songs
+        self.delay = delay
+
+    def search(self, query, filter):
+        time.sleep(self.delay)
+        if filter == "albums":
+            return [{"browseId": browse_id} for browse_id in self.albums]
+        return self.songs
+
+    def get_album(self, browse_id):
+        time.sleep(self.delay)
+        if self.albums[browse_id] is None:
+            raise Exception("album unavailable")
+        return {"tracks": self.albums[browse_id]}
+
+    def get_search_suggestions(self, query):
+        time.sleep(self.delay)
+        return [query]
+
+
+def track(title, video_id):
+    return {
+        "title": title,
+        "videoId": video_id,
+        "artists": [{"name": "Yes"}],
+        "album": {"name": "Drama"},
+    }
+
+
+class TestLookupSong(unittest.TestCase):
+    def lookup_both(self, yt):
+        sequential = backend.lookup_song(yt, "Survival", "Yes", "Yes", 0)
+        speculative = backend.lookup_song(
+            yt, "Survival", "Yes", "Yes", 0, speculative=True
+        )
+        self.assertEqual(speculative, sequential)
+        return speculative
+
+    def test_album_order_is_kept(self):
+        yt = FakeYTMusic(
+            {
+                "a1": [track("Beyond and Before", "x")],
+                "a2": None,
+                "a3": [track("Survival", "third")],
+                "a4": [track("Survival", "fourth")],
+            },
+            [track("Survival", "song")],
+        )
+        self.assertEqual(self.lookup_both(yt)["videoId"], "third")
+
+    def test_normalized_album_match(self):
+        yt = FakeYTMusic(
+            {"a1": [track("Survival - 2011 Remaster", "remaster")]},
+            [track("Survival", "song")],
+        )
+        self.assertEqual(self.lookup_both(yt)["videoId"], "remaster")
+
+    def test_exact_title_on_a_later_album(self):
+        yt = FakeYTMusic(
+            {
+                "a1": [track("Survival - 2011 Remaster", "remaster")],
+                "a2": [track("Survival", "original")],
+            },
+            [track("Survival", "song")],
+        )
+        self.assertEqual(self.lookup_both(yt)["videoId"], "original")
+
+    def test_falls_back_to_song_search(self):
+        yt = FakeYTMusic({"a1": []}, [track("Survival", "song")])
+        self.assertEqual(self.lookup_both(yt)["videoId"], "song")
+
+        yt = FakeYTMusic({}, [])
+        with self.assertRaises(ValueError):
+            backend.lookup_song(yt, "Survival", "Yes", "Yes", 0, speculative=True)
+
+    def test_shared_executor(self):
+        yt = FakeYTMusic({"a1": []}, [track("Survival", "song")], delay=0)
+        backend.lookup_song(yt, "Survival", "Yes", "Yes", 0, speculative=True)
+        executor = backend._lookup_executor()
+        backend.lookup_song(yt, "Survival", "Yes", "Yes", 0, speculative=True)
+        self.assertIs(backend._lookup_executor(), executor)
+        self.assertLessEqual(executor._max_workers, backend.YTMUSIC_POOL_SIZE)
+
+    def test_speculative_is_faster(self):
+        yt = FakeYTMusic(
+            {f"a{i}": [] for i in range(3)}, [track("Survival", "song")], delay=0.1
+        )
+        details = backend.ResearchDetails()
+        start = time.monotonic()
+        backend.lookup_song(
+            yt, "Survival", "Yes", "Yes", 0, details=details, speculative=True
+        )
+        #  Sequentially this is 6 calls, concurrently the album search then the albums
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(details.suggestions, [details.query])
+
+
+class TestLookupStrategy(unittest.TestCase):
+    def test_single_goes_song_first(self):
+        strategy = LookupStrategy()
+        self.assertEqual(strategy.order("Survival", "Survival"), ["song", "album"])
+        self.assertEqual(strategy.order("Survival", "Yes"), ["album", "song"])
+        self.assertEqual(
+            strategy.order("Survival", "Survival (Deluxe Edition)"), ["song", "album"]
+        )
+
+    def test_learns_cheaper_path(self):
+        strategy = LookupStrategy()
+        for _ in range(MIN_ATTEMPTS):
+            strategy.record("album", False, 4)
+            strategy.record("song", True, 1)
+        self.assertEqual(strategy.order("Survival", "Yes"), ["song", "album"])
+
+        self.assertEqual(
+            LookupStrategy(adaptive=False).order("Survival", "Survival"),
+            ["album", "song"],
+        )
+
+    def test_lookup_song_records_paths(self):
+        yt = FakeYTMusic({"a1": [track("Survival", "album")]}, [], delay=0)
+        strategy = LookupStrategy()
+        details = backend.ResearchDetails()
+        found = backend.lookup_song(
+            yt, "Survival", "Yes", "Yes", 0, details=details, strategy=strategy
+        )
+        self.assertEqual(found["videoId"], "album")
+        self.assertEqual(details.method, "album")
+        self.assertEqual(strategy.stats["album"].calls, 2)
+
+        #  A single skips the album path when the song search has an exact match
+        yt = FakeYTMusic(
+            {"a1": [track("Survival", "album")]}, [track("Survival", "song")], delay=0
+        )
+        found = backend.lookup_song(
+            yt, "Survival", "Yes", "Survival", 0, details=details, strategy=strategy
+        )
+        self.assertEqual(found["videoId"], "song")
+        self.assertEqual(details.method, "song")
+        self.assertEqual(strategy.stats["album"].attempts, 1)
+        self.assertTrue(strategy.report())
+
+    def test_order_does_not_change_result(self):
+        cover = {
+            "title": "Yesterday (Cover)",
+            "videoId": "wrong",
+            "artists": [{"name": "Cover Band"}],
+        }
+        songs = [cover, track("Yesterday", "right")]
+        for album_name in ("Help!", "Yesterday"):
+            strategy = LookupStrategy()
+            for speculative in (False, True):
+                yt = FakeYTMusic({"a1": []}, songs, delay=0)
+                found = backend.lookup_song(
+                    yt,
+                    "Yesterday",
+                    "Yes",
+                    album_name,
+                    0,
+                    speculative=speculative,
+                    strategy=strategy,
+                )
+                self.assertEqual(found["videoId"], "right")
+            self.assertEqual(strategy.stats["song"].hits, 2)
+
+    def test_strategy_does_not_change_result(self):
+        cover = {
+            "title": "Yesterday (Cover)",
+            "videoId": "wrong",
+            "artists": [{"name": "Cover Band"}],
+        }
+        songs = [cover, track("Yesterday", "right")]
+        for speculative in (False, True):
+            for strategy in (None, LookupStrategy()):
+                yt = FakeYTMusic({"a1": []}, songs, delay=0)
+                found = backend.lookup_song(
+                    yt,
+                    "Yesterday",
+                    "Yes",
+                    "Help!",
+                    0,
+                    speculative=speculative,
+                    strategy=strategy,
+                )
+                self.assertEqual(found["videoId"], "right")
+
+    def test_speculative_records_paths(self):
+        strategy = LookupStrategy()
+        yt = FakeYTMusic({"a1": [track("Survival", "album")]}, [], delay=0)
+        backend.lookup_song(
+            yt, "Survival", "Yes", "Yes", 0, speculative=True, strategy=strategy
+        )
+        yt = FakeYTMusic({"a1": []}, [track("Survival", "song")], delay=0)
+        backend.lookup_song(
+            yt, "Survival", "Yes", "Yes", 0, speculative=True, strategy=strategy
+        )
+        album, song = strategy.stats["album"], strategy.stats["song"]
+        self.assertEqual((album.attempts, album.hits, album.calls), (2, 1, 4))
+        self.assertEqual((song.attempts, song.hits), (1, 1))
+        self.assertEqual(strategy.lookups, 2)
+        self.assertEqual(strategy.orders, {"concurrent": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
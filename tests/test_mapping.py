@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+import os
+import unittest
+
+from spotify2ytmusic import backend
+from spotify2ytmusic.mapping import MappingDB, match_confidence
+
+from helpers import MappingTestCase, fake_ytmusic
+
+
+def yt_track(video_id, title, artist, album=None):
+    return {
+        "videoId": video_id,
+        "title": title,
+        "artists": [{"name": artist}],
+        "album": {"name": album} if album else None,
+    }
+
+
+class TestMappingDB(MappingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.filename = self.mappings.filename
+
+    def test_confidence(self):
+        track = yt_track("v1", "Survival", "Yes", "Yes")
+        self.assertEqual(match_confidence("Survival", "Yes", "Yes", track), 1.0)
+        self.assertEqual(match_confidence("Survival", "Yes", "Other", track), 0.9)
+        self.assertEqual(match_confidence("Other", "Nobody", None, track), 0.4)
+
+    def test_find_by_any_key(self):
+        db = MappingDB(self.filename)
+        db.add_lookup(
+            "Survival",
+            "Yes",
+            "Yes",
+            yt_track("v1", "Survival", "Yes", "Yes"),
+            0,
+            uri="spotify:track:abc",
+            isrc="gbaya6900001",
+        )
+        db.save()
+
+        db = MappingDB(self.filename)
+        self.assertEqual(db.find("SURVIVAL", "yes", "Yes")["videoId"], "v1")
+        self.assertEqual(
+            db.find("x", "y", "z", uri="spotify:track:abc")["videoId"], "v1"
+        )
+        self.assertEqual(db.find("x", "y", "z", isrc="GBAYA6900001")["videoId"], "v1")
+        self.assertIsNone(db.find("Survival", "Yes", "Other Album"))
+
+    def test_versions_are_not_the_same_track(self):
+        db = MappingDB(self.filename)
+        db.add_lookup(
+            "Song",
+            "Artist",
+            "Album",
+            yt_track("studio", "Song", "Artist", "Album"),
+            0,
+            uri="spotify:track:1",
+        )
+        self.assertEqual(db.find("song", "ARTIST", "Album")["videoId"], "studio")
+        self.assertIsNone(
+            db.find("Song (Live)", "Artist", "Album", uri="spotify:track:2")
+        )
+        self.assertIsNone(
+            db.find("Song - 2011 Remaster", "Artist", "Album", uri="spotify:track:3")
+        )
+
+    def test_same_names_other_release(self):
+        db = MappingDB(self.filename)
+        for video_id, uri in [
+            ("clean", "spotify:track:1"),
+            ("explicit", "spotify:track:2"),
+        ]:
+            db.add_lookup(
+                "Song",
+                "Artist",
+                "Album",
+                yt_track(video_id, "Song", "Artist", "Album"),
+                0,
+                uri=uri,
+            )
+        self.assertEqual(len(db), 2)
+        self.assertEqual(
+            db.find("Song", "Artist", "Album", uri="spotify:track:1")["videoId"],
+            "clean",
+        )
+        self.assertEqual(
+            db.find("Song", "Artist", "Album", uri="spotify:track:2")["videoId"],
+            "explicit",
+        )
+        self.assertIsNone(db.find("Song", "Artist", "Album", isrc="GBAYA6900001"))
+        #  A track without an ID is still found by its names
+        self.assertIsNotNone(db.find("Song", "Artist", "Album"))
+
+    def test_keeps_more_confident_mapping(self):
+        db = MappingDB(self.filename)
+        db.add_lookup("Survival", "Yes", "Yes", yt_track("v1", "Survival", "Yes"), 0)
+        db.add_lookup("Survival", "Yes", "Yes", yt_track("v2", "Cover", "Other"), 2)
+        self.assertEqual(db.find("Survival", "Yes", "Yes")["videoId"], "v1")
+
+        db.add_lookup(
+            "Survival", "Yes", "Yes", yt_track("v3", "Survival", "Yes", "Yes"), 1
+        )
+        self.assertEqual(db.find("Survival", "Yes", "Yes")["videoId"], "v3")
+        self.assertEqual(len(db), 1)
+
+    def test_remap(self):
+        db = MappingDB(self.filename)
+        db.add_lookup(
+            "Survival", "Yes", "Yes", yt_track("v1", "Survival", "Yes", "Yes"), 0
+        )
+        db.save()
+
+        db = MappingDB(self.filename, remap=True)
+        self.assertIsNone(db.find("Survival", "Yes", "Yes"))
+        #  Replaces the mapping even though it is less sure of the match
+        db.add_lookup("Survival", "Yes", "Yes", yt_track("v2", "Survival", "Yes"), 1)
+        db.save()
+
+        record = MappingDB(self.filename).find("Survival", "Yes", "Yes")
+        self.assertEqual((record["videoId"], record["algo"]), ("v2", 1))
+
+    def test_export_import(self):
+        db = MappingDB(self.filename)
+        db.add_lookup("Sure", "Artist", "Album", yt_track("v1", "Sure", "Artist"), 0)
+        db.add_lookup("Unsure", "Artist", "Album", yt_track("v2", "Else", "Other"), 0)
+        exported = os.path.join(self.tmpdir.name, "export.json")
+        self.assertEqual(db.write(exported, min_confidence=0.8), 1)
+
+        other = MappingDB(os.path.join(self.tmpdir.name, "other.json"))
+        self.assertEqual(other.import_file(exported), 1)
+        record = other.find("Sure", "Artist", "Album")
+        self.assertEqual(record["videoId"], "v1")
+        self.assertEqual(record["imported_from"], "export.json")
+        self.assertIsNone(other.find("Unsure", "Artist", "Album"))
+
+    def test_copier_uses_mappings(self):
+        src = [backend.SongInfo(f"Track {i}", "Artist", "Album") for i in range(3)]
+
+        yt = fake_ytmusic()
+        backend.copier(
+            src,
+            None,
+            track_sleep=0,
+            yt=yt,
+            misses=self.misses,
+            mappings=MappingDB(self.filename),
+        )
+        self.assertGreater(yt.search.call_count, 0)
+
+        yt = fake_ytmusic()
+        backend.copier(
+            src,
+            None,
+            track_sleep=0,
+            yt=yt,
+            misses=self.misses,
+            mappings=MappingDB(self.filename),
+        )
+        yt.search.assert_not_called()
+        self.assertEqual(
+            [call.args[0] for call in yt.rate_song.call_args_list],
+            [f"vid-Track {i} by Artist" for i in range(3)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
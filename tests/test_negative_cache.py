@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from spotify2ytmusic import backend
+from spotify2ytmusic.negative_cache import NegativeCache
+
+from helpers import CacheTestCase, MappingTestCase
+
+
+class TestNegativeCache(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.filename = self.misses.filename
+
+    def test_round_trip(self):
+        cache = NegativeCache(self.filename)
+        cache.add("Song", "Artist", "Album", 1)
+        cache.save()
+
+        cache = NegativeCache(self.filename)
+        self.assertTrue(cache.is_miss("  song ", "ARTIST", "Album", 1))
+        self.assertFalse(cache.is_miss("Song", "Artist", "Album", 2))
+
+        cache.discard("Song", "Artist", "Album", 1)
+        cache.save()
+        self.assertFalse(
+            NegativeCache(self.filename).is_miss("Song", "Artist", "Album", 1)
+        )
+
+    def test_expired(self):
+        cache = NegativeCache(self.filename, ttl_days=1)
+        cache.add("Song", "Artist", "Album", 1)
+        key = cache.make_key("Song", "Artist", "Album", 1)
+        cache.entries[key] = time.time() - 2 * 86400
+        cache.save()
+
+        cache = NegativeCache(self.filename, ttl_days=1)
+        self.assertFalse(cache.is_miss("Song", "Artist", "Album", 1))
+
+
+class TestCopierMisses(MappingTestCase):
+    def test_copier_skips_known_misses(self):
+        yt = MagicMock()
+        yt.search.return_value = []
+        src = [backend.SongInfo("Song", "Artist", "Album")]
+
+        misses, mappings = self.misses, self.mappings
+        backend.copier(
+            src, None, track_sleep=0, yt=yt, misses=misses, mappings=mappings
+        )
+        self.assertTrue(misses.is_miss("Song", "Artist", "Album", 0))
+        searches = yt.search.call_count
+
+        backend.copier(
+            src, None, track_sleep=0, yt=yt, misses=misses, mappings=mappings
+        )
+        self.assertEqual(yt.search.call_count, searches)
+
+        backend.copier(
+            src,
+            None,
+            track_sleep=0,
+            yt=yt,
+            misses=misses,
+            retry_misses=True,
+            mappings=mappings,
+        )
+        self.assertGreater(yt.search.call_count, searches)
+
+
+if __name__ == "__main__":
+    unittest.main()
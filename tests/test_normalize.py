@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+
+import unittest
+
+from spotify2ytmusic.normalize import fold, match_key, same
+
+
+class TestNormalize(unittest.TestCase):
+    def test_match_key(self):
+        self.assertTrue(same("Hey Jude - Remastered 2015", "Hey Jude"))
+        self.assertTrue(same("Get Lucky (feat. Pharrell Williams)", "Get Lucky"))
+        self.assertTrue(same("Get Lucky feat. Pharrell Williams", "GET LUCKY"))
+        self.assertTrue(same("Simon & Garfunkel", "Simon and Garfunkel"))
+        self.assertTrue(same("Don’t Stop Me Now", "Dont Stop Me Now!"))
+        self.assertTrue(same("Ｓｕｒｖｉｖａｌ", "survival"))
+        self.assertFalse(same("Dance with Me", "Dance"))
+        self.assertTrue(same("Fragile (Deluxe Edition)", "Fragile"))
+        self.assertTrue(same("Survival - 2011 Remaster", "Survival"))
+        self.assertEqual(match_key("(Remastered)"), "(remastered)")
+
+    def test_versions_kept(self):
+        for version in [
+            "Song (Live)",
+            "Song - Live at Wembley",
+            "Song - Acoustic",
+            "Song - Demo",
+            "Song - Radio Edit",
+            "Song - Extended Mix",
+            "Song [Remix]",
+        ]:
+            self.assertFalse(same(version, "Song"), version)
+        self.assertTrue(same("Song (Live)", "Song - Live"))
+
+    def test_fold_keeps_versions(self):
+        self.assertEqual(fold("  Song   (Live) "), "song (live)")
+        self.assertNotEqual(fold("Song (Live)"), fold("Song"))
+        self.assertEqual(fold(None), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+import io
+import json
+import os
+import unittest
+from contextlib import redirect_stdout
+
+from spotify2ytmusic import backend, plan, retry
+
+from helpers import MappingTestCase, fake_ytmusic
+
+
+class TestPlan(MappingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.plan_file = os.path.join(self.tmpdir.name, "plan.json")
+
+    def test_plan_then_apply(self):
+        yt = fake_ytmusic()
+        src_tracks = list(
+            backend.iter_spotify_playlist(
+                "68QlHDwCiXfhodLpS72iOx",
+                spotify_playlist_file="tests/playliststest.json",
+            )
+        )
+
+        plan.make_plan(
+            src_tracks,
+            self.plan_file,
+            "dst_test",
+            track_sleep=0,
+            yt=yt,
+            misses=self.misses,
+            mappings=self.mappings,
+        )
+        with open(self.plan_file) as f:
+            written = json.load(f)
+        self.assertEqual(written["destination"], "dst_test")
+        self.assertEqual(len(written["tracks"]), len(src_tracks))
+        yt.add_playlist_items.assert_not_called()
+
+        searches = yt.search.call_count
+        plan.apply_plan(self.plan_file, yt=yt)
+        self.assertEqual(yt.search.call_count, searches)
+
+        added = [
+            video_id
+            for call in yt.add_playlist_items.call_args_list
+            for video_id in call.kwargs["videoIds"]
+        ]
+        self.assertEqual(added, [t["videoId"] for t in written["tracks"]])
+        self.assertEqual(
+            yt.add_playlist_items.call_count,
+            -(-len(added) // plan.PLAYLIST_BATCH_SIZE),
+        )
+
+    def test_failed_writes(self):
+        yt = fake_ytmusic()
+        src_tracks = [
+            backend.SongInfo(f"Song {i}", "Artist", "Album") for i in range(3)
+        ]
+        for dst_pl_id in ("dst_test", None):
+            plan.make_plan(
+                src_tracks,
+                self.plan_file,
+                dst_pl_id,
+                track_sleep=0,
+                yt=yt,
+                misses=self.misses,
+                mappings=self.mappings,
+            )
+            yt.add_playlist_items.return_value = {"status": "STATUS_FAILED"}
+            yt.rate_song.side_effect = lambda video_id, rating: (
+                None if video_id == "vid-Song 1 by Artist" else {}
+            )
+            with redirect_stdout(io.StringIO()) as out:
+                self.assertEqual(plan.apply_plan(self.plan_file, yt=yt), 1)
+            self.assertIn("ERROR: 1 of", out.getvalue())
+            self.assertNotIn("Plan applied!", out.getvalue())
+
+    def test_bad_response_is_not_a_miss(self):
+        yt = fake_ytmusic()
+        yt.search.side_effect = json.JSONDecodeError("Expecting value", "", 0)
+        self.addCleanup(retry.BREAKER.record_success)
+        src_track = backend.SongInfo("Song", "Artist", "Album")
+
+        resolution = backend.resolve_track(yt, src_track, 0, self.misses)
+        self.assertEqual(resolution.status, "error")
+        self.assertFalse(self.misses.is_miss("Song", "Artist", "Album", 0))
+
+        yt.search.side_effect = lambda query, filter: []
+        resolution = backend.resolve_track(yt, src_track, 0, self.misses)
+        self.assertEqual(resolution.status, "missing")
+        self.assertTrue(self.misses.is_miss("Song", "Artist", "Album", 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
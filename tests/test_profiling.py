@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+import io
+import os
+import pstats
+import sys
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+
+from spotify2ytmusic import backend, profiling
+
+from helpers import MappingTestCase
+
+
+def slow_tracks(count, delay):
+    for i in range(count):
+        time.sleep(delay)
+        yield backend.SongInfo(f"Song {i}", "Artist", "Album")
+
+
+class TestProfiling(MappingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.base_name = os.path.join(self.tmpdir.name, "profile")
+
+    def test_nested_stages(self):
+        with redirect_stdout(io.StringIO()):
+            with profiling.recording("test", self.base_name) as profile:
+                with profiling.stage("spotify iteration"):
+                    time.sleep(0.05)
+                    with profiling.stage("backup load"):
+                        time.sleep(0.1)
+                    time.sleep(0.05)
+
+        self.assertAlmostEqual(profile.seconds["backup load"], 0.1, delta=0.05)
+        self.assertAlmostEqual(profile.seconds["spotify iteration"], 0.1, delta=0.05)
+        self.assertEqual(profile.calls["backup load"], 1)
+        self.assertAlmostEqual(
+            sum(profile.seconds.values()), profile.wall_time, delta=0.001
+        )
+        self.assertTrue(os.path.exists(self.base_name + ".txt"))
+        stats = pstats.Stats(self.base_name + ".prof")
+        self.assertTrue(any("time.sleep" in func[2] for func in stats.stats))
+
+    def test_inactive(self):
+        with profiling.stage("lookup"):
+            pass
+        self.assertEqual(list(profiling.iterate("lookup", [1, 2])), [1, 2])
+        with self.assertRaises(ValueError):
+            with redirect_stdout(io.StringIO()):
+                with profiling.recording("test", self.base_name):
+                    with profiling.stage("bogus"):
+                        pass
+
+    def test_copier_stages(self):
+        yt = MagicMock()
+        songs = [
+            {
+                "resultType": "song",
+                "title": f"Song {i}",
+                "artists": [{"name": "Artist"}],
+                "album": {"name": "Album"},
+                "videoId": f"v{i}",
+            }
+            for i in range(3)
+        ]
+        yt.search.side_effect = lambda query, filter: [
+            song for song in songs if filter == "songs" and song["title"] in query
+        ]
+        yt.get_liked_songs.return_value = {"tracks": []}
+        with redirect_stdout(io.StringIO()):
+            with profiling.recording("copier", self.base_name) as profile:
+                backend.copier(
+                    slow_tracks(3, 0.02),
+                    None,
+                    track_sleep=0.02,
+                    yt=yt,
+                    misses=self.misses,
+                    mappings=self.mappings,
+                )
+
+        self.assertGreaterEqual(profile.seconds["spotify iteration"], 0.06)
+        self.assertGreaterEqual(profile.seconds["sleep"], 0.06)
+        self.assertEqual(profile.calls["lookup"], 3)
+        self.assertEqual(profile.calls["write"], 3)
+
+    def test_profile_option(self):
+        @profiling.profiled
+        def command():
+            self.assertEqual(sys.argv, ["command", "arg"])
+
+        with patch.object(
+            sys, "argv", ["command", f"--profile={self.base_name}", "arg"]
+        ), redirect_stdout(io.StringIO()):
+            command()
+        self.assertTrue(os.path.exists(self.base_name + ".txt"))
+
+        os.remove(self.base_name + ".txt")
+        with patch.object(sys, "argv", ["command", "arg"]), patch.dict(
+            os.environ, {profiling.PROFILE_ENV: "0"}
+        ):
+            command()
+        self.assertFalse(os.path.exists(self.base_name + ".txt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
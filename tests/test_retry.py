@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+import io
+import json
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+
+from spotify2ytmusic import retry
+
+
+def http_error(status, retry_after=None):
+    e = Exception(f"Server returned HTTP {status}: Whatever.")
+    if retry_after is not None:
+        e.response = MagicMock(status_code=status, headers={"Retry-After": retry_after})
+    return e
+
+
+class TestRetry(unittest.TestCase):
+    def setUp(self):
+        self.sleeps = []
+        patcher = patch.object(retry, "_sleep", self.fake_sleep)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = retry.CircuitBreaker(threshold=100)
+        self.policy = retry.RetryPolicy(tries=4, base_delay=1, max_delay=3)
+
+    def fake_sleep(self, seconds, cancel=None):
+        self.sleeps.append(seconds)
+        return True
+
+    def call(self, func):
+        with redirect_stdout(io.StringIO()):
+            return retry.call("test", func, policy=self.policy, breaker=self.breaker)
+
+    def test_classify(self):
+        self.assertEqual(retry.classify(http_error(500)), retry.TRANSIENT)
+        self.assertEqual(retry.classify(http_error(429)), retry.RATE_LIMIT)
+        self.assertEqual(retry.classify(http_error(401)), retry.AUTH)
+        self.assertEqual(retry.classify(http_error(404)), retry.PERMANENT)
+        self.assertEqual(retry.classify(ConnectionError("reset")), retry.TRANSIENT)
+        self.assertEqual(retry.classify(TimeoutError()), retry.TRANSIENT)
+        self.assertEqual(
+            retry.classify(json.JSONDecodeError("bad", "", 0)), retry.TRANSIENT
+        )
+        self.assertEqual(retry.classify(KeyError("videoId")), retry.PERMANENT)
+        self.assertEqual(retry.classify(Exception("who knows")), retry.TRANSIENT)
+
+    def test_transient_is_retried_with_capped_backoff(self):
+        func = MagicMock(side_effect=[http_error(503)] * 3 + ["done"])
+        self.assertEqual(self.call(func), "done")
+        self.assertEqual(func.call_count, 4)
+        self.assertEqual(len(self.sleeps), 3)
+        for attempt, delay in enumerate(self.sleeps):
+            high = min(3, 2**attempt)
+            self.assertTrue(high / 2 <= delay <= high, (attempt, delay))
+
+    def test_gives_up(self):
+        func = MagicMock(side_effect=http_error(503))
+        self.assertIsNone(self.call(func))
+        self.assertEqual(func.call_count, 4)
+
+    def test_permanent_and_auth_fail_fast(self):
+        for error in (http_error(400), http_error(403), KeyError("videoId")):
+            self.sleeps.clear()
+            func = MagicMock(side_effect=error)
+            self.assertIsNone(self.call(func))
+            self.assertEqual(func.call_count, 1)
+            self.assertEqual(self.sleeps, [])
+
+    def test_rate_limit(self):
+        func = MagicMock(side_effect=[http_error(429), http_error(429, "7"), "done"])
+        self.assertEqual(self.call(func), "done")
+        self.assertGreaterEqual(self.sleeps[0], self.policy.rate_limit_delay)
+        self.assertEqual(self.sleeps[1], 7.0)
+
+    def test_failed_write_status(self):
+        def call(func):
+            with redirect_stdout(io.StringIO()):
+                return retry.call(
+                    "test",
+                    func,
+                    policy=self.policy,
+                    breaker=self.breaker,
+                    succeeded=retry.playlist_write_succeeded,
+                )
+
+        ok = {"status": "STATUS_SUCCEEDED"}
+        self.assertEqual(call(lambda: ok), ok)
+        self.assertEqual(call(lambda: "STATUS_SUCCEEDED"), "STATUS_SUCCEEDED")
+
+        #  A failure status is not retried, a response without one is
+        func = MagicMock(return_value={"status": "STATUS_FAILED"})
+        self.assertIsNone(call(func))
+        self.assertEqual(func.call_count, 1)
+        func = MagicMock(side_effect=[{"actions": []}, ok])
+        self.assertEqual(call(func), ok)
+        self.assertEqual(func.call_count, 2)
+
+    def test_rate_limit_delay_is_a_floor(self):
+        for attempt in range(10):
+            delay = self.policy.delay(attempt, retry.RATE_LIMIT)
+            self.assertGreaterEqual(delay, self.policy.rate_limit_delay)
+            self.assertLessEqual(delay, self.policy.rate_limit_delay * 1.5)
+
+    def test_circuit_breaker(self):
+        breaker = retry.CircuitBreaker(threshold=2, cooldown=0.05)
+        for _ in range(2):
+            breaker.record_failure(retry.TRANSIENT)
+        self.assertIsNotNone(breaker.open_until)
+
+        #  A failed trial request opens it for twice as long, one that works closes it
+        with redirect_stdout(io.StringIO()):
+            time.sleep(0.06)
+            self.assertTrue(breaker.wait())
+            self.assertTrue(breaker.trial_running)
+            breaker.record_failure(retry.TRANSIENT)
+            self.assertAlmostEqual(breaker.cooldown, 0.1)
+            self.assertFalse(breaker.trial_running)
+
+            time.sleep(0.11)
+            self.assertTrue(breaker.wait())
+            breaker.record_success()
+        self.assertIsNone(breaker.open_until)
+        self.assertEqual(breaker.cooldown, 0.05)
+
+    def test_open_breaker_pauses_calls(self):
+        self.breaker.open_until = time.monotonic() + 0.05
+        func = MagicMock(return_value="done")
+        with patch.object(
+            retry, "_sleep", lambda seconds, cancel=None: time.sleep(0.06) or True
+        ):
+            self.assertEqual(self.call(func), "done")
+        self.assertIsNone(self.breaker.open_until)
+
+
+if __name__ == "__main__":
+    unittest.main()
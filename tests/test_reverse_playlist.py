@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from spotify2ytmusic.reverse_playlist import reverse_playlist
+
+
+class TestReversePlaylist(unittest.TestCase):
+    def test_reverse_matches_full_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "playlists.json")
+            shutil.copyfile("tests/playliststest.json", filename)
+            with open(filename, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
+            self.assertEqual(reverse_playlist(filename, verbose=False), 1)
+            self.assertEqual(reverse_playlist(filename, verbose=False, replace=True), 0)
+
+            for pl in data["playlists"]:
+                pl["tracks"] = pl["tracks"][::-1]
+            with open(filename, "r", encoding="utf-8") as f:
+                self.assertEqual(json.load(f), data)
+            self.assertTrue(
+                os.path.exists(os.path.join(tmpdir, "playlists_backup.json"))
+            )
+            self.assertEqual(
+                sorted(os.listdir(tmpdir)), ["playlists.json", "playlists_backup.json"]
+            )
+
+    def test_keeps_mode_and_compression_suffix(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "lib.json")
+            shutil.copyfile("tests/playliststest.json", filename)
+            os.chmod(filename, 0o644)
+            with open(filename, "rb") as src, gzip.open(filename + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+
+            for name in (filename, filename + ".gz"):
+                self.assertEqual(reverse_playlist(name, verbose=False, replace=True), 0)
+            self.assertEqual(os.stat(filename).st_mode & 0o777, 0o644)
+            self.assertEqual(
+                sorted(os.listdir(tmpdir)),
+                ["lib.json", "lib.json.gz", "lib_backup.json", "lib_backup.json.gz"],
+            )
+            with gzip.open(os.path.join(tmpdir, "lib_backup.json.gz"), "rb") as f:
+                self.assertEqual(f.read()[:1], b"{")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import MagicMock
+
+from spotify2ytmusic import backend
+from spotify2ytmusic.catalog import TrackCatalog
+
+from helpers import MappingTestCase
+
+
+def song(video_id, title, artists, seconds=None):
+    return {
+        "videoId": video_id,
+        "title": title,
+        "artists": [{"name": name} for name in artists],
+        "album": {"name": "Album"},
+        "duration_seconds": seconds,
+    }
+
+
+class TestSongInfo(MappingTestCase):
+    def test_backup_fields(self):
+        track = next(
+            backend.iter_spotify_playlist(
+                "68QlHDwCiXfhodLpS72iOx",
+                spotify_playlist_file="tests/playliststest.json",
+                reverse_playlist=False,
+            )
+        )
+        self.assertEqual(track.title, "Give Me a Try")
+        self.assertEqual(track.artists, ("The Wombats",))
+        self.assertEqual(track.uri, "spotify:track:0gohFCf3LlExQw41BfajZg")
+        self.assertEqual(track.spotify_id, "0gohFCf3LlExQw41BfajZg")
+        self.assertEqual(track.duration_ms, 228470)
+        self.assertEqual(track.album_id, "0n5sLhq91buJwIW4j3Ji0I")
+        self.assertEqual(track.isrc, "GBAHT1400473")
+
+    def test_catalog_keeps_fields(self):
+        track = backend.SongInfo("Song", "A", "Album", uri="spotify:track:1")
+        catalog = TrackCatalog([track, track._replace(duration_ms=1000)])
+        self.assertEqual(len(catalog), 1)
+        self.assertEqual(catalog.get(0), track)
+        self.assertEqual(
+            TrackCatalog([backend.SongInfo("Song", "A", "Album")]).extras, [None]
+        )
+
+    def test_any_artist_matches(self):
+        songs = [song("v1", "Song", ["Other"]), song("v2", "Song", ["B", "C"])]
+        self.assertEqual(
+            backend._exact_song(songs, "Song", "A", artists=("A", "B"))["videoId"],
+            "v2",
+        )
+        self.assertIsNone(backend._exact_song(songs, "Song", "A"))
+
+    def test_duration(self):
+        songs = [song("v1", "Song", ["A"], 300), song("v2", "Song", ["A"], 181)]
+        self.assertEqual(
+            backend._exact_song(songs, "Song", "A", duration_ms=180000)["videoId"],
+            "v2",
+        )
+
+        #  The same title and duration is taken without searching videos
+        yt = MagicMock()
+        songs = [song("v1", "Other", ["X"], 180), song("v2", "Song", ["X"], 180)]
+        found = backend._match_song(
+            yt, songs, "Song", "A", "Album", 2, duration_ms=180000
+        )
+        self.assertEqual(found["videoId"], "v2")
+        yt.search.assert_not_called()
+
+    def test_mapping_by_uri(self):
+        yt = MagicMock()
+        yt.search.side_effect = lambda query, filter: (
+            [] if filter == "albums" else [song("v1", "Song", ["A"])]
+        )
+        track = backend.SongInfo("Song", "A", "Album", uri="spotify:track:1")
+        backend.resolve_track(yt, track, 0, self.misses, mappings=self.mappings)
+
+        renamed = track._replace(title="Song (Remastered)")
+        resolution = backend.resolve_track(
+            yt, renamed, 0, self.misses, mappings=self.mappings
+        )
+        self.assertEqual(resolution.status, "mapped")
+        self.assertEqual(resolution.track["videoId"], "v1")
+
+
+if __name__ == "__main__":
+    unittest.main()
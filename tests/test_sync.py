@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+
+import io
+import random
+import unittest
+from contextlib import redirect_stdout
+
+from spotify2ytmusic import sync
+from spotify2ytmusic.backend import SongInfo
+
+from helpers import MappingTestCase, fake_search, fake_ytmusic
+
+
+def apply_moves(playlist, moves):
+    """Apply (item, successor) moves the way YTMusic does."""
+    playlist = list(playlist)
+    for item, successor in moves:
+        playlist.remove(item)
+        if successor is None:
+            playlist.append(item)
+        else:
+            playlist.insert(playlist.index(successor), item)
+    return playlist
+
+
+class TestSync(unittest.TestCase):
+    def test_plan_changes(self):
+        current = [
+            {"videoId": v, "setVideoId": f"set-{i}"} for i, v in enumerate("abcab")
+        ]
+        removals, additions = sync.plan_changes(current, list("bcd"))
+        self.assertEqual(
+            [r["setVideoId"] for r in removals], ["set-0", "set-3", "set-4"]
+        )
+        self.assertEqual(additions, ["d"])
+
+    def test_small_edit_costs_few_moves(self):
+        kept = [f"v{i}" for i in range(3000)]
+        target = list(kept)
+        target.insert(10, target.pop(2000))
+        target.append("new")
+
+        moves = sync.plan_moves(kept, target)
+        self.assertEqual(len(moves), 2)
+        self.assertEqual(apply_moves(kept + ["new"], moves), target)
+
+    def test_random_orders(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            target = [f"v{i}" for i in range(rng.randint(0, 30))]
+            kept = rng.sample(target, rng.randint(0, len(target)))
+            added = [v for v in target if v not in kept]
+            rng.shuffle(target)
+            # New items may show up at either end of the playlist.
+            playlist = added + kept if rng.random() < 0.5 else kept + added
+
+            moves = sync.plan_moves(kept, target)
+            self.assertEqual(apply_moves(playlist, moves), target)
+
+
+class TestSyncFailures(MappingTestCase):
+    def sync(self, yt, titles, synced=True):
+        failed = []
+        with redirect_stdout(io.StringIO()):
+            result = sync.sync_playlist(
+                [SongInfo(title, "Artist", "Album") for title in titles],
+                "PL",
+                track_sleep=0,
+                yt=yt,
+                misses=self.misses,
+                mappings=self.mappings,
+                failed=failed,
+            )
+        self.assertEqual(result, synced)
+        return [track.title for track in failed]
+
+    def test_reports_failed_tracks(self):
+        yt = fake_ytmusic()
+        yt.get_playlist.return_value = {"title": "Playlist", "tracks": []}
+        yt.search.side_effect = lambda query, filter: (
+            [] if query.startswith("Missing") else fake_search(query, filter)
+        )
+        yt.add_playlist_items.side_effect = lambda playlistId, videoIds, duplicates: {
+            "status": "STATUS_SUCCEEDED",
+            "playlistEditResults": [
+                {"videoId": v, "setVideoId": f"set-{v}"} for v in videoIds
+            ]
+        }
+        self.assertEqual(self.sync(yt, ["A", "Missing", "B"]), ["Missing"])
+
+        #  The add fails
+        yt.add_playlist_items.side_effect = None
+        yt.add_playlist_items.return_value = {"status": "STATUS_FAILED"}
+        self.assertEqual(self.sync(yt, ["A", "B"]), ["A", "B"])
+
+    def test_keeps_items_of_missing_tracks(self):
+        yt = fake_ytmusic(found={"A"})
+        yt.get_playlist.return_value = {
+            "title": "Playlist",
+            "tracks": [
+                {
+                    "videoId": video_id,
+                    "setVideoId": f"set-{title}",
+                    "title": title,
+                    "artists": [{"name": "Artist"}],
+                }
+                for video_id, title in [
+                    ("vid-A by Artist", "A"),
+                    ("v-missing", "Missing"),
+                    ("v-gone", "Gone"),
+                ]
+            ],
+        }
+        self.assertEqual(self.sync(yt, ["A", "Missing", "Other"]), ["Other"])
+        removed = yt.remove_playlist_items.call_args.args[1]
+        self.assertEqual([item["setVideoId"] for item in removed], ["set-Gone"])
+
+        #  The removal fails
+        yt.remove_playlist_items.return_value = "STATUS_FAILED"
+        self.assertEqual(self.sync(yt, ["A"], synced=False), [])
+
+    def test_matching_playlist_is_not_searched(self):
+        yt = fake_ytmusic()
+        yt.get_playlist.return_value = {
+            "title": "Playlist",
+            "tracks": [
+                {
+                    "videoId": f"v-{title}",
+                    "setVideoId": f"set-{title}",
+                    "title": title,
+                    "artists": [{"name": "Artist"}],
+                }
+                for title in "ABC"
+            ],
+        }
+        self.assertEqual(self.sync(yt, ["A", "B", "C"]), [])
+        yt.search.assert_not_called()
+        yt.add_playlist_items.assert_not_called()
+        yt.remove_playlist_items.assert_not_called()
+        yt.edit_playlist.assert_not_called()
+
+        #  Only the new track is searched for
+        yt.add_playlist_items.side_effect = lambda playlistId, videoIds, duplicates: {
+            "status": "STATUS_SUCCEEDED",
+            "playlistEditResults": [
+                {"videoId": v, "setVideoId": f"set-{v}"} for v in videoIds
+            ]
+        }
+        self.assertEqual(self.sync(yt, ["A", "New", "C"]), [])
+        self.assertEqual(yt.search.call_count, 2)
+        self.assertEqual(
+            yt.add_playlist_items.call_args.kwargs["videoIds"], ["vid-New by Artist"]
+        )
+
+    def test_appending_makes_no_moves(self):
+        yt = fake_ytmusic()
+        items = [
+            {
+                "videoId": f"v-{title}",
+                "setVideoId": f"set-{title}",
+                "title": title,
+                "artists": [{"name": "Artist"}],
+            }
+            for title in "AB"
+        ]
+
+        def add(playlistId, videoIds, duplicates):
+            items.extend({"videoId": v, "setVideoId": f"set-{v}"} for v in videoIds)
+            return {"status": "STATUS_SUCCEEDED"}
+
+        yt.get_playlist.side_effect = lambda playlistId, limit: {
+            "title": "Playlist",
+            "tracks": list(items),
+        }
+        yt.add_playlist_items.side_effect = add
+        new = [f"New {i}" for i in range(50)]
+        self.assertEqual(self.sync(yt, ["A", "B"] + new), [])
+        self.assertEqual(yt.add_playlist_items.call_count, 1)
+        yt.edit_playlist.assert_not_called()
+
+        #  New items that show up at the top are moved into place
+        items[:] = items[:2]
+
+        def add_to_top(playlistId, videoIds, duplicates):
+            items[:0] = [{"videoId": v, "setVideoId": f"set-{v}"} for v in videoIds]
+            return {"status": "STATUS_SUCCEEDED"}
+
+        yt.add_playlist_items.side_effect = add_to_top
+        self.assertEqual(self.sync(yt, ["A", "B", "New 0"]), [])
+        self.assertEqual(yt.edit_playlist.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+
+import io
+import json
+import os
+import time
+import unittest
+import urllib.error
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+
+from spotify2ytmusic import backend, spotify_backup, sync, watch
+
+from helpers import MappingTestCase
+
+
+def track_item(name, added_at="2024-01-01T00:00:00Z"):
+    return {
+        "added_at": added_at,
+        "track": {
+            "name": name,
+            "uri": f"spotify:track:{name}",
+            "artists": [{"name": "Artist"}],
+            "album": {"name": "Album"},
+        },
+    }
+
+
+def playlist(pl_id, snapshot_id, names):
+    return {
+        "id": pl_id,
+        "name": f"Playlist {pl_id}",
+        "snapshot_id": snapshot_id,
+        "tracks": [track_item(name) for name in names],
+    }
+
+
+class FakeSpotify:
+    """Serves the Spotify API pages of a library, recording the URLs fetched."""
+
+    def __init__(self, liked, playlists):
+        self.liked = liked
+        self.playlists = playlists
+        self.urls = []
+
+    def page(self, items):
+        return {"items": list(items), "total": len(items), "next": None}
+
+    def get(self, url, params={}):
+        self.urls.append(url)
+        if url == "me/tracks":
+            return self.page(self.liked)
+        if url == "me/albums":
+            return self.page([])
+        if url == "me/playlists":
+            return self.page(
+                [
+                    {
+                        "id": pl["id"],
+                        "name": pl["name"],
+                        "snapshot_id": pl["snapshot_id"],
+                        "tracks": {"href": f"playlists/{pl['id']}/tracks"},
+                    }
+                    for pl in self.playlists
+                ]
+            )
+        pl_id = url.split("/")[1]
+        return self.page(next(p for p in self.playlists if p["id"] == pl_id)["tracks"])
+
+    list = spotify_backup.SpotifyAPI.list
+    list_if_changed = spotify_backup.SpotifyAPI.list_if_changed
+
+
+class TestIncrementalBackup(unittest.TestCase):
+    def test_fetches_only_changes(self):
+        spotify = FakeSpotify(
+            [track_item("Liked")],
+            [playlist("p1", "s1", ["A"]), playlist("p2", "s1", ["B"])],
+        )
+        with redirect_stdout(io.StringIO()):
+            playlists, albums = spotify_backup.fetch_user_data(
+                spotify, "playlists,liked"
+            )
+        previous = {"playlists": playlists, "albums": albums}
+        self.assertIn("playlists/p1/tracks", spotify.urls)
+
+        spotify.playlists[1] = playlist("p2", "s2", ["B", "C"])
+        spotify.urls = []
+        with redirect_stdout(io.StringIO()):
+            playlists, _ = spotify_backup.fetch_user_data(
+                spotify, "playlists,liked", previous
+            )
+        self.assertEqual(
+            spotify.urls,
+            ["me/tracks", "me/albums", "me/playlists", "playlists/p2/tracks"],
+        )
+        self.assertIs(playlists[0]["tracks"], previous["playlists"][0]["tracks"])
+        self.assertEqual(len(playlists[2]["tracks"]), 2)
+
+
+class TestSpotifyAuth(unittest.TestCase):
+    def rejected(self, req):
+        raise urllib.error.HTTPError(req.full_url, 401, "Unauthorized", {}, None)
+
+    def test_static_token_expires(self):
+        spotify = spotify_backup.SpotifyAPI("token")
+        with patch.object(spotify, "_read_response", side_effect=self.rejected):
+            with self.assertRaises(spotify_backup.SpotifyAuthError):
+                spotify.get("me/tracks")
+
+    def test_refreshes_token(self):
+        spotify = spotify_backup.SpotifyAPI("old")
+        spotify._client_id = "client"
+        spotify._refresh_token = "refresh"
+        spotify._expires_at = time.time() + 3600
+        tokens = []
+
+        def read_response(req):
+            if req.full_url == spotify.TOKEN_URL:
+                return {"access_token": "new", "expires_in": 3600}
+            tokens.append(req.get_header("Authorization"))
+            if spotify._auth == "old":
+                self.rejected(req)
+            return {"items": []}
+
+        with (
+            patch.object(spotify, "_read_response", side_effect=read_response),
+            redirect_stdout(io.StringIO()),
+        ):
+            self.assertEqual(spotify.get("me/tracks"), {"items": []})
+        self.assertEqual(tokens, ["Bearer old", "Bearer new"])
+        self.assertEqual(spotify._refresh_token, "refresh")
+
+    def test_watch_stops(self):
+        watcher = watch.Watcher(
+            state=watch.WatchState(os.devnull), token="token", yt=MagicMock()
+        )
+        with (
+            patch.object(spotify_backup, "load_previous", return_value=None),
+            patch.object(
+                spotify_backup.SpotifyAPI, "_read_response", side_effect=self.rejected
+            ),
+            redirect_stdout(io.StringIO()),
+        ):
+            with self.assertRaises(spotify_backup.SpotifyAuthError):
+                watcher.run(once=True)
+
+
+class TestWatcher(MappingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.backup_file = os.path.join(self.tmpdir.name, "playlists.json")
+        self.state_file = os.path.join(self.tmpdir.name, "state.json")
+        self.data = {
+            "playlists": [
+                {"name": "Liked Songs", "tracks": [track_item("Liked")]},
+                playlist("p1", "s1", ["A"]),
+                playlist("p2", "s1", ["B"]),
+            ],
+            "albums": [],
+        }
+        self.yt = MagicMock()
+        self.yt.get_library_playlists.return_value = []
+        #  The titles of the songs the fake copier fails to like, and those the
+        #  fake playlist copy and sync fail to add
+        self.like_fails = set()
+        self.add_fails = set()
+
+    def cycle(self):
+        with open(self.backup_file, "w") as f:
+            json.dump(self.data, f)
+        watcher = watch.Watcher(
+            self.backup_file,
+            watch.WatchState(self.state_file),
+            backup=False,
+            track_sleep=0,
+            yt=self.yt,
+            misses=self.misses,
+            mappings=self.mappings,
+        )
+
+        def fail(src_tracks, failed):
+            failed.extend(t for t in src_tracks if t.title in self.add_fails)
+
+        def create(src_tracks, title, *args, failed, **kwargs):
+            fail(src_tracks, failed)
+            return f"yt-{title}"
+
+        def sync_playlist(src_tracks, dst_pl_id, *args, failed, **kwargs):
+            fail(src_tracks, failed)
+            return True
+
+        with (
+            patch.object(backend, "copy_to_new_playlist", side_effect=create) as create,
+            patch.object(
+                sync, "sync_playlist", side_effect=sync_playlist
+            ) as sync_playlist,
+            patch.object(
+                backend,
+                "copier",
+                side_effect=lambda src_tracks, *args, **kwargs: [
+                    t for t in src_tracks if t.title not in self.like_fails
+                ],
+            ) as copier,
+            redirect_stdout(io.StringIO()),
+        ):
+            watcher.run(once=True)
+        return create, sync_playlist, copier
+
+    def test_syncs_only_changes(self):
+        create, sync_playlist, copier = self.cycle()
+        self.assertEqual(create.call_count, 2)
+        sync_playlist.assert_not_called()
+        self.assertEqual([t.title for t in copier.call_args.args[0]], ["Liked"])
+
+        create, sync_playlist, copier = self.cycle()
+        create.assert_not_called()
+        sync_playlist.assert_not_called()
+        copier.assert_not_called()
+
+        self.data["playlists"][2] = playlist("p2", "s2", ["B", "C"])
+        self.data["playlists"][0]["tracks"].insert(0, track_item("New"))
+        create, sync_playlist, copier = self.cycle()
+        create.assert_not_called()
+        sync_playlist.assert_called_once()
+        self.assertEqual(sync_playlist.call_args.args[1], "yt-Playlist p2")
+        self.assertEqual([t.title for t in copier.call_args.args[0]], ["New"])
+
+    def test_retries_failed_likes(self):
+        self.data["playlists"][0]["tracks"].insert(0, track_item("Fails"))
+        self.like_fails = {"Fails"}
+        _, _, copier = self.cycle()
+        self.assertEqual(
+            [t.title for t in copier.call_args.args[0]], ["Liked", "Fails"]
+        )
+
+        _, _, copier = self.cycle()
+        self.assertEqual([t.title for t in copier.call_args.args[0]], ["Fails"])
+
+        self.like_fails = set()
+        self.cycle()
+        _, _, copier = self.cycle()
+        copier.assert_not_called()
+
+    def test_retries_failed_playlists(self):
+        self.add_fails = {"B"}
+        create, _, _ = self.cycle()
+        self.assertEqual(create.call_count, 2)
+
+        create, sync_playlist, _ = self.cycle()
+        create.assert_not_called()
+        self.assertEqual(sync_playlist.call_args.args[1], "yt-Playlist p2")
+
+        self.add_fails = set()
+        _, sync_playlist, _ = self.cycle()
+        sync_playlist.assert_called_once()
+        _, sync_playlist, _ = self.cycle()
+        sync_playlist.assert_not_called()
+
+    def test_jitter(self):
+        for _ in range(100):
+            self.assertTrue(90 <= watch.next_delay(100, 0.1) <= 110)
+
+
+if __name__ == "__main__":
+    unittest.main()